@@ -1,11 +1,26 @@
+import re
 import json
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
+import codecs
+import threading
 import os
 
+# Schemas and compiled validators, loaded once per process
+_schemas = {}
+_validators = {}
+_cache_lock = threading.Lock()
+
+# Whitespace between JSON values, skipped by the streaming loader
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+
+# Keywords the fast validator understands, anything else falls back to jsonschema
+_FAST_TOP_KEYWORDS = {'$schema', '$id', 'title', 'description', 'type', 'items'}
+_FAST_ITEM_KEYWORDS = {'type', 'properties', 'required', 'additionalProperties', 'title', 'description'}
+_FAST_PROPERTY_KEYWORDS = {'type', 'minLength', 'maxLength', 'minimum', 'maximum', 'title', 'description'}
+
+
 def load_portfolio(json_file):
-    #script_dir = os.path.dirname(__file__)  # Directory of the current script
-    #file_path = os.path.join(script_dir, json_file)  # Construct full path to JSON file
+    # script_dir = os.path.dirname(__file__)  # Directory of the current script
+    # file_path = os.path.join(script_dir, json_file)  # Construct full path to JSON file
 
     # Directory of the current script
     script_dir = os.path.dirname(__file__)
@@ -18,45 +33,306 @@ def load_portfolio(json_file):
         portfolio = json.load(stock_file)
     # Used for debugging
     # print(json.dumps(portfolio, indent=2))
-    
+
     return portfolio
 
+
 def load_schema(json_schema):
+    # Schemas don't change while the app runs, read each file only once
+    if json_schema in _schemas:
+        return _schemas[json_schema]
+
     # Get the current directory where the script is located (validator.py)
-    script_dir = os.path.dirname(__file__)  
+    script_dir = os.path.dirname(__file__)
     file_path = os.path.join(script_dir, '..', 'Schemas', json_schema)  # Move up one level and then to 'schemas'
     print(f"Loading schema from: {file_path}")
 
     with open(file_path, 'r') as stock_schema:
         schema = json.load(stock_schema)
-    
+
     # Used for debugging (optional)
-    #print("Loaded Schema:")
-    #print(json.dumps(schema, indent=2))
-    
-    return schema
+    # print("Loaded Schema:")
+    # print(json.dumps(schema, indent=2))
+
+    with _cache_lock:
+        return _schemas.setdefault(json_schema, schema)
+
+
+def _is_integer(value):
+    # Draft 7 counts 1.0 as an integer but not True
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+
+
+def _compile_fast_validator(schema):
+    """
+    Build a plain Python validator for schemas shaped like stock-schema.json:
+    an array of flat objects with string and integer properties.
+    Returns None if the schema uses anything else.
+    """
+    items = schema.get('items')
+    if set(schema) - _FAST_TOP_KEYWORDS or schema.get('type') != 'array' or not isinstance(items, dict):
+        return None
+    if set(items) - _FAST_ITEM_KEYWORDS or items.get('type') != 'object':
+        return None
+    properties = items.get('properties', {})
+    for rules in properties.values():
+        if set(rules) - _FAST_PROPERTY_KEYWORDS or rules.get('type') not in ('string', 'integer'):
+            return None
+    required = list(items.get('required', []))
+    additional = items.get('additionalProperties', True)
+    if not isinstance(additional, bool):
+        return None
+
+    def check_row(row, position, errors):
+        if not isinstance(row, dict):
+            errors.append(f"[{position}]: {row!r} is not of type 'object'")
+            return
+        for name in required:
+            if name not in row:
+                errors.append(f"[{position}]: '{name}' is a required property")
+        for name, value in row.items():
+            rules = properties.get(name)
+            if rules is None:
+                if not additional:
+                    errors.append(f"[{position}]: Additional properties are not allowed ('{name}' was unexpected)")
+                continue
+            if rules['type'] == 'string':
+                if not isinstance(value, str):
+                    errors.append(f"[{position}].{name}: {value!r} is not of type 'string'")
+                elif 'minLength' in rules and len(value) < rules['minLength']:
+                    errors.append(f"[{position}].{name}: {value!r} is too short")
+                elif 'maxLength' in rules and len(value) > rules['maxLength']:
+                    errors.append(f"[{position}].{name}: {value!r} is too long")
+            else:
+                if not _is_integer(value):
+                    errors.append(f"[{position}].{name}: {value!r} is not of type 'integer'")
+                elif 'minimum' in rules and value < rules['minimum']:
+                    errors.append(f"[{position}].{name}: {value!r} is less than the minimum of {rules['minimum']}")
+                elif 'maximum' in rules and value > rules['maximum']:
+                    errors.append(f"[{position}].{name}: {value!r} is greater than the maximum of {rules['maximum']}")
+
+    def fast_validator(portfolio):
+        if not isinstance(portfolio, list):
+            return [f"{portfolio!r} is not of type 'array'"]
+        errors = []
+        for position, row in enumerate(portfolio):
+            check_row(row, position, errors)
+        return errors
+
+    fast_validator.check_row = check_row
+    return fast_validator
+
+
+def _jsonschema_validator(validator):
+    def full_validator(portfolio):
+        return [f"{list(error.absolute_path)}: {error.message}" for error in validator.iter_errors(portfolio)]
+
+    return full_validator
+
+
+def get_validator(schema):
+    """
+    Return a function that validates a portfolio against schema and returns a list of error messages.
+
+    The schema is checked against its meta-schema and compiled only once. Schemas shaped like
+    stock-schema.json get a specialised validator that checks every row in a single pass.
+    """
+    key = json.dumps(schema, sort_keys=True)
+    compiled = _validators.get(key)
+    if compiled is None:
+        compiled = _compile_fast_validator(schema)
+        if compiled is None:
+            # jsonschema is only imported for schemas the fast validator can't handle
+            from jsonschema.validators import validator_for
+
+            validator_class = validator_for(schema)
+            validator_class.check_schema(schema)
+            compiled = _jsonschema_validator(validator_class(schema))
+        with _cache_lock:
+            compiled = _validators.setdefault(key, compiled)
+    return compiled
+
 
 def validate_portfolio(portfolio, schema):
     try:
-        validate(instance=portfolio, schema=schema)
+        errors = get_validator(schema)(portfolio)
+    except Exception as e:
+        # Unexpected schema contents, let jsonschema report on it
+        print(f"Compiled validation unavailable, using jsonschema: {e}")
+        from jsonschema import validate
+        from jsonschema.exceptions import ValidationError
+
+        try:
+            validate(instance=portfolio, schema=schema)
+            errors = []
+        except ValidationError as error:
+            errors = [error.message]
+    if not errors:
         print("Portfolio validated successfully. -validator.py")
         return portfolio  # Return the validated portfolio
-    except ValidationError as e:
+    print("Validation of stock file failed! -validator.py")
+    print(f"Error message: {errors[0]}")
+    if len(errors) > 1:
+        print(f"{len(errors) - 1} more validation errors")
+    return None  # Return None on validation failure
+
+
+def _read_chunks(stream, chunk_size):
+    # Decode bytes incrementally so multi-byte characters split across chunks survive
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+            return
+        yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+
+
+def iter_portfolio(source, chunk_size=65536):
+    """
+    Yield the holdings of a portfolio one at a time without loading the whole file.
+
+    Accepts the usual JSON array format as well as JSON Lines (one holding per line).
+    source is a path (relative to the project root, like load_portfolio) or an open
+    text or binary stream such as an uploaded file.
+    """
+    if isinstance(source, str):
+        file_path = os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')), source)
+        with open(file_path, 'rb') as stock_file:
+            yield from iter_portfolio(stock_file, chunk_size)
+        return
+
+    decoder = json.JSONDecoder()
+    chunks = _read_chunks(source, chunk_size)
+    buffer = ''
+    position = 0
+    eof = False
+
+    def fill():
+        # Drop what was parsed already and read the next chunk, returns False at end of file
+        nonlocal buffer, position, eof
+        buffer = buffer[position:]
+        position = 0
+        for chunk in chunks:
+            buffer += chunk
+            return True
+        eof = True
+        return False
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position < len(buffer) or not fill():
+                return
+
+    skip_whitespace()
+    if position >= len(buffer):
+        return
+
+    if buffer[position] != '[':
+        # JSON Lines: one holding per line
+        while True:
+            newline = buffer.find('\n', position)
+            while newline < 0 and fill():
+                newline = buffer.find('\n', position)
+            line = buffer[position:] if newline < 0 else buffer[position:newline]
+            position = len(buffer) if newline < 0 else newline + 1
+            if line.strip():
+                yield json.loads(line)
+            if newline < 0:
+                return
+
+    # JSON array: decode one element at a time
+    position += 1
+    skip_whitespace()
+    if position < len(buffer) and buffer[position] == ']':
+        return
+    while True:
+        try:
+            holding, end = decoder.raw_decode(buffer, position)
+            # A value ending exactly at the end of the buffer may continue in the next chunk (e.g. a number)
+            complete = end < len(buffer) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            fill()
+            continue
+        position = end
+        yield holding
+        skip_whitespace()
+        if position >= len(buffer):
+            raise ValueError("Portfolio file ended before the closing ']'")
+        if buffer[position] == ']':
+            return
+        if buffer[position] != ',':
+            raise ValueError(f"Expected ',' or ']' in portfolio file, found {buffer[position]!r}")
+        position += 1
+        skip_whitespace()
+
+
+def stream_validated_portfolio(source, schema, max_errors=100):
+    """
+    Parse, validate and merge a portfolio one holding at a time.
+
+    Holdings of the same ticker are merged by adding up their shares, so memory depends on the
+    number of distinct tickers, not on the size of the file. Returns the merged portfolio,
+    or None if any holding fails validation or the file can't be parsed.
+    """
+    check_row = getattr(get_validator(schema), 'check_row', None)
+    if check_row is None:
+        # The fast validator doesn't cover this schema, check each holding against the items schema
+        item_schema = {'type': 'array', 'items': schema.get('items', {})}
+        if '$schema' in schema:
+            item_schema['$schema'] = schema['$schema']
+        item_validator = get_validator(item_schema)
+
+        def check_row(row, position, errors):
+            errors.extend(f"holding {position}: {error}" for error in item_validator([row]))
+
+    merged = {}
+    errors = []
+    error_count = 0
+    try:
+        for position, holding in enumerate(iter_portfolio(source)):
+            row_errors = []
+            check_row(holding, position, row_errors)
+            if row_errors:
+                error_count += len(row_errors)
+                errors.extend(row_errors[: max(0, max_errors - len(errors))])
+                continue
+            if error_count == 0:
+                merged[holding['ticker']] = merged.get(holding['ticker'], 0) + holding['nShares']
+    except ValueError as e:
+        # json.JSONDecodeError is a ValueError too
         print("Validation of stock file failed! -validator.py")
-        print(f"Error message: {e.message}")
-        return None  # Return None on validation failure
+        print(f"Error message: {e}")
+        return None
 
+    if error_count:
+        print("Validation of stock file failed! -validator.py")
+        print(f"Error message: {errors[0]}")
+        if error_count > 1:
+            print(f"{error_count - 1} more validation errors")
+        return None
+    print("Portfolio validated successfully. -validator.py")
+    return [{'ticker': ticker, 'nShares': nShares} for ticker, nShares in merged.items()]
 
-# Load portfolio and schema
-portfolio = load_portfolio('stock.json')
-schema = load_schema('stock-schema.json')
 
 """ Used for Debugging Validation """
 '''
+portfolio = load_portfolio('stock.json')
+schema = load_schema('stock-schema.json')
 validated_portfolio = validate_portfolio(portfolio, schema)
 if validated_portfolio:
     print("Validation passed, ready to proceed.")
     print(validate_portfolio) 
 else:
     print("Validation Failed. Unable to perform calculations.")
-'''
\ No newline at end of file
+'''
@@ -0,0 +1,137 @@
+from PriceApp.price import calculate_portfolio_value_over_time
+from PriceApp.price_matrix import as_price_frame
+from PriceApp.lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+METRICS = ('sharpe_ratio', 'volatility', 'sortino_ratio', 'max_drawdown', 'beta')
+
+# Largest number of values a max drawdown block holds at once
+_DRAWDOWN_BLOCK = 4_000_000
+
+
+def _window_sums(prefix, window):
+    # Sum over every full window from a prefix sum that starts with 0
+    return prefix[window:] - prefix[:-window]
+
+
+def _rolling_max_drawdown(values, window):
+    # Max drawdown of every window of `window` returns, i.e. window + 1 values
+    views = np.lib.stride_tricks.sliding_window_view(values, window + 1)
+    drawdowns = np.empty(len(views))
+    step = max(1, _DRAWDOWN_BLOCK // (window + 1))
+    for start in range(0, len(views), step):
+        block = views[start : start + step]
+        drawdowns[start : start + step] = (block / np.maximum.accumulate(block, axis=1) - 1).min(axis=1)
+    return drawdowns
+
+
+def calculate_rolling_analytics(
+    price_data, portfolio, windows=(63, 126, 252), metrics=METRICS, benchmark=None, risk_free_rate=0.03
+):
+    """
+    Calculate several rolling risk metrics for several window lengths in one pass over the returns.
+
+    The portfolio returns (and the benchmark returns for beta) are turned into prefix sums once,
+    then every window's mean, variance, downside variance and covariance is a difference of two
+    prefix sums. Sharpe Ratio uses the same daily definition as calculate_rolling_sharpe_ratio.
+
+    Parameters:
+        price_data (DataFrame): Historical price data for each stock in the portfolio.
+        portfolio (list): A list of dictionaries with 'ticker' and 'nShares'.
+        windows (list): Lookback windows in trading days (default is 63, 126 and 252).
+        metrics (list): Any of 'sharpe_ratio', 'volatility' (annualized standard deviation of daily
+            returns), 'sortino_ratio', 'max_drawdown' and 'beta' (default is all of them).
+        benchmark (str or Series): Ticker in price_data or a price Series to measure beta against.
+            Needed for 'beta', which is skipped without it.
+        risk_free_rate (float): The annual risk-free rate (default is 3%).
+
+    Returns:
+        DataFrame: Tidy frame with one row per date, metric and window ('Date', 'metric', 'window', 'value').
+                   Dates before a window first fills are left out.
+    """
+    price_data = as_price_frame(price_data)
+    metrics = list(metrics)
+    if 'beta' in metrics and benchmark is None:
+        print("No benchmark given, skipping rolling beta")
+        metrics.remove('beta')
+
+    values = calculate_portfolio_value_over_time(price_data, portfolio).dropna()
+    dates = values.index[1:]
+    values = values.to_numpy(dtype=np.float64)
+    returns = values[1:] / values[:-1] - 1
+    daily_risk_free_rate = risk_free_rate / 252
+
+    # Prefix sums of returns centered on their mean, which keeps the variances accurate
+    center = returns.mean() if len(returns) else 0.0
+    centered = returns - center
+    prefix = {
+        'sum': np.concatenate(([0.0], np.cumsum(centered))),
+        'squares': np.concatenate(([0.0], np.cumsum(centered**2))),
+        'downside': np.concatenate(([0.0], np.cumsum(np.minimum(returns - daily_risk_free_rate, 0) ** 2))),
+    }
+    if 'beta' in metrics:
+        benchmark_prices = price_data[benchmark] if isinstance(benchmark, str) else benchmark
+        # Benchmark returns on the portfolio's return dates, days without one count as zero
+        benchmark_prices = benchmark_prices.reindex(price_data.index).ffill()
+        benchmark_returns = benchmark_prices.pct_change(fill_method=None).reindex(dates)
+        benchmark_returns = np.nan_to_num(benchmark_returns.to_numpy(dtype=np.float64))
+        benchmark_centered = benchmark_returns - benchmark_returns.mean()
+        prefix['benchmark'] = np.concatenate(([0.0], np.cumsum(benchmark_centered)))
+        prefix['benchmark_squares'] = np.concatenate(([0.0], np.cumsum(benchmark_centered**2)))
+        prefix['cross'] = np.concatenate(([0.0], np.cumsum(centered * benchmark_centered)))
+
+    frames = []
+    for window in windows:
+        if window < 2 or window > len(returns):
+            continue
+        sums = _window_sums(prefix['sum'], window)
+        mean = sums / window + center
+        variance = np.maximum(_window_sums(prefix['squares'], window) - sums**2 / window, 0) / (window - 1)
+        stddev = np.sqrt(variance)
+
+        results = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if 'sharpe_ratio' in metrics:
+                results['sharpe_ratio'] = (mean - daily_risk_free_rate) / stddev
+            if 'volatility' in metrics:
+                results['volatility'] = stddev * np.sqrt(252)
+            if 'sortino_ratio' in metrics:
+                downside = np.sqrt(_window_sums(prefix['downside'], window) / window)
+                results['sortino_ratio'] = (mean - daily_risk_free_rate) / downside
+            if 'beta' in metrics:
+                benchmark_sums = _window_sums(prefix['benchmark'], window)
+                covariance = _window_sums(prefix['cross'], window) - sums * benchmark_sums / window
+                benchmark_variance = _window_sums(prefix['benchmark_squares'], window) - benchmark_sums**2 / window
+                results['beta'] = covariance / benchmark_variance
+        if 'max_drawdown' in metrics:
+            results['max_drawdown'] = _rolling_max_drawdown(values, window)
+
+        window_dates = dates[window - 1 :]
+        for metric in metrics:
+            frames.append(
+                pd.DataFrame({'Date': window_dates, 'metric': metric, 'window': window, 'value': results[metric]})
+            )
+
+    if not frames:
+        return pd.DataFrame(
+            {
+                'Date': pd.Series(dtype='datetime64[ns]'),
+                'metric': pd.Series(dtype=object),
+                'window': pd.Series(dtype=np.int64),
+                'value': pd.Series(dtype=np.float64),
+            }
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def select_rolling_metric(analytics, metric='sharpe_ratio', window=252):
+    """
+    Pick one metric and window out of a calculate_rolling_analytics frame.
+
+    Returns:
+        Series: The metric's values indexed by date.
+    """
+    rows = analytics[(analytics['metric'] == metric) & (analytics['window'] == window)]
+    return pd.Series(rows['value'].to_numpy(), index=pd.Index(rows['Date'], name='Date'), name=metric)
@@ -0,0 +1,139 @@
+from PriceApp.price_matrix import as_price_frame
+from PriceApp.lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Months that start a quarter or a year
+_REBALANCE_MONTHS = {'monthly': None, 'quarterly': (1, 4, 7, 10), 'annually': (1,)}
+
+# Days checked at once for threshold rebalancing
+_THRESHOLD_BLOCK = 63
+
+
+def _scheduled_rows(index, rebalance):
+    # Rows of the first trading day of every new month, quarter or year
+    if rebalance not in _REBALANCE_MONTHS:
+        return np.array([], dtype=np.int64)
+    months = np.asarray(index.year) * 12 + np.asarray(index.month)
+    rows = np.flatnonzero(months[1:] != months[:-1]) + 1
+    if _REBALANCE_MONTHS[rebalance] is not None:
+        rows = rows[np.isin(np.asarray(index.month)[rows], _REBALANCE_MONTHS[rebalance])]
+    return rows
+
+
+def _rebalance(shares, prices, value, weights, transaction_cost):
+    # Trade back to the target weights, costs are paid out of the portfolio before buying
+    traded = np.abs(value * weights - shares * prices).sum()
+    cost = transaction_cost * traded
+    return (value - cost) * weights / prices, traded, cost
+
+
+def backtest_portfolio(
+    price_data, target, rebalance='monthly', threshold=0.05, transaction_cost=0.001, initial_value=None
+):
+    """
+    Simulate holding a portfolio that is periodically traded back to its target weights.
+
+    Share counts stay fixed between rebalances, so each holding period is valued with one
+    matrix-vector product instead of a loop over days.
+
+    Parameters:
+        price_data (DataFrame): Historical price data for each stock in the portfolio.
+        target (dict or list): Target weights as ticker -> weight, or a list of dictionaries with
+            'ticker' and 'nShares' whose weights are their values on the first date.
+        rebalance (str): 'monthly', 'quarterly' or 'annually' (first trading day of each period),
+            'threshold' (whenever a weight drifts more than threshold from its target) or None (buy and hold).
+        threshold (float): Largest drift from a target weight before a threshold rebalance (default is 5 points).
+        transaction_cost (float): Cost as a fraction of the value traded, e.g. 0.001 for 10 bp (default).
+        initial_value (float): Value invested on the first date (default is the portfolio's value for
+            a list of holdings, or 10,000 for weights).
+
+    Returns:
+        dict: 'values' (Series of portfolio value over time), 'trades' (DataFrame of each rebalance's
+              date, traded value and cost), 'total_cost' (float) and 'shares' (Series of final holdings),
+              or None if a ticker has no price data.
+    """
+    if rebalance is not None and rebalance != 'threshold' and rebalance not in _REBALANCE_MONTHS:
+        print(f"Unknown rebalance schedule {rebalance!r}")
+        return None
+
+    price_data = as_price_frame(price_data)
+    weights = {}
+    if isinstance(target, dict):
+        weights = dict(target)
+    else:
+        for stock in target:
+            weights[stock['ticker']] = weights.get(stock['ticker'], 0) + stock['nShares']
+    tickers = list(weights)
+    missing = [ticker for ticker in tickers if ticker not in price_data.columns]
+    if missing:
+        print(f"No price data available for {', '.join(missing)}")
+        return None
+
+    # Start on the first date every holding has a price
+    prices = price_data[tickers].ffill().to_numpy(dtype=np.float64)
+    complete = np.flatnonzero(np.isfinite(prices).all(axis=1))
+    if len(complete) == 0:
+        print("No date with a price for every holding")
+        return None
+    prices = prices[complete[0] :]
+    index = price_data.index[complete[0] :]
+
+    weight_vector = np.array([weights[ticker] for ticker in tickers], dtype=np.float64)
+    if not isinstance(target, dict):
+        # Holdings are weighted by their value on the first date
+        weight_vector = weight_vector * prices[0]
+        if initial_value is None:
+            initial_value = weight_vector.sum()
+    if initial_value is None:
+        initial_value = 10_000.0
+    weight_vector = weight_vector / weight_vector.sum()
+
+    n_days = len(prices)
+    scheduled = _scheduled_rows(index, rebalance)
+    values = np.empty(n_days)
+    trades = []
+
+    shares, traded, cost = _rebalance(np.zeros(len(tickers)), prices[0], initial_value, weight_vector, transaction_cost)
+    trades.append((index[0], traded, cost))
+    row = 0
+    # The first row of a holding period needs no drift check only when it was just rebalanced
+    just_rebalanced = True
+    while row < n_days:
+        # Hold the shares until the next scheduled rebalance (or the next block of days to check for drift)
+        position = np.searchsorted(scheduled, row, side='right')
+        end = scheduled[position] if position < len(scheduled) else n_days
+        if rebalance == 'threshold':
+            end = min(end, row + _THRESHOLD_BLOCK)
+        held_values = prices[row:end] @ shares
+        rebalance_row = end if end < n_days and rebalance in _REBALANCE_MONTHS else None
+
+        if rebalance == 'threshold':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                drift = np.abs(prices[row:end] * shares / held_values[:, None] - weight_vector).max(axis=1)
+            skip = 1 if just_rebalanced else 0
+            drifted = np.flatnonzero(drift[skip:] > threshold)
+            if len(drifted):
+                rebalance_row = row + skip + drifted[0]
+                end = rebalance_row
+
+        values[row:end] = held_values[: end - row]
+        if rebalance_row is None:
+            row = end
+            just_rebalanced = False
+            continue
+        just_rebalanced = True
+        shares, traded, cost = _rebalance(
+            shares, prices[rebalance_row], prices[rebalance_row] @ shares, weight_vector, transaction_cost
+        )
+        trades.append((index[rebalance_row], traded, cost))
+        row = rebalance_row
+
+    trades = pd.DataFrame(trades, columns=['Date', 'traded', 'cost'])
+    return {
+        'values': pd.Series(values, index=index, name='Portfolio Value'),
+        'trades': trades,
+        'total_cost': float(trades['cost'].sum()),
+        'shares': pd.Series(shares, index=tickers, name='nShares'),
+    }
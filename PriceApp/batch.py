@@ -0,0 +1,239 @@
+from JSON_Validation.validator import load_schema, validate_portfolio
+from PriceApp.price import find_as_of_position, fetch_price_data, series_to_json
+from PriceApp.price_cache import period_start
+from PriceApp.price_matrix import as_price_frame
+from PriceApp.lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+def build_share_matrix(portfolios, tickers=None):
+    """
+    Turn N portfolios into one N x tickers matrix of share counts.
+
+    Parameters:
+        portfolios (list): A list of portfolios, each a list of dictionaries with 'ticker' and 'nShares'.
+        tickers (list): The column order (default is every ticker held, in order of appearance).
+
+    Returns:
+        tuple: (ndarray of shares with one row per portfolio, list of tickers for the columns)
+    """
+    if tickers is None:
+        tickers = list(dict.fromkeys(stock['ticker'] for portfolio in portfolios for stock in portfolio))
+    column = {ticker: i for i, ticker in enumerate(tickers)}
+
+    shares = np.zeros((len(portfolios), len(tickers)), dtype=np.float64)
+    for row, portfolio in enumerate(portfolios):
+        for stock in portfolio:
+            if stock['ticker'] in column:
+                shares[row, column[stock['ticker']]] += stock['nShares']
+    return shares, tickers
+
+
+def _value_and_sharpe(prices, index, shares, Date, period, daily_risk_free_rate):
+    """
+    Total value and Sharpe Ratio of portfolios sharing one calendar, like calculate_total_portfolio_value
+    and fetch_portfolio_sharpe_ratio on a frame holding only their own tickers.
+    """
+    n_portfolios = len(shares)
+    if period is not None:
+        start = period_start(period, today=index[-1])
+        if start is not None:
+            keep = index >= start
+            prices, index = prices[keep], index[keep]
+    held = (shares > 0).astype(np.float64)
+
+    # Total value on the last available date on or before Date, NaN if a holding has no price that day
+    row = len(index) - 1 if Date is None else find_as_of_position(index, Date)
+    if row < 0:
+        print(f"No available price data before {Date}.")
+        return np.full(n_portfolios, np.nan), np.full(n_portfolios, np.nan)
+    total_value = shares @ np.nan_to_num(prices[row])
+    total_value[(np.isnan(prices[row]).astype(np.float64) @ held.T) > 0] = np.nan
+
+    # Sharpe Ratio: weights use today's price, like fetch_portfolio_sharpe_ratio
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = np.nan_to_num(shares * prices[-1] / total_value[:, None])
+        filled = pd.DataFrame(prices).ffill().to_numpy()
+        daily_returns = filled[1:] / filled[:-1] - 1
+        # Each portfolio keeps the days where at least one of its own holdings has a return
+        valid_days = (~np.isnan(daily_returns)).astype(np.float64) @ held.T > 0
+        portfolio_returns = np.nan_to_num(daily_returns) @ weights.T
+        n_days = valid_days.sum(axis=0)
+        mean = (portfolio_returns * valid_days).sum(axis=0) / n_days
+        variance = (((portfolio_returns - mean) ** 2) * valid_days).sum(axis=0) / (n_days - 1)
+        sharpe_ratio = (mean - daily_risk_free_rate) / np.sqrt(variance)
+    return total_value, sharpe_ratio
+
+
+def _rolling_sharpe_ratios(prices, index, shares, lookback_window, daily_risk_free_rate):
+    """
+    Rolling Sharpe Ratio of portfolios sharing one calendar, like calculate_rolling_sharpe_ratio:
+    a portfolio's value is missing on days one of its holdings has no price, and those returns are dropped.
+    """
+    held = (shares > 0).astype(np.float64)
+    values = np.nan_to_num(prices) @ shares.T
+    values[(np.isnan(prices).astype(np.float64) @ held.T) > 0] = np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = values[1:] / values[:-1] - 1
+
+    # Portfolios whose returns are missing on the same days are rolled together
+    patterns = {}
+    for position in range(returns.shape[1]):
+        patterns.setdefault(np.isnan(returns[:, position]).tobytes(), []).append(position)
+    rolling = {}
+    for positions in patterns.values():
+        keep = ~np.isnan(returns[:, positions[0]])
+        frame = pd.DataFrame(returns[keep][:, positions], index=index[1:][keep], columns=positions)
+        ratios = (frame.rolling(lookback_window).mean() - daily_risk_free_rate) / frame.rolling(lookback_window).std()
+        rolling.update({position: ratios[position] for position in positions})
+    return [rolling[position] for position in range(returns.shape[1])]
+
+
+def evaluate_portfolios(
+    portfolios, price_data, Date=None, lookback_window=252, risk_free_rate=0.03, include_rolling=True, period=None
+):
+    """
+    Calculate total value, Sharpe Ratio and rolling Sharpe Ratio for many portfolios at once.
+
+    Gives the same numbers as calculate_total_portfolio_value, fetch_portfolio_sharpe_ratio and
+    calculate_rolling_sharpe_ratio for each portfolio on a frame of only its own tickers, so a
+    portfolio's results don't depend on the other portfolios in the batch. Each portfolio is
+    evaluated on its own calendar (the dates on which one of its holdings has a price), and the
+    portfolios sharing a calendar are evaluated together with a few matrix operations.
+
+    Parameters:
+        portfolios (list or dict): Portfolios, each a list of dictionaries with 'ticker' and 'nShares'.
+            With a dict the keys are used as portfolio labels.
+        price_data (DataFrame): Price data for all tickers held.
+        Date (str): Valuation date in 'YYYY-MM-DD' format (default is the last date of each portfolio).
+        lookback_window (int): The lookback window for the rolling Sharpe Ratio in trading days (default is 252).
+        risk_free_rate (float): The annual risk-free rate (default is 3%).
+        include_rolling (bool): Calculate the rolling Sharpe Ratio (default is True).
+        period (str): Window for the total value and Sharpe Ratio, e.g. '1y', measured back from each
+            portfolio's last date like slice_price_window (default is all of price_data). The rolling
+            Sharpe Ratio always uses all of price_data.
+
+    Returns:
+        dict: 'total_value' and 'sharpe_ratio' (Series, one entry per portfolio) and
+              'rolling_sharpe_ratio' (DataFrame, one column per portfolio, None without include_rolling).
+              Portfolios holding a ticker missing from price_data, or without any price, get NaN.
+    """
+    if isinstance(portfolios, dict):
+        labels = list(portfolios)
+        portfolios = list(portfolios.values())
+    else:
+        labels = list(range(len(portfolios)))
+
+    price_data = as_price_frame(price_data)
+    shares, tickers = build_share_matrix(portfolios)
+    missing = [ticker for ticker in tickers if ticker not in price_data.columns]
+    for ticker in missing:
+        print(f"No price data available for {ticker}")
+    known = np.array([ticker not in missing for ticker in tickers], dtype=bool)
+    invalid = (shares[:, ~known] > 0).any(axis=1)
+    shares = shares[:, known]
+    tickers = [ticker for ticker in tickers if ticker not in missing]
+
+    prices = price_data[tickers].to_numpy(dtype=np.float64)
+    daily_risk_free_rate = risk_free_rate / 252
+    total_value = np.full(len(portfolios), np.nan)
+    sharpe_ratio = np.full(len(portfolios), np.nan)
+    rolling = {}
+
+    # The calendar of each portfolio: the dates on which at least one of its holdings has a price
+    held = shares > 0
+    calendars = (~np.isnan(prices)).astype(np.float64) @ held.T.astype(np.float64) > 0
+    groups = {}
+    for position in np.flatnonzero(~invalid & calendars.any(axis=0)):
+        groups.setdefault(calendars[:, position].tobytes(), []).append(position)
+    if not groups:
+        print("No price data available for the portfolios.")
+
+    for members in groups.values():
+        rows = np.flatnonzero(calendars[:, members[0]])
+        columns = np.flatnonzero(held[members].any(axis=0))
+        group_prices = prices[np.ix_(rows, columns)]
+        group_shares = shares[np.ix_(members, columns)]
+        index = price_data.index[rows]
+        total_value[members], sharpe_ratio[members] = _value_and_sharpe(
+            group_prices, index, group_shares, Date, period, daily_risk_free_rate
+        )
+        if include_rolling:
+            rolling.update(
+                zip(
+                    members,
+                    _rolling_sharpe_ratios(group_prices, index, group_shares, lookback_window, daily_risk_free_rate),
+                )
+            )
+
+    rolling_sharpe_ratio = None
+    if include_rolling:
+        columns = {labels[position]: series for position, series in rolling.items()}
+        rolling_sharpe_ratio = (
+            pd.DataFrame(columns, columns=labels)
+            if columns
+            else pd.DataFrame(np.nan, index=price_data.index[1:], columns=labels)
+        )
+
+    return {
+        'total_value': pd.Series(total_value, index=labels, name='total_value'),
+        'sharpe_ratio': pd.Series(sharpe_ratio, index=labels, name='sharpe_ratio'),
+        'rolling_sharpe_ratio': rolling_sharpe_ratio,
+    }
+
+
+def calculate_bulk_metrics(portfolios, provider=None, lookback_window=252):
+    """
+    Validate many portfolios and calculate their metrics together, without rendering charts.
+
+    Prices for every ticker held are fetched once, then evaluate_portfolios scores all portfolios
+    with the same 1y window (total value, Sharpe Ratio) and 5y history (rolling Sharpe Ratio)
+    as calculate_portfolio_metrics uses for one portfolio.
+
+    Parameters:
+        portfolios (list or dict): Portfolios, each a list of dictionaries with 'ticker' and 'nShares'.
+            With a dict the keys are used as portfolio labels.
+        provider (PriceProvider): Where prices come from (default is get_default_provider()).
+        lookback_window (int): The lookback window for the rolling Sharpe Ratio in trading days (default is 252).
+
+    Returns:
+        list or dict: One JSON-ready result per portfolio, in the shape of the input. Each is a dict with
+                      'total_value', 'sharpe_ratio' and 'rolling_sharpe_ratio', or with 'error' if the
+                      portfolio failed validation or holds a ticker without price data.
+    """
+    labelled = dict(portfolios) if isinstance(portfolios, dict) else dict(enumerate(portfolios))
+    schema = load_schema('stock-schema.json')
+    results = {}
+    validated = {}
+    for label, portfolio in labelled.items():
+        if validate_portfolio(portfolio, schema) is None:
+            results[label] = {'error': 'Portfolio validation failed'}
+        elif not portfolio:
+            results[label] = {'error': 'Portfolio is empty'}
+        else:
+            validated[label] = portfolio
+
+    if validated:
+        tickers = sorted({stock['ticker'] for portfolio in validated.values() for stock in portfolio})
+        history = fetch_price_data(tickers, period='5y', provider=provider)
+        if history is None or history.empty:
+            print("No price data available for the portfolios.")
+            history = None
+        else:
+            # One pass: the 1y window for value and Sharpe Ratio, the 5y history for the rolling Sharpe Ratio
+            latest = evaluate_portfolios(validated, history, lookback_window=lookback_window, period='1y')
+        for label in validated:
+            if history is None or np.isnan(latest['total_value'][label]) or np.isnan(latest['sharpe_ratio'][label]):
+                results[label] = {'error': 'Missing price data'}
+                continue
+            results[label] = {
+                'total_value': float(latest['total_value'][label]),
+                'sharpe_ratio': float(latest['sharpe_ratio'][label]),
+                'rolling_sharpe_ratio': series_to_json(latest['rolling_sharpe_ratio'][label]),
+            }
+
+    if isinstance(portfolios, dict):
+        return {label: results[label] for label in labelled}
+    return [results[label] for label in labelled]
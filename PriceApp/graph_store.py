@@ -0,0 +1,152 @@
+import os
+import re
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Keys become file names, keep them to plain characters
+_SAFE_KEY = re.compile(r'[^A-Za-z0-9_-]')
+
+
+class GraphStore:
+    """
+    Rendered PNG charts kept in memory by job, spilling to a size-capped directory on disk.
+
+    Charts are served from memory. When the in-memory charts take more than max_memory_bytes,
+    the least recently used ones are written to directory; when that holds more than
+    max_disk_bytes, its least recently used files are deleted. Each chart gets an ETag from
+    its content so clients can revalidate instead of downloading it again.
+    """
+
+    def __init__(self, max_memory_bytes=None, directory=None, max_disk_bytes=None):
+        """
+        Parameters:
+            max_memory_bytes (int): Memory for charts (default is QUEBEC_GRAPH_MEMORY_BYTES or 32 MB).
+            directory (str): Where evicted charts go (default is QUEBEC_GRAPH_DIR or <project>/graph_store).
+            max_disk_bytes (int): Disk for charts (default is QUEBEC_GRAPH_DISK_BYTES or 256 MB,
+                0 disables the disk tier).
+        """
+        self.max_memory_bytes = max_memory_bytes or int(os.environ.get('QUEBEC_GRAPH_MEMORY_BYTES', 32 * 1024 * 1024))
+        self.directory = directory or os.environ.get(
+            'QUEBEC_GRAPH_DIR', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'graph_store'))
+        )
+        self.max_disk_bytes = (
+            max_disk_bytes
+            if max_disk_bytes is not None
+            else int(os.environ.get('QUEBEC_GRAPH_DISK_BYTES', 256 * 1024 * 1024))
+        )
+        self._memory = OrderedDict()
+        self._spilling = {}
+        self._disk = None
+        self._lock = threading.Lock()
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.latest = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.png')
+
+    def _load_disk_index(self):
+        # Files left by an earlier run count towards the cap, oldest access first
+        self._disk = OrderedDict()
+        if os.path.isdir(self.directory):
+            files = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.png')]
+            for entry in sorted(files, key=lambda entry: entry.stat().st_mtime):
+                self._disk[entry.name[:-4]] = entry.stat().st_size
+                self.disk_bytes += entry.stat().st_size
+
+    def put(self, key, png):
+        """
+        Store a chart under key (e.g. a job ID) and return its ETag.
+        """
+        key = _SAFE_KEY.sub('_', str(key))
+        etag = hashlib.sha256(png).hexdigest()[:32]
+        with self._lock:
+            if key in self._memory:
+                self.memory_bytes -= len(self._memory.pop(key)[0])
+            self._memory[key] = (png, etag)
+            self.memory_bytes += len(png)
+            self.latest = key
+            spilled = []
+            while len(self._memory) > 1 and self.memory_bytes > self.max_memory_bytes:
+                old_key, old_entry = self._memory.popitem(last=False)
+                self.memory_bytes -= len(old_entry[0])
+                # Still served from memory until the file is written
+                self._spilling[old_key] = old_entry
+                spilled.append((old_key, old_entry[0]))
+        # Write outside the lock so gets aren't blocked on disk I/O
+        for old_key, old_png in spilled:
+            self._write(old_key, old_png)
+        return etag
+
+    def get(self, key):
+        """
+        Return (png, etag) for key, or None if the chart was never stored or has been evicted.
+        """
+        key = _SAFE_KEY.sub('_', str(key))
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+            entry = self._spilling.get(key)
+            if entry is not None:
+                return entry
+            if self._disk is None:
+                self._load_disk_index()
+            if key not in self._disk:
+                return None
+            self._disk.move_to_end(key)
+        try:
+            with open(self._path(key), 'rb') as graph_file:
+                png = graph_file.read()
+            os.utime(self._path(key))
+        except OSError:
+            with self._lock:
+                if key in self._disk:
+                    self.disk_bytes -= self._disk.pop(key)
+            return None
+        return png, hashlib.sha256(png).hexdigest()[:32]
+
+    def _write(self, key, png):
+        # Called without the lock held, only the disk index is updated under it
+        removed = []
+        if self.max_disk_bytes > 0:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+                with os.fdopen(handle, 'wb') as graph_file:
+                    graph_file.write(png)
+                os.replace(temp_path, self._path(key))
+            except OSError as e:
+                print(f"Error writing graph {key} to {self.directory}: {e}")
+                png = None
+        else:
+            png = None
+        with self._lock:
+            self._spilling.pop(key, None)
+            if png is None:
+                return
+            if self._disk is None:
+                self._load_disk_index()
+            if key in self._disk:
+                self.disk_bytes -= self._disk.pop(key)
+            self._disk[key] = len(png)
+            self.disk_bytes += len(png)
+            while self._disk and self.disk_bytes > self.max_disk_bytes:
+                old_key, size = self._disk.popitem(last=False)
+                self.disk_bytes -= size
+                removed.append(old_key)
+        for old_key in removed:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._memory)
+
+
+# Shared by every job in the process
+default_graph_store = GraphStore()
@@ -0,0 +1,117 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a job is submitted while the queue already holds max_pending jobs.
+    """
+
+
+class JobQueue:
+    """
+    Bounded worker pool that runs portfolio calculations outside the request that submitted them.
+
+    submit() returns a job ID right away. Clients poll status() for the state and result.
+    At most max_pending jobs are queued or running; beyond that submit() raises QueueFullError
+    so the caller can push back instead of piling up work.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, max_finished=256):
+        """
+        Parameters:
+            max_workers (int): Number of worker threads (default is QUEBEC_WORKERS or 2).
+            max_pending (int): Maximum queued + running jobs (default is QUEBEC_MAX_PENDING or 8 per worker).
+            max_finished (int): Number of finished jobs kept for polling before the oldest are dropped.
+        """
+        self.max_workers = max_workers or int(os.environ.get('QUEBEC_WORKERS', 2))
+        self.max_pending = max_pending or int(os.environ.get('QUEBEC_MAX_PENDING', 8 * self.max_workers))
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='quebec-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._rejected = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) to run on the worker pool.
+
+        Returns:
+            str: The job ID.
+
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running.
+        """
+        with self._lock:
+            if self._queued + self._running >= self.max_pending:
+                self._rejected += 1
+                raise QueueFullError(f"{self._queued + self._running} jobs pending, try again later")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'submitted': time.time(),
+                'started': None,
+                'finished': None,
+                'result': None,
+                'error': None,
+            }
+            self._queued += 1
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        with self._lock:
+            job = self._jobs[job_id]
+            job['status'] = 'running'
+            job['started'] = time.time()
+            self._queued -= 1
+            self._running += 1
+        try:
+            result = fn(*args, **kwargs)
+            status, error = 'done', None
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            result, status, error = None, 'failed', str(e)
+        with self._lock:
+            job.update(status=status, result=result, error=error, finished=time.time())
+            self._running -= 1
+            self._forget_finished()
+
+    def _forget_finished(self):
+        # Drop the oldest finished jobs once more than max_finished are kept
+        finished = [job_id for job_id, job in self._jobs.items() if job['finished'] is not None]
+        for job_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def status(self, job_id):
+        """
+        Return a copy of the job's state ('queued', 'running', 'done' or 'failed'), result and timings,
+        or None for an unknown job ID.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def stats(self):
+        """
+        Return the queue depth and capacity, used for backpressure and monitoring.
+        """
+        with self._lock:
+            return {
+                'queued': self._queued,
+                'running': self._running,
+                'workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'rejected': self._rejected,
+                'accepting': self._queued + self._running < self.max_pending,
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,42 @@
+import sys
+import types
+import importlib
+import threading
+
+# Serializes the first real import of every lazy module
+_import_lock = threading.RLock()
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that imports it on first attribute access.
+
+    importlib.util.LazyLoader is not thread-safe before Python 3.12, and the first use of pandas
+    or numpy often happens on a JobQueue or Flask worker thread, so the real import is done here
+    under a lock and sys.modules only ever holds the real module.
+    """
+
+    def __getattr__(self, attribute):
+        # Only called for attributes not copied over yet, i.e. before the first import finishes
+        with _import_lock:
+            module = importlib.import_module(self.__name__)
+            self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+
+def lazy_import(name):
+    """
+    Import a module on first attribute access instead of right away.
+
+    Heavy libraries like pandas take hundreds of milliseconds to import; modules that only
+    need them inside functions use this so importing them stays cheap.
+
+    Parameters:
+        name (str): The module name, e.g. 'pandas'.
+
+    Returns:
+        module: The module, loaded the first time one of its attributes is used.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    return _LazyModule(name)
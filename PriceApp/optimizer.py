@@ -0,0 +1,139 @@
+from PriceApp.parallel import run_chunks
+from PriceApp.price_matrix import as_price_frame
+from PriceApp.risk import default_risk_engine
+from PriceApp.lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+def _sample_chunk(shared, size, rng):
+    """
+    Score size random weight vectors and keep the best of them.
+
+    Returns the max-Sharpe and min-variance samples and, for each band of expected return,
+    the sample with the lowest variance (NaN where no sample fell in the band).
+    """
+    mean, covariance, daily_risk_free_rate, bands = shared
+    n_tickers = len(mean)
+
+    # Long-only weights spread uniformly over the simplex, summing to 1
+    weights = rng.dirichlet(np.ones(n_tickers), size)
+    returns = weights @ mean
+    variances = ((weights @ covariance) * weights).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe_ratios = (returns - daily_risk_free_rate) / np.sqrt(variances)
+
+    best = int(np.nanargmax(sharpe_ratios)) if not np.isnan(sharpe_ratios).all() else 0
+    lowest = int(np.argmin(variances))
+
+    n_bands = len(bands) - 1
+    band = np.clip(np.searchsorted(bands, returns, side='right') - 1, 0, n_bands - 1)
+    frontier_variance = np.full(n_bands, np.inf)
+    np.minimum.at(frontier_variance, band, variances)
+    frontier_weights = np.full((n_bands, n_tickers), np.nan)
+    for index in np.flatnonzero(np.isfinite(frontier_variance)):
+        in_band = np.flatnonzero(band == index)
+        frontier_weights[index] = weights[in_band[np.argmin(variances[in_band])]]
+
+    return {
+        'max_sharpe': weights[best],
+        'min_variance': weights[lowest],
+        'frontier_variance': frontier_variance,
+        'frontier_weights': frontier_weights,
+    }
+
+
+def _describe(weights, tickers, mean, covariance, daily_risk_free_rate):
+    mean_return = float(weights @ mean)
+    volatility = float(np.sqrt(weights @ covariance @ weights))
+    return {
+        'weights': pd.Series(weights, index=tickers, name='weight'),
+        'mean_return': mean_return,
+        'volatility': volatility,
+        'sharpe_ratio': (mean_return - daily_risk_free_rate) / volatility if volatility else np.nan,
+    }
+
+
+def optimize_portfolio(
+    price_data,
+    tickers=None,
+    n_samples=100_000,
+    seed=0,
+    n_workers=None,
+    chunk_size=20_000,
+    n_frontier=50,
+    window=None,
+    risk_free_rate=0.03,
+    engine=default_risk_engine,
+):
+    """
+    Search random long-only weightings of a set of tickers for the best risk/return trade-off.
+
+    Weights are sampled in vectorized chunks spread across a process pool. Every sample is scored
+    with the same daily Sharpe Ratio as fetch_portfolio_sharpe_ratio, using the mean vector and
+    covariance matrix of the daily returns from the risk engine.
+
+    Parameters:
+        price_data (DataFrame): Price data for the tickers to weight.
+        tickers (list): Tickers to include (default is every column of price_data).
+        n_samples (int): Number of random weight vectors (default is 100,000).
+        seed (int): Seed for the random weights; the same seed gives the same result for any n_workers.
+        n_workers (int): Number of processes (default is QUEBEC_CPU_WORKERS or the CPU count, 1 runs inline).
+        chunk_size (int): Weight vectors scored per chunk (default is 20,000).
+        n_frontier (int): Number of expected-return bands the efficient frontier is traced over (default is 50).
+        window (int): Number of most recent daily returns to use (default is the whole history).
+        risk_free_rate (float): The annual risk-free rate (default is 3%).
+        engine (RiskEngine): Where the return moments are cached.
+
+    Returns:
+        dict: 'max_sharpe' and 'min_variance' (each with 'weights' Series, 'mean_return', 'volatility'
+              and 'sharpe_ratio', all daily), 'frontier' (DataFrame of mean_return, volatility and
+              sharpe_ratio ordered by return) and 'frontier_weights' (DataFrame, one row per frontier point).
+    """
+    price_data = as_price_frame(price_data)
+    if tickers is not None:
+        price_data = price_data[list(tickers)]
+    moments = engine.moments(price_data, window)
+    tickers = moments['tickers']
+    mean, covariance = moments['mean'], moments['covariance']
+    daily_risk_free_rate = risk_free_rate / 252
+
+    # Long-only portfolio returns lie between the lowest and highest ticker return
+    bands = np.linspace(mean.min(), mean.max(), n_frontier + 1)
+    chunks = run_chunks(
+        _sample_chunk,
+        n_samples,
+        chunk_size=chunk_size,
+        seed=seed,
+        n_workers=n_workers,
+        shared=(mean, covariance, daily_risk_free_rate, bands),
+    )
+
+    def score(weights):
+        return _describe(weights, tickers, mean, covariance, daily_risk_free_rate)
+
+    max_sharpe = max(
+        (score(chunk['max_sharpe']) for chunk in chunks),
+        key=lambda result: -np.inf if np.isnan(result['sharpe_ratio']) else result['sharpe_ratio'],
+    )
+    min_variance = min((score(chunk['min_variance']) for chunk in chunks), key=lambda result: result['volatility'])
+
+    # Merge the lowest-variance sample of every band across chunks
+    variances = np.array([chunk['frontier_variance'] for chunk in chunks])
+    winners = variances.argmin(axis=0)
+    points = []
+    for band in np.flatnonzero(np.isfinite(variances.min(axis=0))):
+        points.append(score(chunks[winners[band]]['frontier_weights'][band]))
+
+    frontier = pd.DataFrame(
+        [{key: point[key] for key in ('mean_return', 'volatility', 'sharpe_ratio')} for point in points],
+        columns=['mean_return', 'volatility', 'sharpe_ratio'],
+    )
+    frontier_weights = pd.DataFrame([point['weights'] for point in points], columns=tickers).reset_index(drop=True)
+    return {
+        'max_sharpe': max_sharpe,
+        'min_variance': min_variance,
+        'frontier': frontier,
+        'frontier_weights': frontier_weights,
+    }
@@ -0,0 +1,83 @@
+import os
+import atexit
+import threading
+from PriceApp.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Worker processes are started once and reused by every run_chunks call
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _run_chunk(function, shared, size, seed):
+    return function(shared, size, np.random.default_rng(seed))
+
+
+def _get_pool(n_workers):
+    """
+    Return the shared process pool, starting it on first use or when a different size is asked for.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != n_workers:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: forking a threaded web server can copy locks held by other threads
+            _pool = ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = n_workers
+        return _pool
+
+
+def _shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+atexit.register(_shutdown_pool)
+
+
+def run_chunks(function, n_samples, chunk_size=20_000, seed=None, n_workers=None, shared=None):
+    """
+    Split n_samples random draws into chunks and run them across a process pool.
+
+    Each chunk gets its own generator spawned from one SeedSequence, so the results only depend
+    on seed, n_samples and chunk_size, not on the number of workers or the order chunks finish in.
+    The worker processes are spawned on the first call and kept for later calls, since a spawned
+    worker has to import numpy again before it can run anything.
+
+    Parameters:
+        function (callable): Module-level function(shared, size, rng) run for each chunk.
+        n_samples (int): Total number of draws.
+        chunk_size (int): Draws per chunk (default is 20,000).
+        seed (int): Seed for the random draws (default is fresh entropy, i.e. not reproducible).
+        n_workers (int): Number of processes (default is QUEBEC_CPU_WORKERS or the CPU count).
+            With 1 the chunks run in the calling process.
+        shared: Read-only data passed to every chunk, sent along with each chunk.
+
+    Returns:
+        list: The chunk results in chunk order.
+    """
+    n_chunks = max(1, -(-n_samples // chunk_size))
+    sizes = [chunk_size] * (n_chunks - 1) + [n_samples - chunk_size * (n_chunks - 1)]
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+
+    if n_workers is None:
+        n_workers = int(os.environ.get('QUEBEC_CPU_WORKERS', os.cpu_count() or 1))
+    if min(n_workers, n_chunks) > 1:
+        from concurrent.futures.process import BrokenProcessPool
+
+        try:
+            return list(_get_pool(n_workers).map(_run_chunk, [function] * n_chunks, [shared] * n_chunks, sizes, seeds))
+        except BrokenProcessPool as e:
+            # The chunk seeds don't depend on where a chunk runs, so running them here gives the same results
+            print(f"Process pool failed, running chunks in process: {e}")
+            _shutdown_pool()
+    return [_run_chunk(function, shared, size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
@@ -1,96 +1,155 @@
-import matplotlib.pyplot as plt
-from JSON_Validation.validator import validate_portfolio, load_schema, load_portfolio
-import yfinance as yf
+from JSON_Validation.validator import validate_portfolio, load_schema, stream_validated_portfolio
+from PriceApp.price_cache import cache_namespace, fetch_cached_price_data, period_start
+from PriceApp.providers import get_default_provider
+from PriceApp.price_matrix import as_price_frame
+from PriceApp.result_cache import default_result_cache, portfolio_cache_key
+from PriceApp.metrics import stage, observe_price_frame
+from PriceApp.rendering import build_chart_payload, render_chart
 from datetime import datetime
-import pandas as pd
+import threading
+from PriceApp.lazy import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+
+# Serializes pyplot use between worker threads
+_pyplot_lock = threading.Lock()
+
+
+def _pyplot():
+    """
+    Import pyplot on first use, with the non-interactive Agg backend unless price.py is run directly.
+    """
+    import matplotlib
+
+    if __name__ != "__main__":
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    return plt
 
 
 def fetch_portfolio_sharpe_ratio(portfolio, price_data, total_investment, risk_free_rate=0.03):
     '''
-        Fetches the Sharpe Ratio for the entire portfolio based on historical prices.
-     Parameters:
-         portfolio: A list of stock dictionaries with 'ticker' and 'nShares'.
-         price_data (DataFrame): Price data for a list of tickers.
-             Example:
-             Ticker                           AAPL        AMZN       GOOGL        MSFT        NVDA        TSLA
-             Date
-             2023-11-06 00:00:00+00:00  179.229996  139.740005  130.250000  356.529999   45.750999  219.270004
-             2023-11-07 00:00:00+00:00  181.820007  142.710007  130.970001  360.529999   45.955002  222.179993
-             2023-11-08 00:00:00+00:00  182.889999  142.080002  131.839996  363.200012   46.574001  222.110001
-             2023-11-09 00:00:00+00:00  182.410004  140.600006  130.240005  360.690002   46.950001  209.979996
-             2023-11-10 00:00:00+00:00  186.399994  143.559998  132.589996  369.670013   48.334999  214.649994
-             ...                               ...         ...         ...         ...         ...         ...
-             2024-10-29 00:00:00+00:00  233.669998  190.830002  169.679993  431.950012  141.250000  259.519989
-             2024-10-30 00:00:00+00:00  230.100006  192.729996  174.460007  432.529999  139.339996  257.549988
-             2024-10-31 00:00:00+00:00  225.910004  186.399994  171.110001  406.350006  132.759995  249.850006
-             2024-11-01 00:00:00+00:00  222.910004  197.929993  171.289993  410.369995  135.399994  248.979996
-             2024-11-04 00:00:00+00:00  220.820007  194.955002  168.449997  406.850006  137.583298  244.539993
-             * get price for 'AAPL' on '2024-10-30' : price_data['AAPL].loc['2024-10-30']
-         risk_free_rate (float): The risk-free rate for calculating the Sharpe Ratio (default is 3% annually).
-     Returns:
-         float: The Sharpe Ratio for the entire portfolio.
+       Fetches the Sharpe Ratio for the entire portfolio based on historical prices.
+    Parameters:
+        portfolio: A list of stock dictionaries with 'ticker' and 'nShares'.
+        price_data (DataFrame): Price data for a list of tickers.
+            Example:
+            Ticker                           AAPL        AMZN       GOOGL        MSFT        NVDA        TSLA
+            Date
+            2023-11-06 00:00:00+00:00  179.229996  139.740005  130.250000  356.529999   45.750999  219.270004
+            2023-11-07 00:00:00+00:00  181.820007  142.710007  130.970001  360.529999   45.955002  222.179993
+            2023-11-08 00:00:00+00:00  182.889999  142.080002  131.839996  363.200012   46.574001  222.110001
+            2023-11-09 00:00:00+00:00  182.410004  140.600006  130.240005  360.690002   46.950001  209.979996
+            2023-11-10 00:00:00+00:00  186.399994  143.559998  132.589996  369.670013   48.334999  214.649994
+            ...                               ...         ...         ...         ...         ...         ...
+            2024-10-29 00:00:00+00:00  233.669998  190.830002  169.679993  431.950012  141.250000  259.519989
+            2024-10-30 00:00:00+00:00  230.100006  192.729996  174.460007  432.529999  139.339996  257.549988
+            2024-10-31 00:00:00+00:00  225.910004  186.399994  171.110001  406.350006  132.759995  249.850006
+            2024-11-01 00:00:00+00:00  222.910004  197.929993  171.289993  410.369995  135.399994  248.979996
+            2024-11-04 00:00:00+00:00  220.820007  194.955002  168.449997  406.850006  137.583298  244.539993
+            * get price for 'AAPL' on '2024-10-30' : price_data['AAPL].loc['2024-10-30']
+        risk_free_rate (float): The risk-free rate for calculating the Sharpe Ratio (default is 3% annually).
+    Returns:
+        float: The Sharpe Ratio for the entire portfolio.
     '''
 
     try:
-        # Create an empty DataFrame to hold daily portfolio returns
-        portfolio_daily_returns = pd.DataFrame()
-
-        # Loop through each stock in the portfolio
-        for stock in portfolio:
-            ticker = stock['ticker']
-            nShares = stock['nShares']
-
-            # Calculate weight using today's price
-            try:
-                current_price = price_data[ticker].iloc[-1]
-                # Weight of the stock in the portfolio
-                weight = (current_price * nShares) / total_investment
-            except Exception as e:
-                print(f"Error fetching current price for {ticker}: {e}")
-                continue
-
-            # Check if data is available
-            if not price_data[ticker].empty:
-                # Get the closing prices and calculate daily returns
-                closing_prices = price_data[ticker]
-                daily_returns = closing_prices.pct_change().dropna()
-
-                # Add the weighted daily returns of the stock to the portfolio's daily returns
-                portfolio_daily_returns[ticker] = daily_returns * weight
-            else:
-                print(f"No historical data available for {ticker}")
-                continue
-
-        # Sum the weighted returns to get the total portfolio daily returns
-        portfolio_daily_returns['Portfolio'] = portfolio_daily_returns.sum(
-            axis=1)
+        # Build the weighted daily portfolio returns in one matrix product
+        portfolio_daily_returns = calculate_portfolio_daily_returns(portfolio, price_data, total_investment)
 
         # Calculate the average daily return and standard deviation of portfolio returns
-        average_daily_return = portfolio_daily_returns['Portfolio'].mean()
-        stddev_daily_return = portfolio_daily_returns['Portfolio'].std()
+        average_daily_return = portfolio_daily_returns.mean()
+        stddev_daily_return = portfolio_daily_returns.std()
 
         # Assuming a risk-free rate of 3% per year (converted to daily rate)
         daily_risk_free_rate = risk_free_rate / 252  # 252 trading days in a year
 
         # Calculate the Sharpe Ratio for the portfolio
-        sharpe_ratio = (average_daily_return -
-                        daily_risk_free_rate) / stddev_daily_return
+        sharpe_ratio = (average_daily_return - daily_risk_free_rate) / stddev_daily_return
 
-        return sharpe_ratio
+        return float(sharpe_ratio)
 
     except Exception as e:
         print(f"Error fetching historical prices for portfolio: {e}")
         return None
 
 
+def calculate_portfolio_daily_returns(portfolio, price_data, total_investment):
+    """
+    Calculate the portfolio's daily returns, weighting each stock by its value at today's price.
+
+    The returns of all holdings are computed as one aligned NumPy matrix and combined with a
+    single weights matrix-vector product. Missing returns count as zero for that day.
+
+    Parameters:
+        portfolio (list): A list of dictionaries with 'ticker' and 'nShares'.
+        price_data (DataFrame): Price data for a list of tickers.
+        total_investment (float): The total value of the portfolio.
+
+    Returns:
+        Series: Daily portfolio returns.
+    """
+    price_data = as_price_frame(price_data)
+    # Today's price of every ticker, looked up once instead of per holding
+    current_prices = price_data.iloc[-1] if not price_data.empty else pd.Series(dtype=np.float64)
+    # Whether each ticker has any price, checked for all columns at once
+    has_data = price_data.notna().any()
+
+    # Weight of each stock in the portfolio, holdings of the same ticker are added up
+    weights = {}
+    for stock in portfolio:
+        ticker = stock['ticker']
+        nShares = stock['nShares']
+
+        # Check if data is available
+        # Tickers without a column fall through to the current price lookup, which reports them
+        if not has_data.get(ticker, True):
+            print(f"No historical data available for {ticker}")
+            continue
+
+        # Calculate weight using today's price
+        try:
+            current_price = current_prices[ticker]
+            weight = (current_price * nShares) / total_investment
+        except Exception as e:
+            print(f"Error fetching current price for {ticker}: {e}")
+            continue
+        weights[ticker] = weights.get(ticker, 0) + weight
+
+    if not weights:
+        return pd.Series(dtype=np.float64, name='Portfolio')
+
+    tickers = list(weights)
+    weight_vector = np.nan_to_num(np.array([weights[ticker] for ticker in tickers], dtype=np.float64))
+
+    # Daily returns of every holding as one (days x tickers) matrix
+    closing_prices = price_data[tickers].ffill().to_numpy(dtype=np.float64)
+    daily_returns = closing_prices[1:] / closing_prices[:-1] - 1
+
+    # Keep the days where at least one holding has a return
+    valid_days = ~np.isnan(daily_returns).all(axis=1)
+    daily_returns = np.nan_to_num(daily_returns[valid_days])
+
+    return pd.Series(daily_returns @ weight_vector, index=price_data.index[1:][valid_days], name='Portfolio')
+
+
 def load_and_validate_portfolio(portfolio):
     """
     Loads stock.json and validates schema
+    portfolio is a file path or stream (JSON array or JSON Lines, parsed one holding at a time)
+    or an already loaded list of holdings
     Returns validated portfolio
     """
-    schema = load_schema('stock-schema.json')
-    portfolio = load_portfolio(portfolio)
-    validated_portfolio = validate_portfolio(portfolio, schema)
+    with stage('schema_load'):
+        schema = load_schema('stock-schema.json')
+    with stage('validate'):
+        if isinstance(portfolio, list):
+            validated_portfolio = validate_portfolio(portfolio, schema)
+        else:
+            validated_portfolio = stream_validated_portfolio(portfolio, schema)
     if validated_portfolio:
         print("Validation passed, ready to proceed.")
         return validated_portfolio
@@ -99,37 +158,62 @@ def load_and_validate_portfolio(portfolio):
         return None
 
 
-def calculate_total_portfolio_value(portfolio, price_data, Date=datetime.today().strftime('%Y-%m-%d')):
+def find_as_of_position(index, Date):
+    """
+    Find the position of the last date on or before Date with a binary search.
+
+    Parameters:
+        index (DatetimeIndex): A sorted date index, e.g. price_data.index.
+        Date (str or Timestamp): A date in 'YYYY-MM-DD' format.
+
+    Returns:
+        int: The row position, or -1 when every date in the index is after Date.
+    """
+    Date = pd.Timestamp(Date)
+    if index.tz is not None and Date.tz is None:
+        Date = Date.tz_localize(index.tz)
+    if not index.is_monotonic_increasing:
+        # Unsorted data has no binary search, fall back to a scan
+        earlier = np.flatnonzero(index <= Date)
+        return int(earlier[np.argmax(index[earlier])]) if len(earlier) else -1
+    return int(index.searchsorted(Date, side='right')) - 1
+
+
+def calculate_total_portfolio_value(portfolio, price_data, Date=None):
     """
     Calculates the total current value of all stocks in the portfolio on the specific day.
 
+    If the Date is not a trading day, the prices of the last available date before it are used.
+
     Parameters:
         portfolio (dict): A dictionary containing the portfolio data.
         price_data (DataFrame): Price data for a list of tickers.
-        Date (str): A date in 'YYYY-MM-DD' format.
+        Date (str): A date in 'YYYY-MM-DD' format (default is today).
 
     Returns:
         float: The total value of the portfolio.
     """
+    price_data = as_price_frame(price_data)
+    if Date is None:
+        Date = datetime.today().strftime('%Y-%m-%d')
 
     total_value = 0
+    if not portfolio:
+        return total_value
+
+    # Get the last available close date with one binary search for all holdings
+    row = find_as_of_position(price_data.index, Date)
+    if row < 0:
+        print(f"No available price data for {portfolio[0]['ticker']} before {Date}.")
+        return None
+    prices = price_data.iloc[row]
+
     for stock in portfolio:
         ticker = stock['ticker']
         nShares = stock['nShares']
         try:
-            # Check if the Date exists in the price data
-            if Date not in price_data.index:
-                # If not, get the last available close date
-                last_valid_date = price_data.index[price_data.index <= Date].max(
-                )
-                if pd.isnull(last_valid_date):
-                    print(
-                        f"No available price data for {ticker} before {Date}.")
-                    return None
-                Date = last_valid_date
-
             # Get stock price from the last valid date
-            stock_price = price_data[ticker].loc[Date]
+            stock_price = prices[ticker]
             total_value += nShares * stock_price
 
         except KeyError as e:
@@ -139,21 +223,100 @@ def calculate_total_portfolio_value(portfolio, price_data, Date=datetime.today()
     return total_value
 
 
-def fetch_price_data(tickers, period="5y"):
+def calculate_portfolio_value_at_dates(portfolio, price_data, dates):
+    """
+    Calculates the total value of the portfolio on each of a list of dates in one vectorized pass.
+
+    Each date uses the prices of the last available date on or before it, like calculate_total_portfolio_value.
+
+    Parameters:
+        portfolio (list): A list of dictionaries with 'ticker' and 'nShares'.
+        price_data (DataFrame): Price data for a list of tickers.
+        dates (list): Dates in 'YYYY-MM-DD' format or a DatetimeIndex,
+            e.g. pd.date_range('2005-01-01', '2024-12-31', freq='ME') for month-end reports.
+
+    Returns:
+        Series: The total value of the portfolio on each date (NaN before the first available date).
+    """
+    price_data = as_price_frame(price_data)
+    shares = {}
+    for stock in portfolio:
+        if stock['ticker'] not in price_data.columns:
+            print(f"Error fetching price for {stock['ticker']}: not in price data")
+            return None
+        shares[stock['ticker']] = shares.get(stock['ticker'], 0) + stock['nShares']
+
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    index = price_data.index
+    if not index.is_monotonic_increasing:
+        price_data = price_data.sort_index()
+        index = price_data.index
+    lookup = dates
+    if index.tz is not None and dates.tz is None:
+        lookup = dates.tz_localize(index.tz)
+
+    # One binary search for all dates, then one matrix-vector product for all values
+    rows = index.searchsorted(lookup, side='right') - 1
+    prices = price_data[list(shares)].to_numpy(dtype=np.float64)
+    values = prices[np.clip(rows, 0, None)] @ np.array(list(shares.values()), dtype=np.float64)
+    values[rows < 0] = np.nan
+    return pd.Series(values, index=dates, name='Portfolio Value')
+
+
+def fetch_price_data(tickers, period="5y", interval="1d", use_cache=True, provider=None):
     """
     Fetch historical price data for a list of tickers over a specified period.
 
+    Prices are served from the on-disk price cache when possible, only new bars are downloaded.
+    Each provider has its own part of the cache, keyed by its cache_identity().
+
     Parameters:
         tickers (list): A list of stock ticker symbols.
         period (str): The time period for fetching data (default at 5y).
+        interval (str): The bar interval (default at 1d).
+        use_cache (bool): Read and update the on-disk price cache (default is True).
+        provider (PriceProvider): Where prices come from (default is get_default_provider()).
 
     Returns:
         DataFrame: Adjusted close prices for each ticker.
     """
-    data = yf.download(tickers, period=period, interval="1d")['Close']
+    if provider is None:
+        provider = get_default_provider()
+    if use_cache and provider.cacheable:
+        return fetch_cached_price_data(
+            tickers,
+            provider.fetch_close,
+            period=period,
+            interval=interval,
+            namespace=cache_namespace(provider.cache_identity()),
+        )
+    data = provider.fetch_close(tickers, period=period, interval=interval)
     return data
 
 
+def slice_price_window(price_data, period="1y"):
+    """
+    Slice a shorter window out of already fetched price data.
+
+    The window is measured back from the last date in price_data, so every window
+    taken from one fetch shares the same price snapshot.
+
+    Parameters:
+        price_data (DataFrame): Price data for a list of tickers.
+        period (str): The window to keep, e.g. '1y' or '6mo' (default at 1y).
+
+    Returns:
+        DataFrame: The rows of price_data that fall within the window.
+    """
+    price_data = as_price_frame(price_data)
+    if price_data.empty:
+        return price_data
+    start = period_start(period, today=price_data.index[-1])
+    if start is None:
+        return price_data
+    return price_data[price_data.index >= start]
+
+
 def calculate_portfolio_value_over_time(price_data, portfolio):
     """
     Calculate the portfolio's value over time based on the historical price data.
@@ -165,6 +328,7 @@ def calculate_portfolio_value_over_time(price_data, portfolio):
     Returns:
         Series: Portfolio value over time.
     """
+    price_data = as_price_frame(price_data)
     portfolio_values = pd.Series(0, index=price_data.index)
     for stock in portfolio:
         ticker = stock['ticker']
@@ -189,8 +353,7 @@ def calculate_rolling_sharpe_ratio(price_data, portfolio, lookback_window=252, r
     """
     try:
         # Calculate portfolio values over time
-        portfolio_values = calculate_portfolio_value_over_time(
-            price_data, portfolio)
+        portfolio_values = calculate_portfolio_value_over_time(price_data, portfolio)
 
         # calculate daily returns of the portfolio
         daily_returns = portfolio_values.pct_change().dropna()
@@ -199,14 +362,11 @@ def calculate_rolling_sharpe_ratio(price_data, portfolio, lookback_window=252, r
         daily_risk_free_rate = risk_free_rate / 252
 
         # Calculate rolling average daily returns and rolling standard deviation
-        rolling_avg_daily_return = daily_returns.rolling(
-            lookback_window).mean()
-        rolling_stddev_daily_return = daily_returns.rolling(
-            lookback_window).std()
+        rolling_avg_daily_return = daily_returns.rolling(lookback_window).mean()
+        rolling_stddev_daily_return = daily_returns.rolling(lookback_window).std()
 
         # calculate the rolling Sharpe Ratio
-        rolling_sharpe_ratio = (
-            rolling_avg_daily_return - daily_risk_free_rate) / rolling_stddev_daily_return
+        rolling_sharpe_ratio = (rolling_avg_daily_return - daily_risk_free_rate) / rolling_stddev_daily_return
 
         # sanity check
         # print(rolling_sharpe_ratio.iloc[-1])
@@ -227,6 +387,8 @@ def display_performance_visualizations(price_data, portfolio_values, portfolio,
         portfolio_values (Series): Total portfolio value over time.
         portfolio (list): Portfolio details with ticker and number of shares for each stock.
     """
+    price_data = as_price_frame(price_data)
+    plt = _pyplot()
     plt.figure(figsize=(14, 7))
 
     # Plot individual stock's value over time
@@ -240,8 +402,7 @@ def display_performance_visualizations(price_data, portfolio_values, portfolio,
             plt.plot(stock_value, label=f"{ticker} Value")
 
     # Plot total portfolio value with a thicker line
-    plt.plot(portfolio_values, label="Total Portfolio Value",
-             linewidth=2.5, color="black")
+    plt.plot(portfolio_values, label="Total Portfolio Value", linewidth=2.5, color="black")
 
     # axis
     plt.title("Portfolio Value Over Time")
@@ -250,14 +411,24 @@ def display_performance_visualizations(price_data, portfolio_values, portfolio,
     plt.legend()
 
     # Sharpe and PV
-    plt.text(0.5, -0.15, f"Current Portfolio Value: ${total_portfolio_value:,.2f}    |    Sharpe Ratio: {sharpe_ratio:.2f}",
-             ha='center', va='top', transform=plt.gca().transAxes, fontsize=12, color="black")
+    plt.text(
+        0.5,
+        -0.15,
+        f"Current Portfolio Value: ${total_portfolio_value:,.2f}    |    Sharpe Ratio: {sharpe_ratio:.2f}",
+        ha='center',
+        va='top',
+        transform=plt.gca().transAxes,
+        fontsize=12,
+        color="black",
+    )
 
     plt.tight_layout()
     plt.show()
 
 
-def display_combined_visualizations(price_data, portfolio_values, portfolio, total_portfolio_value, sharpe_ratio, rolling_sharpe_ratio, counter):
+def display_combined_visualizations(
+    price_data, portfolio_values, portfolio, total_portfolio_value, sharpe_ratio, rolling_sharpe_ratio, counter=None
+):
     """
     Display individual stock values, total portfolio value, and rolling Sharpe Ratio side by side.
 
@@ -267,8 +438,38 @@ def display_combined_visualizations(price_data, portfolio_values, portfolio, tot
         portfolio (list): Portfolio details with ticker and number of shares for each stock.
         total_portfolio_value (float): Current total value of the portfolio.
         sharpe_ratio (float): Sharpe Ratio of the portfolio.
-        rolling_sharpe_ratio (Series): Rolling Sharpe Ratio for the portfolio.
+        rolling_sharpe_ratio (Series): Rolling Sharpe Ratio for the portfolio, or a calculate_rolling_analytics
+            frame to plot the Sharpe Ratio of each of its windows.
+        counter (int): Number of the graphs/graph_<counter>.png file the chart is saved to
+            (None keeps it in memory only).
+
+    Returns:
+        bytes: The PNG chart, or None when the chart is shown interactively.
     """
+    price_data = as_price_frame(price_data)
+
+    if __name__ == "__main__":
+        # pyplot keeps global state, so only one thread may draw at a time
+        with _pyplot_lock:
+            _show_combined_visualizations(
+                price_data, portfolio_values, portfolio, total_portfolio_value, sharpe_ratio, rolling_sharpe_ratio
+            )
+        return None
+
+    # Charts are drawn by the render workers on reused figures, the lines' data is all they need
+    payload = build_chart_payload(
+        price_data, portfolio_values, portfolio, total_portfolio_value, sharpe_ratio, rolling_sharpe_ratio
+    )
+    png = render_chart(payload)
+    if counter is not None:
+        save_graph(png, counter)
+    return png
+
+
+def _show_combined_visualizations(
+    price_data, portfolio_values, portfolio, total_portfolio_value, sharpe_ratio, rolling_sharpe_ratio
+):
+    plt = _pyplot()
     fig, axes = plt.subplots(1, 2, figsize=(18, 7))
 
     # plot stock values and total portfolio value on axis 0
@@ -279,20 +480,32 @@ def display_combined_visualizations(price_data, portfolio_values, portfolio, tot
             stock_value = price_data[ticker] * nShares
             axes[0].plot(stock_value, label=f"{ticker} Value")
 
-    axes[0].plot(portfolio_values, label="Total Portfolio Value",
-                 linewidth=2.5, color="black")
+    axes[0].plot(portfolio_values, label="Total Portfolio Value", linewidth=2.5, color="black")
     axes[0].set_title("Portfolio Value Over Time")
     axes[0].set_xlabel("Date")
     axes[0].set_ylabel("Value (Price * Shares)")
     axes[0].legend()
 
     # text
-    axes[0].text(0.5, -0.15, f"Current Portfolio Value: ${total_portfolio_value:,.2f}    |    Sharpe Ratio: {sharpe_ratio:.2f}",
-                 ha='center', va='top', transform=axes[0].transAxes, fontsize=12, color="black")
+    axes[0].text(
+        0.5,
+        -0.15,
+        f"Current Portfolio Value: ${total_portfolio_value:,.2f}    |    Sharpe Ratio: {sharpe_ratio:.2f}",
+        ha='center',
+        va='top',
+        transform=axes[0].transAxes,
+        fontsize=12,
+        color="black",
+    )
 
     # Plot rolling Sharpe Ratio on the second axis
-    axes[1].plot(rolling_sharpe_ratio,
-                 label="Rolling Sharpe Ratio", color="blue")
+    if isinstance(rolling_sharpe_ratio, pd.DataFrame):
+        # Tidy frame from calculate_rolling_analytics: one line per Sharpe Ratio window
+        sharpe_rows = rolling_sharpe_ratio[rolling_sharpe_ratio['metric'] == 'sharpe_ratio']
+        for window, rows in sharpe_rows.groupby('window'):
+            axes[1].plot(rows['Date'], rows['value'], label=f"Rolling Sharpe Ratio ({window}d)")
+    else:
+        axes[1].plot(rolling_sharpe_ratio, label="Rolling Sharpe Ratio", color="blue")
     axes[1].axhline(0, color="red", linestyle="--", label="Zero Line")
     axes[1].set_title("Rolling Sharpe Ratio Over Time")
     axes[1].set_xlabel("Date")
@@ -300,60 +513,190 @@ def display_combined_visualizations(price_data, portfolio_values, portfolio, tot
     axes[1].legend()
 
     plt.tight_layout()
-    if __name__ == "__main__":
-        plt.show()
-    else:
-        plt.savefig("graphs/graph_"+str(counter)+".png", format='png')
+    plt.show()
+
+
+def save_graph(png, counter):
+    """
+    Write a rendered chart to graphs/graph_<counter>.png (used when no GraphStore is passed in).
+    """
+    with open("graphs/graph_" + str(counter) + ".png", 'wb') as graph_file:
+        graph_file.write(png)
+
+
+def _fetch_history(validated_portfolio, provider=None):
+    """
+    Fetch the longest price history the calculations need once, the 1y window is sliced out of it
+    Returns the price frame, or None if there is no price data for the portfolio
+    """
+    # Extract tickers from the validated portfolio
+    tickers = [stock['ticker'] for stock in validated_portfolio]
+
+    with stage('download'):
+        history = fetch_price_data(tickers, period='5y', provider=provider)
+    if history is None or history.empty:
+        print("No price data available for the portfolio.")
+        return None
+    observe_price_frame(history)
+    return history
+
+
+def _result_cache_key(validated_portfolio, history, provider=None, **params):
+    """
+    Key results by the holdings, the price source and the last date of the prices they were calculated from
+    """
+    provider = provider or get_default_provider()
+    return portfolio_cache_key(
+        validated_portfolio, history.index[-1].strftime('%Y-%m-%d'), provider=provider.cache_identity(), **params
+    )
+
+
+def _calculate_metrics(validated_portfolio, history):
+    """
+    Calculate total value, Sharpe ratio and rolling Sharpe ratio from the fetched history without rendering
+    Returns a dict with the metrics plus the price history and portfolio values the chart is drawn from,
+    or None if the calculations failed
+    """
+    price_data = slice_price_window(history, period='1y')
+
+    # Calculate the total value of the portfolio
+    with stage('total_value'):
+        total_portfolio_value = calculate_total_portfolio_value(validated_portfolio, price_data)
+    if total_portfolio_value is None:
+        print("Could not calculate total value due to missing data.")
+        return None
+    print("Total value of the portfolio is: $" + str(total_portfolio_value))
+
+    # Calculate the Sharpe ratio
+    with stage('sharpe_ratio'):
+        sharpe_ratio = fetch_portfolio_sharpe_ratio(validated_portfolio, price_data, total_portfolio_value)
+    if sharpe_ratio is None:
+        print("Could not calculate Sharpe ratio due to missing data.")
+        return None
+    print("Sharpe ratio of the portfolio is " + str(sharpe_ratio))
+
+    with stage('portfolio_values'):
+        portfolio_values = calculate_portfolio_value_over_time(history, validated_portfolio)
+
+    # Calculate rolling Sharpe Ratio
+    with stage('rolling_sharpe_ratio'):
+        rolling_sharpe_ratio = calculate_rolling_sharpe_ratio(history, validated_portfolio)
+
+    return {
+        'total_value': float(total_portfolio_value),
+        'sharpe_ratio': float(sharpe_ratio),
+        'rolling_sharpe_ratio': rolling_sharpe_ratio,
+        'history': history,
+        'portfolio_values': portfolio_values,
+    }
+
+
+def series_to_json(series):
+    """
+    Convert a date-indexed Series to {'dates': [...], 'values': [...]} for JSON responses, skipping NaN values
+    """
+    if series is None:
+        return {'dates': [], 'values': []}
+    series = series.dropna()
+    return {'dates': [date.strftime('%Y-%m-%d') for date in series.index], 'values': series.astype(float).tolist()}
 
 
-def calculate_value_sharpe(portfolio, counter=0):
+def calculate_portfolio_metrics(portfolio, provider=None, result_cache=default_result_cache):
+    """
+    Function to run calculations against a portfolio without rendering a chart, matplotlib is never imported
+    portfolio is anything load_and_validate_portfolio accepts
+    Returns a JSON-ready dict with the total value, Sharpe ratio and rolling Sharpe ratio ('dates' and 'values'),
+    or None if validation or the calculations failed
+    """
+    validated_portfolio = load_and_validate_portfolio(portfolio)
+    if not validated_portfolio:
+        print("Portfolio validation failed. Cannot calculate total value.")
+        return None
+
+    history = _fetch_history(validated_portfolio, provider)
+    if history is None:
+        return None
+
+    cache_key = _result_cache_key(validated_portfolio, history, provider, output='metrics')
+    cached = result_cache.get(cache_key) if result_cache is not None else None
+    if cached is not None:
+        print("Returning cached metrics for the portfolio.")
+        return dict(cached['result'])
+
+    metrics = _calculate_metrics(validated_portfolio, history)
+    if metrics is None:
+        return None
+    result = {
+        'total_value': metrics['total_value'],
+        'sharpe_ratio': metrics['sharpe_ratio'],
+        'rolling_sharpe_ratio': series_to_json(metrics['rolling_sharpe_ratio']),
+    }
+    if result_cache is not None:
+        result_cache.put(cache_key, result)
+    return result
+
+
+def calculate_value_sharpe(portfolio, counter=0, provider=None, result_cache=default_result_cache, graph_store=None):
     """
     Function to run calculations against validated portfolio
+    Prices come from provider (default is get_default_provider())
+    The chart is put in graph_store under counter, or written to graphs/graph_<counter>.png without one
+    Returns a dict with the total value, Sharpe ratio and graph counter, or None if the calculations failed
+    Repeat uploads of the same portfolio against the same prices are answered from result_cache (None disables it)
     """
 
     validated_portfolio = load_and_validate_portfolio(portfolio)
 
     if validated_portfolio:
-        # Extract tickers from the validated portfolio
-        tickers = [stock['ticker'] for stock in validated_portfolio]
-
-        # Fetch historical price data for the tickers
-        price_data = yf.download(tickers, period='1y', progress=False)['Close']
-
-        # Calculate the total value of the portfolio
-        total_portfolio_value = calculate_total_portfolio_value(
-            validated_portfolio, price_data)
-        print("Total value of the portfolio is: $" + str(total_portfolio_value))
-
-        # Calculate the Sharpe ratio
-        sharpe_ratio = fetch_portfolio_sharpe_ratio(
-            validated_portfolio, price_data, total_portfolio_value)
-        if sharpe_ratio is not None:
-            print("Sharpe ratio of the portfolio is " + str(sharpe_ratio))
-            # if visualization:
-            price_data = fetch_price_data(tickers, period='5y')
-            portfolio_values = calculate_portfolio_value_over_time(
-                price_data, validated_portfolio)
-
-            # Calculate rolling Sharpe Ratio
-            rolling_sharpe_ratio = calculate_rolling_sharpe_ratio(
-                price_data, validated_portfolio)
+        history = _fetch_history(validated_portfolio, provider)
+        if history is None:
+            return None
 
+        # Same holdings against the same source's prices up to the same date give the same metrics and chart
+        cache_key = _result_cache_key(validated_portfolio, history, provider)
+        cached = result_cache.get(cache_key) if result_cache is not None else None
+        if cached is not None:
+            print("Returning cached results for the portfolio.")
+            if cached['png']:
+                if graph_store is not None:
+                    graph_store.put(counter, cached['png'])
+                else:
+                    save_graph(cached['png'], counter)
+            return dict(cached['result'], counter=counter)
+
+        metrics = _calculate_metrics(validated_portfolio, history)
+        if metrics is not None:
+            rolling_sharpe_ratio = metrics['rolling_sharpe_ratio']
             print("rolling share ration is " + str(rolling_sharpe_ratio))
 
             # Display combined visualizations
+            png = None
             if rolling_sharpe_ratio is not None:
-                display_combined_visualizations(
-                    price_data, portfolio_values, validated_portfolio, total_portfolio_value, sharpe_ratio, rolling_sharpe_ratio, counter)
-
-        else:
-            print("Could not calculate Sharpe ratio due to missing data.")
+                with stage('render'):
+                    png = display_combined_visualizations(
+                        metrics['history'],
+                        metrics['portfolio_values'],
+                        validated_portfolio,
+                        metrics['total_value'],
+                        metrics['sharpe_ratio'],
+                        rolling_sharpe_ratio,
+                        None if graph_store is not None else counter,
+                    )
+                if graph_store is not None and png is not None:
+                    graph_store.put(counter, png)
+
+            result = {
+                'total_value': metrics['total_value'],
+                'sharpe_ratio': metrics['sharpe_ratio'],
+                'counter': counter,
+            }
+            if result_cache is not None and png is not None:
+                result_cache.put(cache_key, result, png)
+            return result
     else:
         print("Portfolio validation failed. Cannot calculate total value.")
+    return None
 
 
 if __name__ == "__main__":
     calculate_value_sharpe("test_stock_v2.json", counter=0)
-else:
-    import matplotlib
-    matplotlib.use('Agg')
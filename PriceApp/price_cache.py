@@ -0,0 +1,245 @@
+import os
+import re
+import time
+import hashlib
+import tempfile
+from datetime import datetime
+from PriceApp.lazy import lazy_import
+from PriceApp.metrics import CACHE_REQUESTS
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Directory holding the on-disk price store (override with QUEBEC_PRICE_CACHE)
+PRICE_CACHE_DIR = os.environ.get(
+    'QUEBEC_PRICE_CACHE', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'price_cache'))
+)
+
+# Cached closes younger than this many seconds are served without asking the provider for new bars
+PRICE_CACHE_TTL = int(os.environ.get('QUEBEC_PRICE_CACHE_TTL', 900))
+
+# Characters a ticker symbol may use, e.g. BRK.B, ^GSPC, EURUSD=X, BTC-USD
+_TICKER_PATTERN = re.compile(r'^[A-Za-z0-9.^=-]+$')
+
+
+def period_start(period, today=None):
+    """
+    Convert a yfinance style period ('5d', '6mo', '1y', 'ytd', 'max', ...) into the first date it covers.
+
+    Parameters:
+        period (str): The period string.
+        today (Timestamp): Reference date (default is today).
+
+    Returns:
+        Timestamp: The first date covered by the period, or None for 'max'.
+    """
+    today = pd.Timestamp(today if today is not None else datetime.today()).normalize()
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return pd.Timestamp(year=today.year, month=1, day=1)
+
+    units = {'d': 'days', 'wk': 'weeks', 'mo': 'months', 'y': 'years'}
+    for suffix, unit in units.items():
+        if period.endswith(suffix) and period[: -len(suffix)].isdigit():
+            return today - pd.DateOffset(**{unit: int(period[: -len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def is_valid_ticker(ticker):
+    """
+    Check a ticker symbol before it is used in a file name.
+
+    Parameters:
+        ticker (str): The stock ticker symbol.
+
+    Returns:
+        bool: True if the ticker only uses ticker characters, so it can't point outside its directory.
+    """
+    return isinstance(ticker, str) and bool(_TICKER_PATTERN.match(ticker)) and bool(ticker.strip('.'))
+
+
+def cache_namespace(identity):
+    """
+    Turn a provider's cache_identity() into the directory name its prices are cached under.
+
+    Parameters:
+        identity (str): The provider's cache identity.
+
+    Returns:
+        str: A short hash that is safe to use as a directory name.
+    """
+    return hashlib.sha1(identity.encode('utf-8'), usedforsecurity=False).hexdigest()[:16]
+
+
+def _cache_path(ticker, interval, cache_dir, namespace=None):
+    # Each provider gets its own directory so different sources never read each other's prices
+    return os.path.join(cache_dir or PRICE_CACHE_DIR, namespace or '', interval, f"{ticker}.npz")
+
+
+def _naive(timestamp):
+    # Compare dates independent of the timezone the provider attached to the index
+    timestamp = pd.Timestamp(timestamp)
+    return timestamp.tz_localize(None) if timestamp.tz is not None else timestamp
+
+
+def load_cached_prices(ticker, interval='1d', cache_dir=None, namespace=None):
+    """
+    Load the cached closing prices of one ticker.
+
+    Parameters:
+        ticker (str): The stock ticker symbol.
+        interval (str): The bar interval the prices were stored under.
+        cache_dir (str): The cache directory (default is PRICE_CACHE_DIR).
+        namespace (str): The provider's directory inside the cache, from cache_namespace.
+
+    Returns:
+        tuple: (Series of closes, Timestamp the history was requested from or None for 'max',
+               time of the last write in seconds) or (None, None, None) when nothing is cached.
+    """
+    if not is_valid_ticker(ticker):
+        print(f"Invalid ticker symbol: {ticker!r}")
+        return None, None, None
+    path = _cache_path(ticker, interval, cache_dir, namespace)
+    if not os.path.exists(path):
+        return None, None, None
+    try:
+        with np.load(path, allow_pickle=False) as stored:
+            dates = pd.DatetimeIndex(stored['dates'].astype('datetime64[ns]'))
+            tz = str(stored['tz'])
+            if tz:
+                dates = dates.tz_localize('UTC').tz_convert(tz)
+            covered_from = int(stored['covered_from'])
+            covered_from = None if covered_from < 0 else pd.Timestamp(covered_from)
+            series = pd.Series(stored['close'], index=dates, name=ticker)
+        return series, covered_from, os.path.getmtime(path)
+    except Exception as e:
+        print(f"Error reading cached prices for {ticker}: {e}")
+        return None, None, None
+
+
+def store_cached_prices(ticker, series, covered_from, interval='1d', cache_dir=None, namespace=None):
+    """
+    Write the closing prices of one ticker to the cache, replacing any previous entry.
+
+    Parameters:
+        ticker (str): The stock ticker symbol.
+        series (Series): Closing prices indexed by date.
+        covered_from (Timestamp): The date the history was requested from (None for 'max').
+        interval (str): The bar interval of the prices.
+        cache_dir (str): The cache directory (default is PRICE_CACHE_DIR).
+        namespace (str): The provider's directory inside the cache, from cache_namespace.
+    """
+    if not is_valid_ticker(ticker):
+        print(f"Invalid ticker symbol: {ticker!r}")
+        return
+    path = _cache_path(ticker, interval, cache_dir, namespace)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    series = series.dropna().sort_index()
+    index = pd.DatetimeIndex(series.index)
+    tz = ''
+    if index.tz is not None:
+        tz = str(index.tz)
+        index = index.tz_convert('UTC').tz_localize(None)
+
+    # Write to a temporary file first so concurrent readers never see a half written entry
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.npz')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            np.savez(
+                tmp_file,
+                dates=index.values.astype('datetime64[ns]').astype(np.int64),
+                close=series.to_numpy(dtype=np.float64),
+                tz=np.array(tz),
+                covered_from=np.array(-1 if covered_from is None else _naive(covered_from).value),
+            )
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+def fetch_cached_price_data(tickers, download, period="5y", interval="1d", cache_dir=None, namespace=None):
+    """
+    Fetch closing prices through the on-disk cache.
+
+    Tickers with a cached history covering the requested period only download the bars from
+    their last cached date onwards (the last bar is fetched again since it may have been stored
+    intraday). Everything else is downloaded in full and stored. If the incremental download
+    fails the cached prices are returned as they are. Invalid ticker symbols are skipped.
+
+    Parameters:
+        tickers (list): A list of stock ticker symbols.
+        download (callable): download(tickers, period=None, start=None, interval='1d') returning
+            a DataFrame of closing prices with one column per ticker.
+        period (str): The time period for fetching data (default at 5y).
+        interval (str): The bar interval (default at 1d).
+        cache_dir (str): The cache directory (default is PRICE_CACHE_DIR).
+        namespace (str): The provider's directory inside the cache, from cache_namespace.
+
+    Returns:
+        DataFrame: Closing prices for each ticker.
+    """
+    for ticker in tickers:
+        if not is_valid_ticker(ticker):
+            print(f"Invalid ticker symbol: {ticker!r}")
+    tickers = [ticker for ticker in tickers if is_valid_ticker(ticker)]
+
+    start = period_start(period)
+    cached = {}
+    coverage = {}
+    stale = []
+    missing = []
+
+    for ticker in tickers:
+        series, covered_from, written_at = load_cached_prices(ticker, interval, cache_dir, namespace)
+        if series is None or series.empty:
+            missing.append(ticker)
+        elif covered_from is not None and (start is None or covered_from > start):
+            # The cached history is shorter than the period asked for
+            missing.append(ticker)
+        else:
+            cached[ticker] = series
+            coverage[ticker] = covered_from
+            if time.time() - written_at > PRICE_CACHE_TTL:
+                stale.append(ticker)
+
+    CACHE_REQUESTS.inc(len(cached) - len(stale), cache='price', result='hit')
+    CACHE_REQUESTS.inc(len(stale), cache='price', result='stale')
+    CACHE_REQUESTS.inc(len(missing), cache='price', result='miss')
+
+    if stale:
+        # Only ask for the bars since the oldest last cached date
+        since = min(_naive(cached[ticker].index[-1]) for ticker in stale)
+        try:
+            fresh = download(stale, start=since.strftime('%Y-%m-%d'), interval=interval)
+        except Exception as e:
+            print(f"Error fetching new bars, using cached prices: {e}")
+            fresh = None
+        if fresh is not None:
+            for ticker in stale:
+                if ticker in fresh.columns and not fresh[ticker].dropna().empty:
+                    new_bars = fresh[ticker].dropna()
+                    old_bars = cached[ticker][cached[ticker].index < new_bars.index.min()]
+                    cached[ticker] = pd.concat([old_bars, new_bars]).rename(ticker)
+                # Rewrite even without new bars so the entry counts as fresh again
+                store_cached_prices(ticker, cached[ticker], coverage[ticker], interval, cache_dir, namespace)
+
+    if missing:
+        data = download(missing, period=period, interval=interval)
+        for ticker in missing:
+            if ticker in data.columns and not data[ticker].dropna().empty:
+                cached[ticker] = data[ticker].dropna().rename(ticker)
+                store_cached_prices(ticker, cached[ticker], start, interval, cache_dir, namespace)
+            else:
+                print(f"No historical data available for {ticker}")
+
+    if not cached:
+        return pd.DataFrame()
+
+    data = pd.concat([cached[ticker] for ticker in tickers if ticker in cached], axis=1).sort_index()
+    data.columns.name = 'Ticker'
+    if start is not None:
+        data = data[data.index.tz_localize(None) >= start] if data.index.tz is not None else data[data.index >= start]
+    return data
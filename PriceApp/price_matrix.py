@@ -0,0 +1,153 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+from PriceApp.lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+FORMAT_VERSION = 1
+
+# Matrices already opened in this process, by absolute path
+_open_matrices = {}
+_open_lock = threading.Lock()
+
+
+def _matrix_directory(path):
+    # The version directory the 'current' link points to, or path itself for a matrix written in place
+    link = os.path.join(path, 'current')
+    if os.path.islink(link):
+        return os.path.join(path, os.readlink(link))
+    return path
+
+
+def write_price_matrix(price_data, path, dtype='float64'):
+    """
+    Save a price frame in the compact on-disk price matrix format.
+
+    The matrix is a directory holding a 'current' link to a version directory with:
+        meta.json     format version, dtype, shape and timezone
+        dates.npy     the date index as int64 nanoseconds
+        tickers.json  the ticker of each row
+        close.bin     one contiguous (tickers x days) block of prices, each ticker's history in one run
+
+    Every write goes to a new version directory that is swapped in by replacing the link, so a
+    reader opening the matrix sees either the old files or the new ones, never a mix.
+
+    Parameters:
+        price_data (DataFrame): Price data for a list of tickers.
+        path (str): The directory to write the matrix to.
+        dtype (str): 'float64' or 'float32' (default is float64; float32 halves the size).
+    """
+    os.makedirs(path, exist_ok=True)
+    index = pd.DatetimeIndex(price_data.index)
+    tz = ''
+    if index.tz is not None:
+        tz = str(index.tz)
+        index = index.tz_convert('UTC').tz_localize(None)
+
+    version = tempfile.mkdtemp(prefix='v-', dir=path)
+    block = np.ascontiguousarray(price_data.to_numpy(dtype=dtype).T)
+    block.tofile(os.path.join(version, 'close.bin'))
+    np.save(os.path.join(version, 'dates.npy'), index.values.astype('datetime64[ns]').astype(np.int64))
+    with open(os.path.join(version, 'tickers.json'), 'w') as tickers_file:
+        json.dump([str(ticker) for ticker in price_data.columns], tickers_file)
+    with open(os.path.join(version, 'meta.json'), 'w') as meta_file:
+        json.dump(
+            {'version': FORMAT_VERSION, 'dtype': np.dtype(dtype).name, 'shape': list(block.shape), 'tz': tz}, meta_file
+        )
+
+    # Swap the new version in with one rename
+    previous = _matrix_directory(path)
+    link = os.path.join(path, 'current.tmp')
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(version), link)
+    os.replace(link, os.path.join(path, 'current'))
+
+    # Keep the previous version for readers still opening it, older ones go
+    keep = {os.path.basename(version), os.path.basename(previous)}
+    for entry in os.scandir(path):
+        if entry.name.startswith('v-') and entry.name not in keep:
+            shutil.rmtree(entry.path, ignore_errors=True)
+    with _open_lock:
+        _open_matrices.pop(os.path.abspath(path), None)
+
+
+class PriceMatrix:
+    """
+    Read-only price matrix backed by numpy.memmap.
+
+    Every process that opens the same file shares one copy of the prices in the OS page cache
+    instead of holding its own pandas copy. Pass it wherever a price_data DataFrame is expected,
+    or call to_frame() to get a DataFrame view over the mapped block.
+    """
+
+    def __init__(self, path):
+        """
+        Parameters:
+            path (str): Directory written by write_price_matrix.
+        """
+        self.path = path
+        # Read every file from one version, even if a new one is swapped in meanwhile
+        self.directory = directory = _matrix_directory(path)
+        with open(os.path.join(directory, 'meta.json')) as meta_file:
+            meta = json.load(meta_file)
+        if meta['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported price matrix version {meta['version']} in {path}")
+        with open(os.path.join(directory, 'tickers.json')) as tickers_file:
+            self.columns = pd.Index(json.load(tickers_file), name='Ticker')
+
+        dates = pd.DatetimeIndex(
+            np.load(os.path.join(directory, 'dates.npy'), allow_pickle=False).astype('datetime64[ns]')
+        )
+        self.index = dates.tz_localize('UTC').tz_convert(meta['tz']) if meta['tz'] else dates
+        self.index.name = 'Date'
+
+        n_tickers, n_days = meta['shape']
+        self.block = np.memmap(
+            os.path.join(directory, 'close.bin'), dtype=meta['dtype'], mode='r', shape=(n_tickers, n_days)
+        )
+        self._frame = None
+
+    @property
+    def shape(self):
+        return (len(self.index), len(self.columns))
+
+    def to_frame(self):
+        """
+        Return the prices as a (days x tickers) DataFrame that views the mapped block without copying.
+        """
+        if self._frame is None:
+            self._frame = pd.DataFrame(self.block.T, index=self.index, columns=self.columns, copy=False)
+        return self._frame
+
+
+def open_price_matrix(path):
+    """
+    Open a price matrix, reusing the mapping if this process already opened its current version.
+
+    Parameters:
+        path (str): Directory written by write_price_matrix.
+
+    Returns:
+        PriceMatrix: The memory-mapped matrix.
+    """
+    path = os.path.abspath(path)
+    with _open_lock:
+        matrix = _open_matrices.get(path)
+        # Reopen when another process has written a new version since
+        if matrix is None or matrix.directory != _matrix_directory(path):
+            matrix = _open_matrices[path] = PriceMatrix(path)
+        return matrix
+
+
+def as_price_frame(price_data):
+    """
+    Return price_data as a DataFrame, viewing a PriceMatrix without copying it.
+    """
+    if isinstance(price_data, PriceMatrix):
+        return price_data.to_frame()
+    return price_data
@@ -0,0 +1,219 @@
+"""
+Opt-in CPU and memory profiling of portfolio calculations.
+
+Set QUEBEC_PROFILE to choose when uploads are profiled:
+    unset or 0   never (nothing is imported or wrapped, so there is no overhead)
+    header       only requests sent with an 'X-Quebec-Profile: 1' header
+    1            every upload
+
+Each profiled run saves a cProfile stats file and a JSON summary with the slowest functions and
+the top tracemalloc allocation sites to QUEBEC_PROFILE_DIR (default <project>/profiles). Only the
+newest QUEBEC_MAX_PROFILES runs (default 20) are kept.
+
+    python -m PriceApp.profiling list
+    python -m PriceApp.profiling show <name> [--limit 30]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+
+PROFILE_MODE = os.environ.get('QUEBEC_PROFILE', '0').strip().lower()
+PROFILE_DIR = os.environ.get(
+    'QUEBEC_PROFILE_DIR', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'profiles'))
+)
+MAX_PROFILES = int(os.environ.get('QUEBEC_MAX_PROFILES', 20))
+
+# tracemalloc is process-wide, so only one run is profiled at a time
+_profile_lock = threading.Lock()
+
+
+def should_profile(header_value=None):
+    """
+    Return True if a run should be profiled under QUEBEC_PROFILE, given the request's X-Quebec-Profile header.
+    """
+    if PROFILE_MODE in ('', '0', 'off', 'false', 'no'):
+        return False
+    if PROFILE_MODE == 'header':
+        return header_value is not None and header_value.strip().lower() in ('1', 'true', 'yes')
+    return True
+
+
+def profile_call(label, fn, *args, **kwargs):
+    """
+    Run fn(*args, **kwargs) under cProfile and tracemalloc and save the results.
+
+    If another run is already being profiled, fn runs without profiling.
+
+    Parameters:
+        label (str): Name saved with the profile, e.g. 'upload'.
+        fn (callable): The function to run.
+
+    Returns:
+        The return value of fn.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        print("Another run is being profiled, running without the profiler")
+        return fn(*args, **kwargs)
+    try:
+        import cProfile
+        import tracemalloc
+
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start(10)
+        profiler = cProfile.Profile()
+        started = time.time()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if not tracing:
+                tracemalloc.stop()
+            try:
+                save_profile(label, profiler, snapshot, started, duration, peak)
+            except OSError as e:
+                print(f"Error saving profile: {e}")
+    finally:
+        _profile_lock.release()
+
+
+def save_profile(label, profiler, snapshot, started, duration, peak_bytes, directory=None, top=25):
+    """
+    Write <name>.prof and <name>.json for a profiled run and drop the oldest runs beyond MAX_PROFILES.
+
+    Returns:
+        str: The name of the saved profile.
+    """
+    import pstats
+    import tracemalloc
+
+    directory = directory or PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    safe_label = ''.join(character if character.isalnum() or character in '-_' else '_' for character in label)
+    # Names sort oldest first, which rotate_profiles relies on
+    timestamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(started)) + f"{int(started % 1 * 1e6):06d}"
+    name = f"{timestamp}-{uuid.uuid4().hex[:8]}-{safe_label}"
+
+    profiler.dump_stats(os.path.join(directory, name + '.prof'))
+    stats = pstats.Stats(profiler)
+    functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+
+    # Allocation sites inside the tracemalloc module itself are noise
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    allocations = snapshot.statistics('lineno')[:top]
+
+    summary = {
+        'name': name,
+        'label': label,
+        'started': started,
+        'duration_s': duration,
+        'peak_bytes': peak_bytes,
+        'top_functions': [
+            {'function': f"{path}:{line}({function})", 'calls': calls, 'total_s': total, 'cumulative_s': cumulative}
+            for (path, line, function), (_, calls, total, cumulative, _) in functions
+        ],
+        'top_allocations': [
+            {
+                'site': f"{allocation.traceback[0].filename}:{allocation.traceback[0].lineno}",
+                'size_bytes': allocation.size,
+                'count': allocation.count,
+            }
+            for allocation in allocations
+        ],
+    }
+    with open(os.path.join(directory, name + '.json'), 'w') as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    rotate_profiles(directory)
+    return name
+
+
+def rotate_profiles(directory=None, max_profiles=None):
+    """
+    Delete the oldest profiles so at most max_profiles (default MAX_PROFILES) are kept.
+    """
+    directory = directory or PROFILE_DIR
+    max_profiles = MAX_PROFILES if max_profiles is None else max_profiles
+    names = sorted(file_name[:-5] for file_name in os.listdir(directory) if file_name.endswith('.json'))
+    for name in names[: max(0, len(names) - max_profiles)]:
+        for extension in ('.json', '.prof'):
+            path = os.path.join(directory, name + extension)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def list_profiles(directory=None):
+    """
+    Return a short summary of every saved profile, newest first.
+    """
+    directory = directory or PROFILE_DIR
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for file_name in sorted(os.listdir(directory), reverse=True):
+        if file_name.endswith('.json'):
+            summary = load_profile(file_name[:-5], directory)
+            if summary is not None:
+                profiles.append({key: summary[key] for key in ('name', 'label', 'started', 'duration_s', 'peak_bytes')})
+    return profiles
+
+
+def load_profile(name, directory=None):
+    """
+    Return the saved summary of a profile, or None if there is no profile by that name.
+    """
+    directory = directory or PROFILE_DIR
+    if os.path.basename(name) != name:
+        return None
+    try:
+        with open(os.path.join(directory, name + '.json')) as summary_file:
+            return json.load(summary_file)
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List and summarise saved profiles.")
+    parser.add_argument('--dir', default=None, help="profiles directory (default is QUEBEC_PROFILE_DIR)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="list saved profiles, newest first")
+    show = commands.add_parser('show', help="show the slowest functions and top allocation sites of a profile")
+    show.add_argument('name')
+    show.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for profile in list_profiles(args.dir):
+            print(
+                f"{profile['name']:<50} {profile['duration_s'] * 1000:10.1f} ms  "
+                f"peak {profile['peak_bytes'] / 1024 ** 2:8.1f} MB"
+            )
+        return 0
+
+    summary = load_profile(args.name, args.dir)
+    if summary is None:
+        print(f"No profile named {args.name}")
+        return 1
+    print(f"{summary['name']}: {summary['duration_s'] * 1000:.1f} ms, peak {summary['peak_bytes'] / 1024 ** 2:.1f} MB")
+    import pstats
+
+    pstats.Stats(os.path.join(args.dir or PROFILE_DIR, args.name + '.prof')).sort_stats('cumulative').print_stats(
+        args.limit
+    )
+    print("Top allocation sites:")
+    for allocation in summary['top_allocations'][: args.limit]:
+        print(f"{allocation['size_bytes'] / 1024:12.1f} KiB {allocation['count']:8d} blocks  {allocation['site']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,304 @@
+import os
+import time
+import threading
+from concurrent.futures import Future
+from PriceApp.lazy import lazy_import
+from PriceApp.price_cache import is_valid_ticker, period_start
+from PriceApp.price_matrix import open_price_matrix
+
+pd = lazy_import('pandas')
+
+
+class PriceProvider:
+    """
+    Source of historical closing prices.
+
+    Subclasses implement fetch_close and return the same wide frame yfinance does:
+    one column per ticker, indexed by date.
+    """
+
+    # Whether fetch_price_data should keep the provider's prices in the on-disk price cache
+    cacheable = True
+
+    # Whether fetches go over the network, only then is sharing downloads between requests worth a wait
+    remote = True
+
+    def fetch_close(self, tickers, period=None, start=None, interval="1d"):
+        """
+        Fetch closing prices for a list of tickers.
+
+        Parameters:
+            tickers (list): A list of stock ticker symbols.
+            period (str): The time period to fetch, e.g. '1y' or '5y'. Ignored when start is given.
+            start (str): First date to fetch in 'YYYY-MM-DD' format.
+            interval (str): The bar interval (default at 1d).
+
+        Returns:
+            DataFrame: Closing prices with one column per ticker.
+        """
+        raise NotImplementedError
+
+    def cache_identity(self):
+        """
+        Return a string naming where the prices come from, so cached results from different sources don't mix.
+        """
+        return type(self).__name__
+
+
+class YFinanceProvider(PriceProvider):
+    """
+    Downloads closing prices from Yahoo Finance.
+    """
+
+    def fetch_close(self, tickers, period=None, start=None, interval="1d"):
+        import yfinance as yf
+
+        if start is not None:
+            data = yf.download(tickers, start=start, interval=interval, progress=False)['Close']
+        else:
+            data = yf.download(tickers, period=period, interval=interval, progress=False)['Close']
+        # A single ticker can come back as a Series depending on the yfinance version
+        if isinstance(data, pd.Series):
+            data = data.to_frame(name=tickers[0])
+        return data
+
+
+class FileProvider(PriceProvider):
+    """
+    Reads closing prices from a directory holding one <TICKER>.csv or <TICKER>.parquet file per ticker.
+
+    Each file has a date column (used as index) and either a 'Close' column or a single price column.
+    Periods are measured back from as_of, or from the latest date in the files when as_of is None,
+    so an old snapshot replays the same way on any day.
+    """
+
+    # The files are already on local disk, copying them into the price cache gains nothing
+    cacheable = False
+    remote = False
+
+    def __init__(self, directory, as_of=None):
+        self.directory = directory
+        self.as_of = as_of
+
+    def cache_identity(self):
+        return f"FileProvider({os.path.abspath(self.directory)}, as_of={self.as_of})"
+
+    def _read_ticker(self, ticker):
+        if not is_valid_ticker(ticker):
+            print(f"Invalid ticker symbol: {ticker!r}")
+            return None
+        for extension in ('.parquet', '.csv'):
+            path = os.path.join(self.directory, ticker + extension)
+            if os.path.exists(path):
+                if extension == '.parquet':
+                    frame = pd.read_parquet(path)
+                    if not isinstance(frame.index, pd.DatetimeIndex):
+                        frame = frame.set_index(frame.columns[0])
+                else:
+                    frame = pd.read_csv(path, index_col=0)
+                frame.index = pd.to_datetime(frame.index)
+                prices = frame['Close'] if 'Close' in frame.columns else frame.iloc[:, 0]
+                return prices.sort_index().rename(ticker)
+        print(f"No price file available for {ticker} in {self.directory}")
+        return None
+
+    def fetch_close(self, tickers, period=None, start=None, interval="1d"):
+        columns = [self._read_ticker(ticker) for ticker in tickers]
+        columns = [column for column in columns if column is not None]
+        if not columns:
+            return pd.DataFrame()
+        data = pd.concat(columns, axis=1).sort_index()
+        data.columns.name = 'Ticker'
+
+        if start is not None:
+            first = pd.Timestamp(start)
+        else:
+            first = period_start(period or 'max', today=self.as_of if self.as_of is not None else data.index.max())
+        if first is not None:
+            if data.index.tz is not None and first.tz is None:
+                first = first.tz_localize(data.index.tz)
+            data = data[data.index >= first]
+        if self.as_of is not None:
+            last = pd.Timestamp(self.as_of)
+            if data.index.tz is not None and last.tz is None:
+                last = last.tz_localize(data.index.tz)
+            data = data[data.index <= last]
+        return data
+
+
+class PriceMatrixProvider(PriceProvider):
+    """
+    Reads closing prices from a memory-mapped price matrix written by write_price_matrix.
+
+    Every worker process that uses the same matrix shares one read-only copy of the prices in the
+    OS page cache. Only the requested tickers are copied out, and periods are measured back from
+    the last date in the matrix.
+    """
+
+    # The matrix is already on local disk, copying it into the price cache gains nothing
+    cacheable = False
+    remote = False
+
+    def __init__(self, path):
+        self.path = path
+
+    def cache_identity(self):
+        return f"PriceMatrixProvider({os.path.abspath(self.path)})"
+
+    def fetch_close(self, tickers, period=None, start=None, interval="1d"):
+        matrix = open_price_matrix(self.path)
+        known = [ticker for ticker in tickers if ticker in matrix.columns]
+        for ticker in tickers:
+            if ticker not in matrix.columns:
+                print(f"No price data available for {ticker} in {self.path}")
+        if not known or len(matrix.index) == 0:
+            return pd.DataFrame()
+
+        if start is not None:
+            first = pd.Timestamp(start)
+        else:
+            first = period_start(period or 'max', today=matrix.index[-1])
+        row = 0
+        if first is not None:
+            if matrix.index.tz is not None and first.tz is None:
+                first = first.tz_localize(matrix.index.tz)
+            row = int(matrix.index.searchsorted(first, side='left'))
+        return matrix.to_frame().iloc[row:][known]
+
+
+class CoalescingProvider(PriceProvider):
+    """
+    Wraps another provider so concurrent requests share downloads.
+
+    A ticker already being downloaded for the same period, start and interval is not fetched
+    again, every caller waits for the one in-flight download (single-flight). Tickers requested
+    by different callers within window seconds of each other are fetched with one multi-ticker call.
+    The window is only waited for while other requests are pending, a lone request downloads at once.
+    """
+
+    def __init__(self, provider, window=None):
+        """
+        Parameters:
+            provider (PriceProvider): The provider that does the downloads.
+            window (float): Seconds to gather tickers before a download starts
+                (default is QUEBEC_COALESCE_WINDOW or 0.05).
+        """
+        self.provider = provider
+        self.cacheable = provider.cacheable
+        self.remote = provider.remote
+        self.window = window if window is not None else float(os.environ.get('QUEBEC_COALESCE_WINDOW', 0.05))
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._batches = {}
+        self._pending = 0
+        self.downloads = 0
+        self.coalesced = 0
+
+    def cache_identity(self):
+        return self.provider.cache_identity()
+
+    def fetch_close(self, tickers, period=None, start=None, interval="1d"):
+        group = (period, None if start is None else str(start), interval)
+        futures = {}
+        leader = False
+        with self._lock:
+            self._pending += 1
+            for ticker in dict.fromkeys(tickers):
+                future = self._in_flight.get((ticker,) + group)
+                if future is None:
+                    future = self._in_flight[(ticker,) + group] = Future()
+                    if group not in self._batches:
+                        # First caller of this batch, it runs the download once the window closes
+                        self._batches[group] = []
+                        leader = True
+                    self._batches[group].append(ticker)
+                else:
+                    self.coalesced += 1
+                futures[ticker] = future
+
+        try:
+            if leader:
+                self._download(group)
+            columns = [futures[ticker].result() for ticker in futures]
+        finally:
+            with self._lock:
+                self._pending -= 1
+        columns = [column for column in columns if column is not None]
+        if not columns:
+            return pd.DataFrame()
+        data = pd.concat(columns, axis=1)
+        data.columns.name = 'Ticker'
+        # Other callers' tickers in the same download can add dates these tickers don't trade on
+        return data.dropna(how='all')
+
+    def _download(self, group):
+        with self._lock:
+            # Another request is pending, give it and any that follow the window to join this download
+            wait = self.window > 0 and self._pending > 1
+        if wait:
+            time.sleep(self.window)
+        with self._lock:
+            tickers = self._batches.pop(group)
+            self.downloads += 1
+        period, start, interval = group
+        futures = [self._in_flight[(ticker,) + group] for ticker in tickers]
+        try:
+            data = self.provider.fetch_close(tickers, period=period, start=start, interval=interval)
+            for ticker, future in zip(tickers, futures):
+                future.set_result(data[ticker].rename(ticker) if ticker in data.columns else None)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                for ticker in tickers:
+                    self._in_flight.pop((ticker,) + group, None)
+
+
+def export_price_files(price_data, directory, file_format='csv'):
+    """
+    Write a price frame as one file per ticker so it can be replayed with FileProvider.
+
+    Parameters:
+        price_data (DataFrame): Closing prices with one column per ticker.
+        directory (str): The directory to write the files to.
+        file_format (str): 'csv' or 'parquet' (default is csv).
+    """
+    os.makedirs(directory, exist_ok=True)
+    for ticker in price_data.columns:
+        frame = price_data[ticker].dropna().to_frame(name='Close')
+        frame.index.name = 'Date'
+        if file_format == 'parquet':
+            frame.to_parquet(os.path.join(directory, f"{ticker}.parquet"))
+        else:
+            frame.to_csv(os.path.join(directory, f"{ticker}.csv"))
+
+
+_default_provider = None
+
+
+def get_default_provider():
+    """
+    Return the provider used when none is passed in.
+
+    Set QUEBEC_PRICE_MATRIX to read prices from a shared memory-mapped price matrix, or
+    QUEBEC_PRICE_DIR to read them from a FileProvider directory instead of Yahoo Finance.
+    """
+    global _default_provider
+    if _default_provider is None:
+        price_matrix = os.environ.get('QUEBEC_PRICE_MATRIX')
+        price_dir = os.environ.get('QUEBEC_PRICE_DIR')
+        if price_matrix:
+            _default_provider = PriceMatrixProvider(price_matrix)
+        else:
+            _default_provider = FileProvider(price_dir) if price_dir else YFinanceProvider()
+    return _default_provider
+
+
+def set_default_provider(provider):
+    """
+    Replace the provider used when none is passed in (None restores the configured default).
+    """
+    global _default_provider
+    _default_provider = provider
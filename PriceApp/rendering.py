@@ -0,0 +1,223 @@
+import io
+import os
+import threading
+from PriceApp.lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Number of render processes (0 renders in the calling process)
+RENDER_WORKERS = int(os.environ.get('QUEBEC_RENDER_WORKERS', min(4, os.cpu_count() or 1)))
+
+_NANOSECONDS_PER_DAY = 86_400 * 10**9
+
+# The figure template of this process, built once by _init_worker
+_template = None
+_inline_lock = threading.Lock()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _date_numbers(index):
+    # Matplotlib date numbers are days since 1970-01-01 (UTC), computed here so the parent never imports matplotlib
+    return pd.DatetimeIndex(index).as_unit('ns').asi8 / _NANOSECONDS_PER_DAY
+
+
+def build_chart_payload(
+    price_data, portfolio_values, portfolio, total_portfolio_value, sharpe_ratio, rolling_sharpe_ratio
+):
+    """
+    Reduce the chart inputs to the plain arrays and text a render worker draws.
+
+    Parameters match display_combined_visualizations.
+
+    Returns:
+        dict: Picklable chart data.
+    """
+    stocks = []
+    for stock in portfolio:
+        ticker = stock['ticker']
+        if ticker in price_data.columns:
+            stocks.append((f"{ticker} Value", (price_data[ticker] * stock['nShares']).to_numpy(dtype=np.float64)))
+
+    if isinstance(rolling_sharpe_ratio, pd.DataFrame):
+        # Tidy frame from calculate_rolling_analytics: one line per Sharpe Ratio window
+        sharpe_rows = rolling_sharpe_ratio[rolling_sharpe_ratio['metric'] == 'sharpe_ratio']
+        sharpe_lines = [
+            (
+                f"Rolling Sharpe Ratio ({window}d)",
+                _date_numbers(rows['Date']),
+                rows['value'].to_numpy(dtype=np.float64),
+                None,
+            )
+            for window, rows in sharpe_rows.groupby('window')
+        ]
+    else:
+        sharpe_lines = [
+            (
+                "Rolling Sharpe Ratio",
+                _date_numbers(rolling_sharpe_ratio.index),
+                rolling_sharpe_ratio.to_numpy(dtype=np.float64),
+                'blue',
+            )
+        ]
+
+    return {
+        'dates': _date_numbers(price_data.index),
+        'stocks': stocks,
+        'total_dates': _date_numbers(portfolio_values.index),
+        'total': portfolio_values.to_numpy(dtype=np.float64),
+        'sharpe_lines': sharpe_lines,
+        'text': f"Current Portfolio Value: ${total_portfolio_value:,.2f}    |    Sharpe Ratio: {sharpe_ratio:.2f}",
+    }
+
+
+def _init_worker():
+    """
+    Build the reusable figure: two date axes, the total value line, the zero line and the summary text.
+    Runs once in each render process.
+    """
+    global _template
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
+
+    figure = Figure(figsize=(18, 7))
+    canvas = FigureCanvasAgg(figure)
+    axes = figure.subplots(1, 2)
+    for ax in axes:
+        locator = AutoDateLocator()
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(ConciseDateFormatter(locator))
+        ax.set_xlabel("Date")
+
+    axes[0].set_title("Portfolio Value Over Time")
+    axes[0].set_ylabel("Value (Price * Shares)")
+    (total_line,) = axes[0].plot([], [], label="Total Portfolio Value", linewidth=2.5, color="black", zorder=3)
+    text = axes[0].text(0.5, -0.15, "", ha='center', va='top', transform=axes[0].transAxes, fontsize=12, color="black")
+
+    axes[1].set_title("Rolling Sharpe Ratio Over Time")
+    axes[1].set_ylabel("Sharpe Ratio")
+    zero_line = axes[1].axhline(0, color="red", linestyle="--", label="Zero Line", zorder=3)
+
+    # Fixed margins leave room for the summary text, so the layout isn't recomputed per chart
+    figure.subplots_adjust(left=0.06, right=0.98, top=0.94, bottom=0.17, wspace=0.2)
+    _template = {
+        'figure': figure,
+        'canvas': canvas,
+        'axes': axes,
+        'total_line': total_line,
+        'text': text,
+        'zero_line': zero_line,
+        'stock_lines': [],
+        'sharpe_lines': [],
+    }
+
+
+def _update_lines(ax, lines, series):
+    # Reuse the line objects of earlier charts, adding lines only when this chart has more series
+    while len(lines) < len(series):
+        (line,) = ax.plot([], [])
+        lines.append(line)
+    for position, (line, (label, x, y, color)) in enumerate(zip(lines, series)):
+        line.set_data(x, y)
+        line.set_label(label)
+        line.set_color(color or f"C{position % 10}")
+        line.set_visible(True)
+    for line in lines[len(series) :]:
+        line.set_visible(False)
+        line.set_data([], [])
+
+
+def _rescale(ax, include_zero=False):
+    # Fit the axes to the visible lines only, so hidden lines from earlier charts don't stretch them
+    ax.relim(visible_only=True)
+    ax.autoscale_view()
+    if include_zero:
+        low, high = ax.get_ylim()
+        ax.set_ylim(min(low, 0.0), max(high, 0.0))
+
+
+def _render(payload):
+    """
+    Draw one chart on this process's figure template and return the PNG bytes.
+    """
+    if _template is None:
+        _init_worker()
+    template = _template
+    axes = template['axes']
+
+    _update_lines(
+        axes[0],
+        template['stock_lines'],
+        [(label, payload['dates'], values, None) for label, values in payload['stocks']],
+    )
+    template['total_line'].set_data(payload['total_dates'], payload['total'])
+    template['text'].set_text(payload['text'])
+    _update_lines(axes[1], template['sharpe_lines'], payload['sharpe_lines'])
+
+    _rescale(axes[0])
+    _rescale(axes[1], include_zero=True)
+    # Keep the total line last in the legend, as before
+    handles = [line for line in template['stock_lines'] if line.get_visible()] + [template['total_line']]
+    axes[0].legend(handles=handles)
+    axes[1].legend(handles=[line for line in template['sharpe_lines'] if line.get_visible()] + [template['zero_line']])
+
+    buffer = io.BytesIO()
+    template['figure'].savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+def get_render_pool():
+    """
+    Return the shared pool of render processes, starting it on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import atexit
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn: forking a threaded web server can copy locks held by other threads
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def _template_ready():
+    return _template is not None
+
+
+def warm_render_pool():
+    """
+    Start every render process now so the first charts don't pay for starting matplotlib.
+    """
+    if RENDER_WORKERS > 0:
+        pool = get_render_pool()
+        for future in [pool.submit(_template_ready) for _ in range(RENDER_WORKERS)]:
+            future.result()
+
+
+def render_chart(payload):
+    """
+    Render a payload from build_chart_payload to PNG bytes.
+
+    Charts are drawn by the render process pool, so several can be drawn at once, or in this
+    process (one at a time) when QUEBEC_RENDER_WORKERS is 0 or the pool has broken.
+    """
+    global _pool
+    if RENDER_WORKERS > 0:
+        from concurrent.futures.process import BrokenProcessPool
+
+        try:
+            return get_render_pool().submit(_render, payload).result()
+        except BrokenProcessPool as e:
+            print(f"Render pool failed, rendering in process: {e}")
+            with _pool_lock:
+                _pool = None
+    with _inline_lock:
+        return _render(payload)
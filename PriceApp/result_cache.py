@@ -0,0 +1,92 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from PriceApp.metrics import CACHE_REQUESTS
+
+
+def portfolio_cache_key(portfolio, snapshot_date, **params):
+    """
+    Build a content hash for a validated portfolio and the price snapshot it is calculated against.
+
+    The portfolio is canonicalised (holdings sorted, keys sorted, no whitespace), so the same
+    holdings in a different order or formatting map to the same key.
+
+    Parameters:
+        portfolio (list): A validated list of dictionaries with 'ticker' and 'nShares'.
+        snapshot_date (str): The date of the price snapshot in 'YYYY-MM-DD' format.
+        **params: Any other settings that change the result, e.g. lookback_window.
+
+    Returns:
+        str: The SHA-256 hex digest.
+    """
+    holdings = sorted((stock['ticker'], stock['nShares']) for stock in portfolio)
+    canonical = json.dumps(
+        {'portfolio': holdings, 'snapshot': str(snapshot_date), 'params': params}, sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of calculated metrics and the rendered PNG chart.
+
+    Entries are evicted least recently used first once there are more than max_entries of them
+    or their PNGs take more than max_bytes.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        """
+        Parameters:
+            max_entries (int): Maximum number of entries (default is QUEBEC_RESULT_CACHE_ENTRIES or 256).
+            max_bytes (int): Maximum total PNG size in bytes (default is QUEBEC_RESULT_CACHE_BYTES or 64 MB).
+        """
+        self.max_entries = max_entries or int(os.environ.get('QUEBEC_RESULT_CACHE_ENTRIES', 256))
+        self.max_bytes = max_bytes or int(os.environ.get('QUEBEC_RESULT_CACHE_BYTES', 64 * 1024 * 1024))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Return the cached {'result': dict, 'png': bytes} for key, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache='result', result='miss')
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache='result', result='hit')
+            return entry
+
+    def put(self, key, result, png=None):
+        """
+        Store the metrics and chart for key, evicting least recently used entries to stay within the caps.
+        """
+        png = png or b''
+        with self._lock:
+            if key in self._entries:
+                self.size_bytes -= len(self._entries.pop(key)['png'])
+            self._entries[key] = {'result': dict(result), 'png': png}
+            self.size_bytes += len(png)
+            while self._entries and (len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= len(evicted['png'])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Shared by every calculate_value_sharpe call in the process
+default_result_cache = ResultCache()
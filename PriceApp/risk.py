@@ -0,0 +1,187 @@
+import threading
+from collections import OrderedDict
+from PriceApp.batch import build_share_matrix
+from PriceApp.price_matrix import as_price_frame
+from PriceApp.lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+class RiskEngine:
+    """
+    Portfolio Sharpe Ratios from a cached mean vector and covariance matrix of daily returns.
+
+    The mean vector and covariance of a universe of tickers are computed once per (universe, window)
+    and reused for every portfolio drawn from it, so each Sharpe Ratio is a quadratic form:
+    (w . mu - rf) / sqrt(w' Sigma w), O(tickers^2) instead of O(days x tickers).
+
+    Returns are built like calculate_portfolio_daily_returns (forward-filled prices, days where any
+    ticker of the universe has a return, missing returns count as zero), so a portfolio holding the
+    whole universe gets exactly the fetch_portfolio_sharpe_ratio result. Entries are keyed on the
+    last date of the prices, so new bars get a fresh entry and the stale one for the same universe
+    and window is dropped.
+    """
+
+    def __init__(self, max_entries=8, risk_free_rate=0.03):
+        """
+        Parameters:
+            max_entries (int): Maximum number of cached (universe, window) moments, least recently used go first.
+            risk_free_rate (float): The annual risk-free rate (default is 3%).
+        """
+        self.max_entries = max_entries
+        self.daily_risk_free_rate = risk_free_rate / 252
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def moments(self, price_data, window=None):
+        """
+        Return the cached moments of the daily returns of every ticker in price_data.
+
+        Parameters:
+            price_data (DataFrame): Price data for the universe of tickers.
+            window (int): Number of most recent daily returns to use (default is the whole history).
+
+        Returns:
+            dict: 'tickers' (Index), 'mean' (vector), 'covariance' (matrix), 'last_prices' (vector)
+                  and 'days' (number of return days used).
+        """
+        price_data = as_price_frame(price_data)
+        universe = tuple(price_data.columns)
+        last_date = price_data.index[-1] if len(price_data.index) else None
+        key = (universe, window)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['last_date'] == last_date and entry['rows'] == len(price_data.index):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        entry = self._compute(price_data, window)
+        entry['last_date'] = last_date
+        entry['rows'] = len(price_data.index)
+        with self._lock:
+            # Replaces the stale entry of this universe and window, if any
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _compute(self, price_data, window):
+        prices = price_data.to_numpy(dtype=np.float64)
+        if window is not None:
+            prices = prices[-(window + 1) :]
+
+        # Daily returns of every ticker as one (days x tickers) matrix
+        filled = pd.DataFrame(prices).ffill().to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            daily_returns = filled[1:] / filled[:-1] - 1
+        valid_days = ~np.isnan(daily_returns).all(axis=1)
+        daily_returns = np.nan_to_num(daily_returns[valid_days])
+
+        days = len(daily_returns)
+        mean = daily_returns.mean(axis=0) if days else np.full(prices.shape[1], np.nan)
+        if days > 1:
+            centered = daily_returns - mean
+            covariance = centered.T @ centered / (days - 1)
+        else:
+            covariance = np.full((prices.shape[1], prices.shape[1]), np.nan)
+        last_prices = (
+            price_data.iloc[-1].to_numpy(dtype=np.float64) if len(price_data.index) else np.full(prices.shape[1], np.nan)
+        )
+        return {
+            'tickers': price_data.columns,
+            'mean': mean,
+            'covariance': covariance,
+            'last_prices': last_prices,
+            'days': days,
+        }
+
+    def weights(self, portfolios, moments, total_investment=None):
+        """
+        Build the (portfolios x tickers) weight matrix, weighting each stock by its value at today's price.
+
+        Returns:
+            tuple: (weights matrix, boolean vector of portfolios holding a ticker outside the universe)
+        """
+        shares, tickers = build_share_matrix(portfolios)
+        columns = moments['tickers'].get_indexer(tickers)
+        missing = columns < 0
+        for ticker in np.array(tickers, dtype=object)[missing]:
+            print(f"No price data available for {ticker}")
+        invalid = (shares[:, missing] > 0).any(axis=1)
+
+        values = np.zeros((len(portfolios), len(moments['tickers'])))
+        values[:, columns[~missing]] = np.nan_to_num(shares[:, ~missing] * moments['last_prices'][columns[~missing]])
+        if total_investment is None:
+            total_investment = values.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = np.nan_to_num(values / np.asarray(total_investment, dtype=np.float64).reshape(-1, 1))
+        return weights, invalid
+
+    def sharpe_ratios(self, portfolios, price_data, window=None, total_investment=None):
+        """
+        Calculate the Sharpe Ratio of many portfolios drawn from the tickers of price_data.
+
+        Parameters:
+            portfolios (list or dict): Portfolios, each a list of dictionaries with 'ticker' and 'nShares'.
+                With a dict the keys are used as portfolio labels.
+            price_data (DataFrame): Price data for the universe of tickers.
+            window (int): Number of most recent daily returns to use (default is the whole history).
+            total_investment (float or list): Value each portfolio's weights are taken against
+                (default is each portfolio's value at today's price).
+
+        Returns:
+            Series: One Sharpe Ratio per portfolio, NaN for portfolios holding a ticker outside price_data.
+        """
+        if isinstance(portfolios, dict):
+            labels = list(portfolios)
+            portfolios = list(portfolios.values())
+        else:
+            labels = list(range(len(portfolios)))
+
+        moments = self.moments(price_data, window)
+        weights, invalid = self.weights(portfolios, moments, total_investment)
+
+        # w . mu and w' Sigma w for every portfolio at once
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = weights @ moments['mean']
+            stddev = np.sqrt(((weights @ moments['covariance']) * weights).sum(axis=1))
+            sharpe_ratio = (mean - self.daily_risk_free_rate) / stddev
+        sharpe_ratio[invalid] = np.nan
+        return pd.Series(sharpe_ratio, index=labels, name='sharpe_ratio')
+
+    def sharpe_ratio(self, portfolio, price_data, total_investment=None, window=None):
+        """
+        Calculate the Sharpe Ratio of one portfolio from the cached moments.
+
+        Parameters:
+            portfolio (list): A list of dictionaries with 'ticker' and 'nShares'.
+            price_data (DataFrame): Price data for the universe of tickers.
+            total_investment (float): The total value of the portfolio (default is its value at today's price).
+            window (int): Number of most recent daily returns to use (default is the whole history).
+
+        Returns:
+            float: The Sharpe Ratio, or None if the portfolio holds a ticker outside price_data.
+        """
+        totals = None if total_investment is None else [total_investment]
+        sharpe_ratio = self.sharpe_ratios([portfolio], price_data, window, totals).iloc[0]
+        return None if np.isnan(sharpe_ratio) else float(sharpe_ratio)
+
+    def invalidate(self):
+        """
+        Drop every cached entry, e.g. after prices were corrected in place.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Shared by every caller in the process
+default_risk_engine = RiskEngine()
@@ -0,0 +1,144 @@
+import math
+from collections import deque
+from PriceApp.price_matrix import as_price_frame
+from PriceApp.lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+class RollingSharpeAccumulator:
+    """
+    Incremental rolling Sharpe Ratio for one portfolio.
+
+    Seeded from existing price data, then fed one bar at a time with update(). The windowed mean
+    and variance of the daily returns are kept with Welford's update, so each new bar costs O(1)
+    for the statistics (plus one dot product to value the portfolio) instead of rescanning history.
+    The result for a bar equals the last value of calculate_rolling_sharpe_ratio over the same prices.
+    """
+
+    def __init__(self, price_data, portfolio, lookback_window=252, risk_free_rate=0.03):
+        """
+        Parameters:
+            price_data (DataFrame): Historical price data for each stock in the portfolio.
+            portfolio (list): A list of dictionaries with 'ticker' and 'nShares'.
+            lookback_window (int): The lookback window in trading days (default is 252 days, i.e., 1 year).
+            risk_free_rate (float): The annual risk-free rate (default is 3%).
+        """
+        self.lookback_window = lookback_window
+        self.daily_risk_free_rate = risk_free_rate / 252
+
+        price_data = as_price_frame(price_data)
+        self.shares = {}
+        for stock in portfolio:
+            if stock['ticker'] in price_data.columns:
+                self.shares[stock['ticker']] = self.shares.get(stock['ticker'], 0) + stock['nShares']
+        self.tickers = list(self.shares)
+        self.share_vector = np.array([self.shares[ticker] for ticker in self.tickers], dtype=np.float64)
+
+        self.window = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.replacements = 0
+        self.last_value = None
+
+        # Seed the window with the returns of the existing history
+        values = price_data[self.tickers].to_numpy(dtype=np.float64) @ self.share_vector
+        for value in values:
+            self._add_value(value)
+
+    def _add_value(self, value):
+        if not np.isfinite(value):
+            # Skip bars with a missing price, the next return is taken against the last valid value
+            return
+        if self.last_value is not None:
+            self._add_return(value / self.last_value - 1)
+        self.last_value = value
+
+    def _add_return(self, daily_return):
+        self.window.append(daily_return)
+        if len(self.window) > self.lookback_window:
+            # Window is full: replace the oldest return in one step
+            oldest = self.window.popleft()
+            n = len(self.window)
+            old_mean = self.mean
+            self.mean += (daily_return - oldest) / n
+            self.m2 += (daily_return - oldest) * (daily_return - self.mean + oldest - old_mean)
+
+            # Recompute exactly once per window length so rounding errors cannot build up (amortized O(1))
+            self.replacements += 1
+            if self.replacements >= self.lookback_window:
+                self.replacements = 0
+                returns = np.fromiter(self.window, dtype=np.float64)
+                self.mean = float(returns.mean())
+                self.m2 = float(((returns - self.mean) ** 2).sum())
+        else:
+            n = len(self.window)
+            delta = daily_return - self.mean
+            self.mean += delta / n
+            self.m2 += delta * (daily_return - self.mean)
+        # Rounding can push a tiny variance below zero
+        self.m2 = max(self.m2, 0.0)
+
+    def update(self, prices):
+        """
+        Add one bar and return the latest rolling Sharpe Ratio.
+
+        Parameters:
+            prices (dict or Series): The new price of every ticker in the portfolio.
+
+        Returns:
+            float: The rolling Sharpe Ratio after the bar, NaN until the window is full.
+        """
+        try:
+            bar = np.array([prices[ticker] for ticker in self.tickers], dtype=np.float64)
+        except KeyError as e:
+            print(f"Missing price for {e} in new bar")
+            bar = np.full(len(self.tickers), np.nan)
+        self._add_value(float(bar @ self.share_vector))
+        return self.sharpe_ratio
+
+    @property
+    def sharpe_ratio(self):
+        """
+        float: The rolling Sharpe Ratio over the last lookback_window returns, NaN until the window is full.
+        """
+        if len(self.window) < self.lookback_window or self.lookback_window < 2:
+            return math.nan
+        stddev = math.sqrt(self.m2 / (self.lookback_window - 1))
+        if stddev == 0:
+            return math.nan
+        return (self.mean - self.daily_risk_free_rate) / stddev
+
+
+def track_rolling_sharpe(price_data, portfolios, lookback_window=252, risk_free_rate=0.03):
+    """
+    Create one RollingSharpeAccumulator per portfolio.
+
+    Parameters:
+        price_data (DataFrame): Historical price data for all tickers held.
+        portfolios (dict): Portfolio label -> list of dictionaries with 'ticker' and 'nShares'.
+        lookback_window (int): The lookback window in trading days (default is 252).
+        risk_free_rate (float): The annual risk-free rate (default is 3%).
+
+    Returns:
+        dict: Portfolio label -> RollingSharpeAccumulator.
+    """
+    return {
+        name: RollingSharpeAccumulator(price_data, portfolio, lookback_window, risk_free_rate)
+        for name, portfolio in portfolios.items()
+    }
+
+
+def update_all(accumulators, prices):
+    """
+    Feed one bar to every accumulator.
+
+    Parameters:
+        accumulators (dict): Portfolio label -> RollingSharpeAccumulator.
+        prices (dict or Series): The new price of every ticker.
+
+    Returns:
+        Series: The latest rolling Sharpe Ratio of every portfolio.
+    """
+    return pd.Series({name: accumulator.update(prices) for name, accumulator in accumulators.items()}, dtype=np.float64)
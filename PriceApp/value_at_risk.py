@@ -0,0 +1,149 @@
+from PriceApp.parallel import run_chunks
+from PriceApp.price import calculate_portfolio_daily_returns
+from PriceApp.price_matrix import as_price_frame
+from PriceApp.risk import default_risk_engine
+from PriceApp.lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Largest number of simulated prices a chunk holds at once
+_CHUNK_CELLS = 2_000_000
+
+
+def _portfolio_value(portfolio, price_data):
+    # Value at the last price of every holding
+    last_prices = price_data.iloc[-1]
+    return float(sum(stock['nShares'] * last_prices[stock['ticker']] for stock in portfolio))
+
+
+def _risk_table(returns, confidence, total_investment):
+    """
+    VaR and CVaR of a sample of portfolio returns, as positive losses in currency.
+    """
+    confidences = np.atleast_1d(np.asarray(confidence, dtype=np.float64))
+    rows = []
+    for level in confidences:
+        cutoff = np.quantile(returns, 1 - level)
+        tail = returns[returns <= cutoff]
+        rows.append({'var': -cutoff * total_investment, 'cvar': -tail.mean() * total_investment})
+    return pd.DataFrame(rows, index=pd.Index(confidences, name='confidence'))
+
+
+def calculate_historical_var(portfolio, price_data, total_investment=None, confidence=0.95, horizon=1):
+    """
+    Calculate historical Value-at-Risk and Conditional VaR (expected shortfall) of a portfolio.
+
+    Uses the daily portfolio returns of calculate_portfolio_daily_returns, compounded over
+    overlapping windows of horizon days for longer horizons.
+
+    Parameters:
+        portfolio (list): A list of dictionaries with 'ticker' and 'nShares'.
+        price_data (DataFrame): Price data for a list of tickers.
+        total_investment (float): The total value of the portfolio (default is its value at the last price).
+        confidence (float or list): Confidence level(s), e.g. 0.95 or [0.95, 0.99] (default is 0.95).
+        horizon (int): Holding period in trading days (default is 1).
+
+    Returns:
+        DataFrame: 'var' and 'cvar' as positive losses in currency, one row per confidence level,
+                   or None if a ticker has no price data or there are fewer returns than the horizon.
+    """
+    price_data = as_price_frame(price_data)
+    missing = [stock['ticker'] for stock in portfolio if stock['ticker'] not in price_data.columns]
+    if missing:
+        print(f"No price data available for {', '.join(missing)}")
+        return None
+    if total_investment is None:
+        total_investment = _portfolio_value(portfolio, price_data)
+    daily_returns = calculate_portfolio_daily_returns(portfolio, price_data, total_investment).to_numpy()
+    if len(daily_returns) < horizon:
+        print(f"Not enough price data for a {horizon} day horizon")
+        return None
+
+    # Compound the daily returns over every window of horizon days
+    growth = np.concatenate(([0.0], np.cumsum(np.log1p(daily_returns))))
+    returns = np.expm1(growth[horizon:] - growth[:-horizon])
+    return _risk_table(returns, confidence, total_investment)
+
+
+def _simulate_chunk(shared, size, rng):
+    """
+    Simulate size correlated price paths and return the portfolio return of each one.
+    """
+    mean, cholesky, weights, horizon = shared
+    growth = np.ones((size, len(mean)))
+    for _ in range(horizon):
+        growth *= 1 + mean + rng.standard_normal((size, len(mean))) @ cholesky.T
+    # Shares are held through the horizon, so each ticker compounds on its own
+    return growth @ weights - 1
+
+
+def _cholesky(covariance):
+    # Covariances estimated from short or collinear histories can be singular, nudge the diagonal until it factors
+    jitter = 0.0
+    scale = np.mean(np.diag(covariance)) if len(covariance) else 1.0
+    for _ in range(10):
+        try:
+            return np.linalg.cholesky(covariance + jitter * np.eye(len(covariance)))
+        except np.linalg.LinAlgError:
+            jitter = max(jitter * 10, scale * 1e-10)
+    raise np.linalg.LinAlgError("Covariance matrix is not positive definite")
+
+
+def calculate_monte_carlo_var(
+    portfolio,
+    price_data,
+    total_investment=None,
+    confidence=0.95,
+    horizon=1,
+    n_paths=1_000_000,
+    seed=0,
+    n_workers=None,
+    window=None,
+    engine=default_risk_engine,
+):
+    """
+    Calculate Value-at-Risk and Conditional VaR from simulated correlated price paths.
+
+    Daily returns of the held tickers are drawn from a normal distribution with the mean vector and
+    covariance of their historical daily returns (from the risk engine), correlated through the
+    Cholesky factor of the covariance. Paths are simulated in seeded chunks spread across a process
+    pool, so the same seed gives the same result for any number of workers.
+
+    Parameters:
+        portfolio (list): A list of dictionaries with 'ticker' and 'nShares'.
+        price_data (DataFrame): Price data for a list of tickers.
+        total_investment (float): The total value of the portfolio (default is its value at the last price).
+        confidence (float or list): Confidence level(s), e.g. 0.95 or [0.95, 0.99] (default is 0.95).
+        horizon (int): Holding period in trading days (default is 1).
+        n_paths (int): Number of simulated paths (default is 1,000,000).
+        seed (int): Seed for the simulation.
+        n_workers (int): Number of processes (default is QUEBEC_CPU_WORKERS or the CPU count, 1 runs inline).
+        window (int): Number of most recent daily returns to estimate from (default is the whole history).
+        engine (RiskEngine): Where the return moments are cached.
+
+    Returns:
+        DataFrame: 'var' and 'cvar' as positive losses in currency, one row per confidence level,
+                   or None if a ticker has no price data.
+    """
+    price_data = as_price_frame(price_data)
+    tickers = list(dict.fromkeys(stock['ticker'] for stock in portfolio))
+    missing = [ticker for ticker in tickers if ticker not in price_data.columns]
+    if missing:
+        print(f"No price data available for {', '.join(missing)}")
+        return None
+    if total_investment is None:
+        total_investment = _portfolio_value(portfolio, price_data)
+
+    moments = engine.moments(price_data[tickers], window)
+    weights, _ = engine.weights([portfolio], moments, [total_investment])
+    chunk_size = max(1, _CHUNK_CELLS // len(tickers))
+    chunks = run_chunks(
+        _simulate_chunk,
+        n_paths,
+        chunk_size=chunk_size,
+        seed=seed,
+        n_workers=n_workers,
+        shared=(moments['mean'], _cholesky(moments['covariance']), weights[0], horizon),
+    )
+    return _risk_table(np.concatenate(chunks), confidence, total_investment)
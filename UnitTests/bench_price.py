@@ -0,0 +1,258 @@
+"""
+Benchmark suite for the PriceApp calculations.
+
+Times fetch_portfolio_sharpe_ratio, calculate_total_portfolio_value, calculate_portfolio_value_over_time,
+calculate_rolling_sharpe_ratio and chart rendering over a grid of portfolio sizes and history lengths,
+records the peak memory of each call and saves the results as JSON so runs from different commits
+can be compared.
+
+Synthetic prices are built the same way as the fuzz tests (generate_realistic_returns in test_fuzz.py).
+
+Usage (from the project root):
+
+    python UnitTests/bench_price.py                                  # default grid
+    python UnitTests/bench_price.py --holdings 10 100 --years 1 5    # custom grid
+    python UnitTests/bench_price.py --output new.json --compare old.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import tracemalloc
+import subprocess  # nosec B404
+
+# adding the project root directory to sys.path so python can find PriceApp and JSON_Validation
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Render charts in this process so tracemalloc sees their memory (render workers are separate processes)
+os.environ.setdefault('QUEBEC_RENDER_WORKERS', '0')
+
+import numpy as np
+import pandas as pd
+from test_fuzz import generate_realistic_returns
+from PriceApp.price import (
+    fetch_portfolio_sharpe_ratio,
+    calculate_total_portfolio_value,
+    calculate_portfolio_value_over_time,
+    calculate_rolling_sharpe_ratio,
+    display_combined_visualizations,
+)
+from PriceApp.rendering import RENDER_WORKERS
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def generate_price_frame(n_holdings, n_years, seed=0):
+    """
+    Generate a (days x holdings) price frame and a matching portfolio.
+
+    Parameters:
+        n_holdings (int): Number of tickers.
+        n_years (int): Years of business-day history.
+        seed (int): Seed for the random returns.
+
+    Returns:
+        tuple: (portfolio list, price DataFrame)
+    """
+    np.random.seed(seed)
+    n_days = n_years * TRADING_DAYS_PER_YEAR
+    dates = pd.bdate_range(end='2024-11-04', periods=n_days)
+    tickers = [f"T{i:05d}" for i in range(n_holdings)]
+
+    returns = generate_realistic_returns(n_days * n_holdings).reshape(n_days, n_holdings)
+    base_prices = np.random.uniform(100.0, 1000.0, n_holdings)
+    prices = base_prices * np.cumprod(1 + returns, axis=0)
+
+    portfolio = [
+        {"ticker": ticker, "nShares": int(shares)}
+        for ticker, shares in zip(tickers, np.random.randint(1, 100, n_holdings))
+    ]
+    return portfolio, pd.DataFrame(prices, index=dates, columns=tickers)
+
+
+def benchmark_cases(portfolio, price_data):
+    """
+    The calls to time, as name -> zero-argument function.
+    """
+    date = price_data.index[-1].strftime('%Y-%m-%d')
+    total_value = calculate_total_portfolio_value(portfolio, price_data, date)
+    portfolio_values = calculate_portfolio_value_over_time(price_data, portfolio)
+    rolling_sharpe_ratio = calculate_rolling_sharpe_ratio(price_data, portfolio)
+    sharpe_ratio = fetch_portfolio_sharpe_ratio(portfolio, price_data, total_value)
+
+    return {
+        'fetch_portfolio_sharpe_ratio': lambda: fetch_portfolio_sharpe_ratio(portfolio, price_data, total_value),
+        'calculate_total_portfolio_value': lambda: calculate_total_portfolio_value(portfolio, price_data, date),
+        'calculate_portfolio_value_over_time': lambda: calculate_portfolio_value_over_time(price_data, portfolio),
+        'calculate_rolling_sharpe_ratio': lambda: calculate_rolling_sharpe_ratio(price_data, portfolio),
+        'display_combined_visualizations': lambda: display_combined_visualizations(
+            price_data, portfolio_values, portfolio, total_value, sharpe_ratio, rolling_sharpe_ratio, counter=0
+        ),
+    }
+
+
+def time_call(function, repeat):
+    """
+    Run function repeat times and return (best seconds, median seconds, peak traced MB).
+    The peak memory is measured on a separate run so tracing doesn't slow down the timings.
+    """
+    # Warm-up run so lazy imports and first-use caches don't count
+    function()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), statistics.median(timings), peak / 1024**2
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=PROJECT_ROOT,  # nosec B603 B607
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(holdings, years, repeat=3, functions=None, max_cells=20_000_000, render_max_holdings=1000):
+    """
+    Time every function over the holdings x years grid.
+
+    Combinations with more than max_cells prices are skipped, and charts are only rendered
+    for portfolios up to render_max_holdings tickers (one line is drawn per ticker).
+
+    Returns:
+        list: One dict per (function, holdings, years) with the timings and peak memory.
+    """
+    results = []
+    for n_holdings in holdings:
+        for n_years in years:
+            n_days = n_years * TRADING_DAYS_PER_YEAR
+            if n_days * n_holdings > max_cells:
+                print(f"Skipping {n_holdings} holdings x {n_years}y: more than {max_cells} prices")
+                continue
+            portfolio, price_data = generate_price_frame(n_holdings, n_years)
+            for name, function in benchmark_cases(portfolio, price_data).items():
+                if functions and name not in functions:
+                    continue
+                if name == 'display_combined_visualizations' and n_holdings > render_max_holdings:
+                    continue
+                best, median, peak_mb = time_call(function, repeat)
+                results.append(
+                    {
+                        'function': name,
+                        'holdings': n_holdings,
+                        'years': n_years,
+                        'days': n_days,
+                        'best_s': best,
+                        'median_s': median,
+                        'peak_mb': peak_mb,
+                    }
+                )
+                print(
+                    f"{name:<38} {n_holdings:>6} holdings {n_years:>3}y  "
+                    f"best {best * 1000:10.2f} ms  median {median * 1000:10.2f} ms  peak {peak_mb:9.1f} MB"
+                )
+    return results
+
+
+def compare_results(results, baseline, threshold=0.2):
+    """
+    Print the change against a previous results file and return the entries slower by more than threshold.
+    """
+    previous = {(entry['function'], entry['holdings'], entry['years']): entry for entry in baseline['results']}
+    regressions = []
+    print(f"\nCompared with {baseline.get('commit')}:")
+    for entry in results:
+        old = previous.get((entry['function'], entry['holdings'], entry['years']))
+        if old is None:
+            continue
+        ratio = entry['best_s'] / old['best_s'] if old['best_s'] else float('inf')
+        flag = '  REGRESSION' if ratio > 1 + threshold else ''
+        print(
+            f"{entry['function']:<38} {entry['holdings']:>6} holdings {entry['years']:>3}y  "
+            f"{ratio:6.2f}x time  {entry['peak_mb'] - old['peak_mb']:+9.1f} MB{flag}"
+        )
+        if flag:
+            regressions.append(entry)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--holdings', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 5, 10, 30])
+    parser.add_argument('--functions', nargs='+', help="only benchmark these functions")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-cells', type=int, default=20_000_000, help="skip grids with more prices than this")
+    parser.add_argument('--render-max-holdings', type=int, default=1000)
+    parser.add_argument('--output', default='bench_results.json', help="where to save the JSON results")
+    parser.add_argument('--compare', help="previous results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="slowdown that counts as a regression")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    if RENDER_WORKERS:
+        print(
+            f"Charts are rendered by {RENDER_WORKERS} worker processes, "
+            "display_combined_visualizations peak memory leaves out rendering"
+        )
+    else:
+        print("Charts are rendered in this process (QUEBEC_RENDER_WORKERS=0), peak memory includes rendering")
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    # Charts are written to graphs/ relative to the working directory, keep them out of the repo
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, 'graphs'))
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            results = run_benchmarks(
+                args.holdings, args.years, args.repeat, args.functions, args.max_cells, args.render_max_holdings
+            )
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'render_workers': RENDER_WORKERS,
+        'results': results,
+    }
+    with open(output, 'w') as results_file:
+        json.dump(report, results_file, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if baseline_path:
+        with open(baseline_path) as baseline_file:
+            regressions = compare_results(results, json.load(baseline_file), args.threshold)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
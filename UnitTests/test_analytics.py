@@ -0,0 +1,60 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from PriceApp.analytics import calculate_rolling_analytics, select_rolling_metric
+from PriceApp.price import (
+    calculate_rolling_sharpe_ratio,
+    calculate_portfolio_value_over_time,
+    display_combined_visualizations,
+)
+
+
+@pytest.fixture
+def price_data():
+    return pd.read_json('test_data.json')
+
+
+@pytest.fixture
+def portfolio():
+    return [{"ticker": "AAPL", "nShares": 10}, {"ticker": "TSLA", "nShares": 4}, {"ticker": "NVDA", "nShares": 25}]
+
+
+def test_rolling_analytics_match_pandas_rolling(price_data, portfolio):
+    """
+    Every metric from the prefix sums equals the same metric computed with pandas rolling.
+    """
+    analytics = calculate_rolling_analytics(price_data, portfolio, windows=(20, 60), benchmark='MSFT')
+
+    values = calculate_portfolio_value_over_time(price_data, portfolio)
+    returns = values.pct_change().dropna()
+    benchmark_returns = price_data['MSFT'].pct_change().reindex(returns.index)
+    excess = returns - 0.03 / 252
+    for window in (20, 60):
+        expected = {
+            'sharpe_ratio': calculate_rolling_sharpe_ratio(price_data, portfolio, lookback_window=window),
+            'volatility': returns.rolling(window).std() * np.sqrt(252),
+            'sortino_ratio': excess.rolling(window).mean() / np.sqrt((excess.clip(upper=0) ** 2).rolling(window).mean()),
+            'max_drawdown': values.rolling(window + 1)
+            .apply(lambda v: (v / np.maximum.accumulate(v) - 1).min(), raw=True)
+            .iloc[1:],
+            'beta': returns.rolling(window).cov(benchmark_returns) / benchmark_returns.rolling(window).var(),
+        }
+        for metric, series in expected.items():
+            result = select_rolling_metric(analytics, metric, window)
+            np.testing.assert_allclose(result.to_numpy(), series.dropna().to_numpy(), rtol=1e-7, atol=1e-12)
+
+
+def test_rolling_analytics_plot(price_data, portfolio, tmp_path):
+    analytics = calculate_rolling_analytics(price_data, portfolio, windows=(20, 60), metrics=['sharpe_ratio'])
+    assert set(analytics.columns) == {'Date', 'metric', 'window', 'value'}  # nosec
+
+    values = calculate_portfolio_value_over_time(price_data, portfolio)
+    cwd = os.getcwd()
+    os.makedirs(tmp_path / 'graphs')
+    os.chdir(tmp_path)
+    try:
+        png = display_combined_visualizations(price_data, values, portfolio, values.iloc[-1], 1.0, analytics, counter=0)
+    finally:
+        os.chdir(cwd)
+    assert png.startswith(b'\x89PNG')  # nosec
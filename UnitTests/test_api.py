@@ -0,0 +1,104 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import app as quebec_app
+import PriceApp.price as price
+from PriceApp.providers import FileProvider, export_price_files, set_default_provider
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    export_price_files(pd.read_json('test_data.json'), str(tmp_path))
+    set_default_provider(FileProvider(str(tmp_path)))
+
+    # The JSON endpoints must never draw a chart
+    def no_pyplot():
+        raise AssertionError("matplotlib used by a JSON endpoint")
+
+    monkeypatch.setattr(price, '_pyplot', no_pyplot)
+    yield quebec_app.app.test_client()
+    set_default_provider(None)
+
+
+def test_api_metrics(client):
+    portfolio = [{"ticker": "AAPL", "nShares": 10}, {"ticker": "MSFT", "nShares": 5}]
+
+    response = client.post('/api/metrics', data=json.dumps(portfolio), content_type='application/json')
+
+    assert response.status_code == 200  # nosec
+    body = response.get_json()
+    assert set(body) == {'total_value', 'sharpe_ratio', 'rolling_sharpe_ratio'}  # nosec
+    assert len(body['rolling_sharpe_ratio']['dates']) == len(body['rolling_sharpe_ratio']['values'])  # nosec
+    invalid = client.post('/api/metrics', data='[{"ticker": "AAPL"}]', content_type='application/json')
+    assert invalid.status_code == 422  # nosec
+
+
+def test_api_metrics_unknown_ticker(client):
+    for portfolio in (
+        [{"ticker": "AAPL", "nShares": 10}, {"ticker": "NOPE", "nShares": 1}],
+        [{"ticker": "NOPE", "nShares": 1}],
+    ):
+        response = client.post('/api/metrics', json=portfolio)
+        assert response.status_code == 422  # nosec
+        bulk = client.post('/api/metrics/bulk', json=[portfolio])
+        assert bulk.status_code == 200  # nosec
+        assert bulk.get_json()['results'] == [{'error': 'Missing price data'}]  # nosec
+
+
+def test_api_metrics_bulk_matches_single(client):
+    portfolios = {
+        'tech': [{"ticker": "AAPL", "nShares": 10}, {"ticker": "MSFT", "nShares": 5}],
+        'cars': [{"ticker": "TSLA", "nShares": 3}],
+        'broken': [{"ticker": "TSLA"}],
+    }
+
+    response = client.post('/api/metrics/bulk', json={'portfolios': portfolios})
+
+    results = response.get_json()['results']
+    for name in ('tech', 'cars'):
+        single = client.post('/api/metrics', json=portfolios[name]).get_json()
+        assert results[name]['total_value'] == pytest.approx(single['total_value'])  # nosec
+        assert results[name]['sharpe_ratio'] == pytest.approx(single['sharpe_ratio'])  # nosec
+        assert results[name]['rolling_sharpe_ratio']['dates'] == single['rolling_sharpe_ratio']['dates']  # nosec
+        assert results[name]['rolling_sharpe_ratio']['values'] == pytest.approx(
+            single['rolling_sharpe_ratio']['values']
+        )  # nosec
+    assert 'error' in results['broken']  # nosec
+    assert client.post('/api/metrics/bulk', json={'portfolios': 'nope'}).status_code == 400  # nosec
+
+
+def test_api_metrics_bulk_matches_single_on_mixed_calendars(tmp_path):
+    """
+    A business-day portfolio scores the same in bulk next to a 7-day portfolio as on its own.
+    """
+    rng = np.random.default_rng(1)
+    days = pd.date_range('2022-01-03', '2024-12-31', freq='D')
+    business = days[days.dayofweek < 5]
+    export_price_files(
+        pd.DataFrame(
+            {
+                'AAPL': pd.Series(150 * np.cumprod(1 + rng.normal(0, 0.01, len(business))), index=business),
+                'BTC': pd.Series(30000 * np.cumprod(1 + rng.normal(0, 0.02, len(days))), index=days),
+            }
+        ),
+        str(tmp_path),
+    )
+    set_default_provider(FileProvider(str(tmp_path), as_of='2024-12-31'))
+    client = quebec_app.app.test_client()
+    portfolios = {
+        'stocks': [{"ticker": "AAPL", "nShares": 10}],
+        'crypto': [{"ticker": "BTC", "nShares": 1}],
+        'both': [{"ticker": "AAPL", "nShares": 10}, {"ticker": "BTC", "nShares": 1}],
+    }
+    try:
+        results = client.post('/api/metrics/bulk', json={'portfolios': portfolios}).get_json()['results']
+        for name, portfolio in portfolios.items():
+            single = client.post('/api/metrics', json=portfolio).get_json()
+            assert results[name]['total_value'] == pytest.approx(single['total_value'])  # nosec
+            assert results[name]['sharpe_ratio'] == pytest.approx(single['sharpe_ratio'])  # nosec
+            assert results[name]['rolling_sharpe_ratio']['dates'] == single['rolling_sharpe_ratio']['dates']  # nosec
+            rolling = single['rolling_sharpe_ratio']['values']
+            assert results[name]['rolling_sharpe_ratio']['values'] == pytest.approx(rolling, nan_ok=True)  # nosec
+    finally:
+        set_default_provider(None)
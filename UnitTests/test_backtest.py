@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+from PriceApp.backtest import backtest_portfolio
+from PriceApp.price import calculate_portfolio_value_over_time
+
+
+@pytest.fixture
+def price_data():
+    return pd.read_json('test_data.json')
+
+
+def daily_loop_backtest(price_data, weights, transaction_cost):
+    """
+    Reference monthly rebalancing, one day at a time.
+    """
+    tickers = list(weights)
+    target = np.array(list(weights.values()))
+    prices = price_data[tickers].to_numpy()
+    value = 10_000.0
+    shares = np.zeros(len(tickers))
+    values = []
+    for day in range(len(prices)):
+        if day == 0 or price_data.index[day].month != price_data.index[day - 1].month:
+            value = prices[day] @ shares if day else value
+            cost = transaction_cost * np.abs(value * target - shares * prices[day]).sum()
+            shares = (value - cost) * target / prices[day]
+        values.append(prices[day] @ shares)
+    return np.array(values)
+
+
+def daily_loop_threshold_backtest(prices, target, threshold, transaction_cost):
+    """
+    Reference threshold rebalancing, checking the drift every day.
+    """
+    shares = (10_000.0 - transaction_cost * 10_000.0) * target / prices[0]
+    values = []
+    for day in range(len(prices)):
+        value = prices[day] @ shares
+        if day and np.abs(prices[day] * shares / value - target).max() > threshold:
+            cost = transaction_cost * np.abs(value * target - shares * prices[day]).sum()
+            shares = (value - cost) * target / prices[day]
+            value = prices[day] @ shares
+        values.append(value)
+    return np.array(values)
+
+
+def test_buy_and_hold_matches_portfolio_value_over_time(price_data):
+    portfolio = [{"ticker": "AAPL", "nShares": 10}, {"ticker": "MSFT", "nShares": 5}]
+
+    result = backtest_portfolio(price_data, portfolio, rebalance=None, transaction_cost=0)
+
+    expected = calculate_portfolio_value_over_time(price_data, portfolio)
+    np.testing.assert_allclose(result['values'].to_numpy(), expected.to_numpy())
+    assert len(result['trades']) == 1  # nosec
+
+
+def test_monthly_rebalance_matches_daily_loop(price_data):
+    weights = {"AAPL": 0.5, "NVDA": 0.3, "TSLA": 0.2}
+
+    result = backtest_portfolio(price_data, weights, rebalance='monthly', transaction_cost=0.002)
+
+    np.testing.assert_allclose(result['values'].to_numpy(), daily_loop_backtest(price_data, weights, 0.002))
+    assert len(result['trades']) == price_data.index.to_period('M').nunique()  # nosec
+    assert result['total_cost'] > 0  # nosec
+
+
+def test_threshold_rebalance_keeps_weights_near_target(price_data):
+    weights = {"NVDA": 0.5, "MSFT": 0.5}
+
+    result = backtest_portfolio(price_data, weights, rebalance='threshold', threshold=0.02, transaction_cost=0)
+
+    held = price_data[list(weights)].to_numpy()
+    values = result['values'].to_numpy()
+    trade_dates = set(result['trades']['Date'])
+    assert len(trade_dates) > 1  # nosec
+    # Between rebalances no weight drifts past the threshold on any day but the rebalance day itself
+    shares = None
+    for day, date in enumerate(price_data.index):
+        if date in trade_dates:
+            shares = values[day] * np.array([0.5, 0.5]) / held[day]
+        assert np.abs(held[day] * shares / values[day] - 0.5).max() <= 0.02 + 1e-12  # nosec
+    assert backtest_portfolio(price_data, weights, rebalance='weekly') is None  # nosec
+
+
+def test_threshold_rebalance_matches_daily_loop():
+    """
+    Drift is checked on every day, including the first day of each block of days checked at once.
+    """
+    rng = np.random.default_rng(7)
+    index = pd.bdate_range('2020-01-01', periods=400)
+    target = np.array([0.4, 0.35, 0.25])
+    for _ in range(40):
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(index), 3)), axis=0))
+        price_data = pd.DataFrame(prices, index=index, columns=['A', 'B', 'C'])
+
+        result = backtest_portfolio(
+            price_data,
+            dict(zip(price_data.columns, target)),
+            rebalance='threshold',
+            threshold=0.04,
+            transaction_cost=0.001,
+        )
+
+        np.testing.assert_allclose(
+            result['values'].to_numpy(), daily_loop_threshold_backtest(prices, target, 0.04, 0.001)
+        )
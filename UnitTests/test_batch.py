@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from PriceApp.batch import build_share_matrix, evaluate_portfolios
+from PriceApp.price import (
+    fetch_portfolio_sharpe_ratio,
+    calculate_total_portfolio_value,
+    calculate_rolling_sharpe_ratio,
+    slice_price_window,
+)
+
+
+@pytest.fixture
+def price_data():
+    return pd.read_json('test_data.json')
+
+
+def test_build_share_matrix():
+    shares, tickers = build_share_matrix(
+        [
+            [{"ticker": "AAPL", "nShares": 10}, {"ticker": "MSFT", "nShares": 5}],
+            [{"ticker": "MSFT", "nShares": 1}, {"ticker": "MSFT", "nShares": 2}],
+        ]
+    )
+    assert tickers == ['AAPL', 'MSFT']  # nosec
+    assert shares.tolist() == [[10, 5], [0, 3]]  # nosec
+
+
+def test_evaluate_portfolios_matches_single_portfolio_functions(price_data):
+    """
+    Test that the batch results equal the per-portfolio functions.
+    """
+    portfolios = {
+        'tech': [{"ticker": "AAPL", "nShares": 10}, {"ticker": "MSFT", "nShares": 20}],
+        'growth': [
+            {"ticker": "NVDA", "nShares": 50},
+            {"ticker": "TSLA", "nShares": 7},
+            {"ticker": "AMZN", "nShares": 3},
+        ],
+        'broken': [{"ticker": "AAPL", "nShares": 10}, {"ticker": "NOPE", "nShares": 1}],
+    }
+
+    results = evaluate_portfolios(portfolios, price_data, Date='2024-11-04', lookback_window=20)
+
+    for name in ('tech', 'growth'):
+        portfolio = portfolios[name]
+        total_value = calculate_total_portfolio_value(portfolio, price_data, '2024-11-04')
+        sharpe_ratio = fetch_portfolio_sharpe_ratio(portfolio, price_data, total_value)
+        rolling = calculate_rolling_sharpe_ratio(price_data, portfolio, lookback_window=20)
+
+        assert abs(results['total_value'][name] - total_value) < 1e-6  # nosec
+        assert abs(results['sharpe_ratio'][name] - sharpe_ratio) < 1e-9  # nosec
+        np.testing.assert_allclose(results['rolling_sharpe_ratio'][name].to_numpy(), rolling.to_numpy())
+
+    assert np.isnan(results['total_value']['broken'])  # nosec
+    assert np.isnan(results['sharpe_ratio']['broken'])  # nosec
+
+
+def test_evaluate_portfolios_on_different_calendars():
+    """
+    Test that a business-day portfolio gets the same results next to a 7-day portfolio as on its own.
+    """
+    rng = np.random.default_rng(0)
+    days = pd.date_range('2022-01-03', '2024-12-31', freq='D')
+    business = days[days.dayofweek < 5]
+    prices = pd.DataFrame(
+        {
+            'AAPL': pd.Series(150 * np.cumprod(1 + rng.normal(0, 0.01, len(business))), index=business),
+            'BTC': pd.Series(30000 * np.cumprod(1 + rng.normal(0, 0.02, len(days))), index=days),
+        }
+    )
+    portfolios = {'stocks': [{"ticker": "AAPL", "nShares": 10}], 'crypto': [{"ticker": "BTC", "nShares": 1}]}
+
+    results = evaluate_portfolios(portfolios, prices, lookback_window=20, period='1y')
+
+    for name, portfolio in portfolios.items():
+        # What a fetch of only this portfolio's tickers returns
+        history = prices[[portfolio[0]['ticker']]].dropna(how='all')
+        price_data = slice_price_window(history, period='1y')
+        total_value = calculate_total_portfolio_value(portfolio, price_data)
+        sharpe_ratio = fetch_portfolio_sharpe_ratio(portfolio, price_data, total_value)
+        rolling = calculate_rolling_sharpe_ratio(history, portfolio, lookback_window=20)
+
+        assert abs(results['total_value'][name] - total_value) < 1e-6  # nosec
+        assert abs(results['sharpe_ratio'][name] - sharpe_ratio) < 1e-9  # nosec
+        bulk_rolling = results['rolling_sharpe_ratio'][name].dropna()
+        assert len(bulk_rolling) == len(rolling.dropna()) > 0  # nosec
+        np.testing.assert_allclose(bulk_rolling.to_numpy(), rolling.dropna().to_numpy())
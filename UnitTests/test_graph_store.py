@@ -0,0 +1,70 @@
+import os
+import io
+import json
+import time
+import pandas as pd
+import app as quebec_app
+from PriceApp.providers import FileProvider, export_price_files, set_default_provider
+from PriceApp.graph_store import GraphStore
+
+
+def test_graph_store_spills_to_capped_disk(tmp_path):
+    """
+    Charts past the memory cap move to disk, and the disk keeps only the most recently used ones.
+    """
+    store = GraphStore(max_memory_bytes=250, directory=str(tmp_path), max_disk_bytes=250)
+    charts = {key: bytes([key]) * 100 for key in range(5)}
+    etags = {key: store.put(key, png) for key, png in charts.items()}
+
+    assert len(store) == 2 and store.memory_bytes == 200  # nosec
+    assert sorted(os.listdir(tmp_path)) == ['1.png', '2.png']  # nosec
+    assert store.get(0) is None  # nosec
+    assert store.get(1) == (charts[1], etags[1])  # nosec
+    assert store.get(4) == (charts[4], etags[4])  # nosec
+    assert store.latest == '4'  # nosec
+
+    # A new store finds the charts left on disk
+    assert GraphStore(directory=str(tmp_path)).get(2) == (charts[2], etags[2])  # nosec
+
+
+def test_graph_routes_serve_from_memory_with_etag(tmp_path, monkeypatch):
+    store = GraphStore(directory=str(tmp_path))
+    monkeypatch.setattr(quebec_app, 'graphs', store)
+    store.put(7, b'\x89PNG fake chart')
+    client = quebec_app.app.test_client()
+
+    response = client.get('/graph')
+    assert response.status_code == 200 and response.data == b'\x89PNG fake chart'  # nosec
+    assert response.headers['ETag']  # nosec
+    revalidated = client.get('/graph', headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304  # nosec
+    assert os.listdir(tmp_path) == []  # nosec
+
+
+def test_upload_never_serves_a_chart_from_an_earlier_run(tmp_path, monkeypatch):
+    """
+    Charts left on disk by an earlier process are not served for a new job.
+    """
+    export_price_files(pd.read_json('test_data.json'), str(tmp_path / 'prices'))
+    set_default_provider(FileProvider(str(tmp_path / 'prices')))
+    (tmp_path / 'graphs').mkdir()
+    (tmp_path / 'graphs' / '1.png').write_bytes(b'\x89PNG earlier run')
+    monkeypatch.setattr(quebec_app, 'graphs', GraphStore(directory=str(tmp_path / 'graphs')))
+    client = quebec_app.app.test_client()
+    try:
+        portfolio = json.dumps([{"ticker": "AAPL", "nShares": 10}]).encode()
+        response = client.post(
+            '/upload', data={'file': (io.BytesIO(portfolio), 'portfolio.json')}, content_type='multipart/form-data'
+        )
+        job_id = response.get_data(as_text=True).split('Job ID: ')[1].split('<')[0]
+        for _ in range(100):
+            job = client.get(f'/jobs/{job_id}').get_json()
+            if job['status'] in ('done', 'failed'):
+                break
+            time.sleep(0.1)
+    finally:
+        set_default_provider(None)
+
+    graph = client.get(f'/jobs/{job_id}/graph')
+    assert job['result']['counter'] != 1  # nosec
+    assert graph.status_code == 200 and graph.data != b'\x89PNG earlier run'  # nosec
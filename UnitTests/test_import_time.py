@@ -0,0 +1,62 @@
+import os
+import sys
+import subprocess  # nosec B404
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CHECK_LOADED = '''
+import sys
+import PriceApp.price
+import JSON_Validation.validator
+heavy = ['matplotlib', 'yfinance', 'jsonschema', 'pandas.core.frame', 'numpy.linalg']
+print(','.join(name for name in heavy if name in sys.modules))
+'''
+
+
+def test_importing_price_loads_no_heavy_dependencies():
+    """
+    Test that importing the modules neither loads matplotlib, yfinance, jsonschema, pandas or numpy
+    nor reads any files (nothing is printed).
+    """
+    result = subprocess.run(
+        [sys.executable, '-c', CHECK_LOADED], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True  # nosec B603
+    )
+    assert result.stdout.strip() == '', f"Loaded at import time: {result.stdout}"  # nosec
+
+
+def test_import_budget():
+    sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+    from import_budget import measure_import
+
+    total, imports = measure_import('PriceApp.price')
+    assert 0 < total < 1000, f"Importing PriceApp.price took {total:.0f} ms"  # nosec
+
+
+CONCURRENT_FIRST_USE = '''
+import threading
+from PriceApp.lazy import lazy_import
+pd = lazy_import('pandas')
+errors = []
+def use():
+    try:
+        pd.DataFrame({'a': [1.0]}).sum()
+    except Exception as e:
+        errors.append(repr(e))
+threads = [threading.Thread(target=use) for _ in range(8)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+print(';'.join(errors))
+'''
+
+
+def test_lazy_module_first_use_from_many_threads():
+    result = subprocess.run(
+        [sys.executable, '-c', CONCURRENT_FIRST_USE],
+        cwd=PROJECT_ROOT,  # nosec B603
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == '', f"First use failed: {result.stdout}"  # nosec
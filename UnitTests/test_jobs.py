@@ -0,0 +1,45 @@
+import threading
+import time
+import pytest
+from PriceApp.jobs import JobQueue, QueueFullError
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.status(job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_job_result_and_failure():
+    queue = JobQueue(max_workers=2, max_pending=4)
+
+    done = wait_for(queue, queue.submit(lambda x: x * 2, 21))
+    assert done['status'] == 'done' and done['result'] == 42  # nosec
+
+    failed = wait_for(queue, queue.submit(lambda: 1 / 0))
+    assert failed['status'] == 'failed' and 'division' in failed['error']  # nosec
+
+    assert queue.status('unknown') is None  # nosec
+    queue.shutdown()
+
+
+def test_queue_rejects_jobs_when_full():
+    queue = JobQueue(max_workers=1, max_pending=2)
+    release = threading.Event()
+
+    first = queue.submit(release.wait)
+    queue.submit(release.wait)
+    with pytest.raises(QueueFullError):
+        queue.submit(release.wait)
+    stats = queue.stats()
+    assert stats['queued'] + stats['running'] == 2 and not stats['accepting']  # nosec
+    assert stats['rejected'] == 1  # nosec
+
+    release.set()
+    wait_for(queue, first)
+    queue.shutdown()
+    assert queue.stats()['accepting']  # nosec
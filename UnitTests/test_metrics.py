@@ -0,0 +1,60 @@
+import json
+import pandas as pd
+import app as quebec_app
+from PriceApp.metrics import Registry
+from PriceApp.providers import FileProvider, export_price_files, set_default_provider
+
+
+def test_prometheus_text_format():
+    registry = Registry()
+    requests = registry.counter('test_requests_total', "Requests.", ('route',))
+    latency = registry.histogram('test_seconds', "Latency.", ('stage',), buckets=(0.1, 1.0))
+    requests.inc(route='/a')
+    requests.inc(2, route='/a')
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, stage='down"load')
+
+    lines = registry.render().splitlines()
+
+    assert '# TYPE test_requests_total counter' in lines  # nosec
+    assert 'test_requests_total{route="/a"} 3' in lines  # nosec
+    assert '# TYPE test_seconds histogram' in lines  # nosec
+    assert 'test_seconds_bucket{stage="down\\"load",le="0.1"} 1' in lines  # nosec
+    assert 'test_seconds_bucket{stage="down\\"load",le="1.0"} 2' in lines  # nosec
+    assert 'test_seconds_bucket{stage="down\\"load",le="+Inf"} 3' in lines  # nosec
+    assert 'test_seconds_count{stage="down\\"load"} 3' in lines  # nosec
+
+
+def test_metrics_endpoint_reports_stages_and_routes(tmp_path):
+    export_price_files(pd.read_json('test_data.json'), str(tmp_path))
+    set_default_provider(FileProvider(str(tmp_path)))
+    try:
+        client = quebec_app.app.test_client()
+        portfolio = [{"ticker": "NVDA", "nShares": 12}, {"ticker": "AMZN", "nShares": 3}]
+        assert client.post('/api/metrics', data=json.dumps(portfolio)).status_code == 200  # nosec
+
+        response = client.get('/metrics')
+    finally:
+        set_default_provider(None)
+
+    text = response.get_data(as_text=True)
+    assert response.mimetype == 'text/plain'  # nosec
+    for stage in ('schema_load', 'validate', 'download', 'sharpe_ratio', 'rolling_sharpe_ratio'):
+        assert f'quebec_stage_seconds_count{{stage="{stage}"}}' in text  # nosec
+    assert 'quebec_http_request_seconds_count{method="POST",route="/api/metrics",status="200"}' in text  # nosec
+    assert 'quebec_price_frame_tickers_count' in text  # nosec
+
+
+def test_failed_requests_are_timed(monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("calculation failed")
+
+    monkeypatch.setattr(quebec_app.price, 'calculate_portfolio_metrics', fail)
+    monkeypatch.setitem(quebec_app.app.config, 'PROPAGATE_EXCEPTIONS', False)
+    labels = {'method': 'POST', 'route': '/api/metrics', 'status': 500}
+    before = quebec_app.REQUEST_SECONDS.count(**labels)
+
+    response = quebec_app.app.test_client().post('/api/metrics', data='[]')
+
+    assert response.status_code == 500  # nosec
+    assert quebec_app.REQUEST_SECONDS.count(**labels) == before + 1  # nosec
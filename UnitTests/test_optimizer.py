@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+from PriceApp.optimizer import optimize_portfolio
+from PriceApp.price import fetch_portfolio_sharpe_ratio
+
+
+@pytest.fixture
+def price_data():
+    return pd.read_json('test_data.json')
+
+
+def test_optimizer_is_deterministic_across_workers(price_data):
+    """
+    The same seed gives the same portfolios whether the chunks run inline or in a process pool.
+    """
+    inline = optimize_portfolio(price_data, n_samples=4000, chunk_size=1000, seed=7, n_workers=1)
+    pooled = optimize_portfolio(price_data, n_samples=4000, chunk_size=1000, seed=7, n_workers=2)
+
+    pd.testing.assert_series_equal(inline['max_sharpe']['weights'], pooled['max_sharpe']['weights'])
+    pd.testing.assert_frame_equal(inline['frontier'], pooled['frontier'])
+
+
+def test_optimizer_uses_the_portfolio_sharpe_ratio(price_data):
+    result = optimize_portfolio(price_data, n_samples=3000, chunk_size=1000, seed=1, n_workers=1, n_frontier=10)
+    best = result['max_sharpe']
+
+    assert best['weights'].sum() == pytest.approx(1.0)  # nosec
+    assert (best['weights'] >= 0).all()  # nosec
+    assert best['sharpe_ratio'] >= result['frontier']['sharpe_ratio'].max() - 1e-12  # nosec
+    assert result['min_variance']['volatility'] <= result['frontier']['volatility'].min() + 1e-12  # nosec
+    assert result['frontier']['mean_return'].is_monotonic_increasing  # nosec
+
+    # The same weights held as shares score the same with fetch_portfolio_sharpe_ratio
+    total_investment = 1_000_000
+    last_prices = price_data.iloc[-1]
+    portfolio = [
+        {"ticker": ticker, "nShares": weight * total_investment / last_prices[ticker]}
+        for ticker, weight in best['weights'].items()
+    ]
+    expected = fetch_portfolio_sharpe_ratio(portfolio, price_data, total_investment)
+    assert best['sharpe_ratio'] == pytest.approx(expected, rel=1e-9)  # nosec
+    assert not np.isnan(expected)  # nosec
@@ -1,14 +1,21 @@
 import pandas as pd
 from datetime import datetime
-from PriceApp.price import fetch_portfolio_sharpe_ratio, load_portfolio, calculate_total_portfolio_value
+from JSON_Validation.validator import load_portfolio
+from PriceApp.price import (
+    fetch_portfolio_sharpe_ratio,
+    calculate_total_portfolio_value,
+    slice_price_window,
+    calculate_portfolio_value_at_dates,
+)
 import pytest
 
+
 @pytest.fixture
 def price_data():
     return pd.read_json('test_data.json')
 
-def test_calculate_total_portfolio_value(price_data):
 
+def test_calculate_total_portfolio_value(price_data):
     """
     Test the calculate_total_portfolio_value function against an expected value.
     """
@@ -17,7 +24,6 @@ def test_calculate_total_portfolio_value(price_data):
     portfolio_file = 'sample_portfolio.json'
     portfolio_data = load_portfolio(portfolio_file)
 
-
     # Expected value of the function
     expected_portfolio_value = float(24231.70)
 
@@ -27,9 +33,10 @@ def test_calculate_total_portfolio_value(price_data):
     # Test the portfolio value function
     calculated_total_portfolio_value = calculate_total_portfolio_value(portfolio_data, price_data, '2024-11-04')
 
-    assert calculated_total_portfolio_value is not None, "Failed to calculate Portfolio Value" #nosec
-    assert abs(calculated_total_portfolio_value - expected_portfolio_value) <= tolerance, \
-        f"Test failed: The calculated Portfolio Value {calculated_total_portfolio_value} is not equal to the expected value {expected_portfolio_value}." #nosec
+    assert calculated_total_portfolio_value is not None, "Failed to calculate Portfolio Value"  # nosec
+    assert (
+        abs(calculated_total_portfolio_value - expected_portfolio_value) <= tolerance
+    ), f"Test failed: The calculated Portfolio Value {calculated_total_portfolio_value} is not equal to the expected value {expected_portfolio_value}."  # nosec
 
 
 def test_fetch_portfolio_sharpe_ratio(price_data):
@@ -45,14 +52,59 @@ def test_fetch_portfolio_sharpe_ratio(price_data):
     # Define the expected Sharpe Ratio and tolerance
     expected_sharpe_ratio = 0.109  # Replace this with your expected value
     tolerance = 0.001  # Adjust the tolerance level if needed
-    
+
     # Test the fetch_portfolio_sharpe_ratio function
     calculated_sharpe_ratio = fetch_portfolio_sharpe_ratio(portfolio_data, price_data, total_investment)
 
     # Use pytest's assert for validation
-    assert calculated_sharpe_ratio is not None, "Failed to calculate Sharpe Ratio." #nosec
-    assert abs(calculated_sharpe_ratio - expected_sharpe_ratio) <= tolerance, \
-        f"Test failed: The calculated Sharpe Ratio {calculated_sharpe_ratio} is not equal to the expected value {expected_sharpe_ratio}." #nosec
+    assert calculated_sharpe_ratio is not None, "Failed to calculate Sharpe Ratio."  # nosec
+    assert (
+        abs(calculated_sharpe_ratio - expected_sharpe_ratio) <= tolerance
+    ), f"Test failed: The calculated Sharpe Ratio {calculated_sharpe_ratio} is not equal to the expected value {expected_sharpe_ratio}."  # nosec
+
+
+def test_slice_price_window(price_data):
+    """
+    Test that slice_price_window keeps the rows within the period before the last date.
+    """
+    window = slice_price_window(price_data, period='1mo')
+
+    assert window.index[-1] == price_data.index[-1]  # nosec
+    assert window.index[0] >= pd.Timestamp('2024-10-04')  # nosec
+    assert len(window) < len(price_data)  # nosec
+    assert len(slice_price_window(price_data, period='max')) == len(price_data)  # nosec
+
+
+def test_fetch_portfolio_sharpe_ratio_skips_unknown_ticker(price_data):
+    """
+    Test that a ticker without prices is reported and left out of the Sharpe Ratio.
+    """
+    portfolio_data = load_portfolio('sample_portfolio.json')
+    total_investment = calculate_total_portfolio_value(portfolio_data, price_data, '2024-11-04')
+
+    expected_sharpe_ratio = fetch_portfolio_sharpe_ratio(portfolio_data, price_data, total_investment)
+    calculated_sharpe_ratio = fetch_portfolio_sharpe_ratio(
+        portfolio_data + [{'ticker': 'NOPE', 'nShares': 10}], price_data, total_investment
+    )
+
+    assert abs(calculated_sharpe_ratio - expected_sharpe_ratio) <= 1e-12  # nosec
+
+
+def test_calculate_portfolio_value_at_dates(price_data):
+    """
+    Test that valuing many dates at once matches calculate_total_portfolio_value date by date.
+    """
+    portfolio_data = load_portfolio('sample_portfolio.json')
+    dates = ['2023-01-01', '2023-11-11', '2024-03-31', '2024-11-04', '2025-01-01']
+
+    values = calculate_portfolio_value_at_dates(portfolio_data, price_data, dates)
+
+    assert pd.isnull(values.iloc[0])  # nosec
+    for date in dates[1:]:
+        expected_value = calculate_total_portfolio_value(portfolio_data, price_data, date)
+        assert abs(values.loc[date] - expected_value) <= 0.01  # nosec
+
+
 '''
 def test_calculate_total_portfolio_value(price_data):
 
@@ -100,4 +152,4 @@ def test_fetch_portfolio_sharpe_ratio(price_data):
     assert calculated_sharpe_ratio is not None, "Failed to calculate Sharpe Ratio."
     assert abs(calculated_sharpe_ratio - expected_sharpe_ratio) <= tolerance, \
         f"Test failed: The calculated Sharpe Ratio {calculated_sharpe_ratio} is not equal to the expected value {expected_sharpe_ratio}."
-'''
\ No newline at end of file
+'''
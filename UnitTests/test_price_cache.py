@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+import PriceApp.price_cache as price_cache
+from PriceApp.price import fetch_price_data
+from PriceApp.price_cache import fetch_cached_price_data, load_cached_prices, period_start
+from PriceApp.providers import PriceProvider
+
+
+def make_download(calls, end):
+    """Fake provider returning a constant price for every business day up to 'end'."""
+
+    def download(tickers, period=None, start=None, interval="1d"):
+        calls.append({'tickers': list(tickers), 'period': period, 'start': start})
+        first = period_start(period, today=end) if start is None else pd.Timestamp(start)
+        dates = pd.bdate_range(first, end)
+        return pd.DataFrame({ticker: range(1, len(dates) + 1) for ticker in tickers}, index=dates, dtype=float)
+
+    return download
+
+
+def test_period_start():
+    assert period_start('1y', today='2024-11-04') == pd.Timestamp('2023-11-04')
+    assert period_start('6mo', today='2024-11-04') == pd.Timestamp('2024-05-04')
+    assert period_start('max') is None
+    with pytest.raises(ValueError):
+        period_start('5x')
+
+
+def test_cache_miss_then_incremental_append(tmp_path, monkeypatch):
+    calls = []
+    end = pd.Timestamp.today().normalize()
+    download = make_download(calls, end)
+
+    first = fetch_cached_price_data(['AAPL', 'MSFT'], download, period='1y', cache_dir=str(tmp_path))
+    assert calls[-1]['period'] == '1y'  # nosec
+    assert list(first.columns) == ['AAPL', 'MSFT']  # nosec
+    cached, covered_from, _ = load_cached_prices('AAPL', cache_dir=str(tmp_path))
+    assert len(cached) == len(first)  # nosec
+
+    # Fresh entries are served straight from disk
+    second = fetch_cached_price_data(['AAPL', 'MSFT'], download, period='1y', cache_dir=str(tmp_path))
+    assert len(calls) == 1  # nosec
+    pd.testing.assert_frame_equal(first, second, check_freq=False, check_index_type=False)
+
+    # Stale entries only ask for bars since the last cached date
+    monkeypatch.setattr(price_cache, 'PRICE_CACHE_TTL', -1)
+    fetch_cached_price_data(['AAPL', 'MSFT'], download, period='1y', cache_dir=str(tmp_path))
+    assert calls[-1]['period'] is None  # nosec
+    assert pd.Timestamp(calls[-1]['start']) == first.index[-1]  # nosec
+
+
+def test_cache_serves_stale_prices_when_provider_fails(tmp_path, monkeypatch):
+    calls = []
+    download = make_download(calls, pd.Timestamp.today().normalize())
+    first = fetch_cached_price_data(['AAPL'], download, period='1y', cache_dir=str(tmp_path))
+
+    def failing_download(tickers, period=None, start=None, interval="1d"):
+        raise ConnectionError("provider timed out")
+
+    monkeypatch.setattr(price_cache, 'PRICE_CACHE_TTL', -1)
+    second = fetch_cached_price_data(['AAPL'], failing_download, period='1y', cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(first, second, check_freq=False, check_index_type=False)
+
+
+class ConstantProvider(PriceProvider):
+    """Cacheable provider returning the same price for every business day of the last year."""
+
+    price = 100.0
+
+    def fetch_close(self, tickers, period=None, start=None, interval="1d"):
+        today = pd.Timestamp.today().normalize()
+        first = period_start(period, today=today) if start is None else pd.Timestamp(start)
+        dates = pd.bdate_range(first, today)
+        return pd.DataFrame({ticker: self.price for ticker in tickers}, index=dates)
+
+
+class OtherConstantProvider(ConstantProvider):
+    price = 999.0
+
+
+def test_providers_do_not_share_cached_prices(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_cache, 'PRICE_CACHE_DIR', str(tmp_path))
+
+    first = fetch_price_data(['AAPL'], period='1y', provider=ConstantProvider())
+    second = fetch_price_data(['AAPL'], period='1y', provider=OtherConstantProvider())
+
+    assert (first['AAPL'] == 100.0).all() and (second['AAPL'] == 999.0).all()  # nosec
+    assert (fetch_price_data(['AAPL'], period='1y', provider=ConstantProvider())['AAPL'] == 100.0).all()  # nosec
+
+
+def test_cache_skips_tickers_that_are_paths(tmp_path):
+    calls = []
+    cache_dir = tmp_path / 'cache'
+    download = make_download(calls, pd.Timestamp.today().normalize())
+
+    data = fetch_cached_price_data(
+        ['AAPL', '../../escape', '/a/b', '..'], download, period='1y', cache_dir=str(cache_dir)
+    )
+
+    assert list(data.columns) == ['AAPL']  # nosec
+    assert calls[0]['tickers'] == ['AAPL']  # nosec
+    assert [path.name for path in tmp_path.iterdir()] == ['cache']  # nosec
@@ -0,0 +1,82 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from PriceApp.price import calculate_total_portfolio_value, fetch_portfolio_sharpe_ratio, calculate_rolling_sharpe_ratio
+from PriceApp.price_matrix import write_price_matrix, open_price_matrix
+from PriceApp.providers import PriceMatrixProvider
+
+
+@pytest.fixture
+def price_data():
+    return pd.read_json('test_data.json')
+
+
+@pytest.fixture
+def portfolio():
+    return [{"ticker": "AAPL", "nShares": 10}, {"ticker": "MSFT", "nShares": 4}, {"ticker": "NVDA", "nShares": 25}]
+
+
+def test_price_matrix_round_trip(price_data, tmp_path):
+    """
+    A written matrix opens as a read-only memmap view with the same dates, tickers and prices.
+    """
+    write_price_matrix(price_data, str(tmp_path / 'prices'))
+    matrix = open_price_matrix(str(tmp_path / 'prices'))
+    frame = matrix.to_frame()
+
+    assert isinstance(matrix.block, np.memmap)  # nosec
+    assert not matrix.block.flags.writeable  # nosec
+    assert np.shares_memory(frame['AAPL'].to_numpy(), matrix.block)  # nosec
+    assert list(frame.columns) == list(price_data.columns)  # nosec
+    assert (frame.index == price_data.index).all()  # nosec
+    assert np.allclose(frame.to_numpy(), price_data.to_numpy(), equal_nan=True)  # nosec
+    assert open_price_matrix(str(tmp_path / 'prices')) is matrix  # nosec
+
+
+def test_rewritten_matrix_is_swapped_in_whole(price_data, tmp_path):
+    """
+    Rewriting a matrix leaves an opened one intact and the next open sees the new prices and shape.
+    """
+    path = str(tmp_path / 'prices')
+    write_price_matrix(price_data, path)
+    old = open_price_matrix(path)
+
+    write_price_matrix(price_data[['AAPL', 'MSFT']] * 2, path)
+    new = open_price_matrix(path)
+
+    assert new is not old and list(new.columns) == ['AAPL', 'MSFT']  # nosec
+    assert np.allclose(new.to_frame()['AAPL'], price_data['AAPL'] * 2, equal_nan=True)  # nosec
+    assert np.allclose(old.to_frame()['AAPL'], price_data['AAPL'], equal_nan=True)  # nosec
+    write_price_matrix(price_data, path)
+    assert len([name for name in os.listdir(path) if name.startswith('v-')]) == 2  # nosec
+
+
+def test_functions_accept_price_matrix(price_data, portfolio, tmp_path):
+    """
+    The price functions give the same results for a matrix as for the DataFrame it was written from.
+    """
+    write_price_matrix(price_data, str(tmp_path / 'prices'), dtype='float32')
+    matrix = open_price_matrix(str(tmp_path / 'prices'))
+
+    total_value = calculate_total_portfolio_value(portfolio, price_data, '2024-10-30')
+    assert calculate_total_portfolio_value(portfolio, matrix, '2024-10-30') == pytest.approx(
+        total_value, rel=1e-6
+    )  # nosec
+    assert fetch_portfolio_sharpe_ratio(portfolio, matrix, total_value) == pytest.approx(  # nosec
+        fetch_portfolio_sharpe_ratio(portfolio, price_data, total_value), rel=1e-4
+    )
+    rolling = calculate_rolling_sharpe_ratio(matrix, portfolio, lookback_window=20)
+    expected = calculate_rolling_sharpe_ratio(price_data, portfolio, lookback_window=20)
+    assert np.allclose(rolling.to_numpy(), expected.to_numpy(), rtol=1e-3, equal_nan=True)  # nosec
+
+
+def test_price_matrix_provider(price_data, tmp_path):
+    write_price_matrix(price_data, str(tmp_path / 'prices'))
+    provider = PriceMatrixProvider(str(tmp_path / 'prices'))
+
+    loaded = provider.fetch_close(['MSFT', 'AAPL', 'MISSING'], period='1mo')
+
+    assert list(loaded.columns) == ['MSFT', 'AAPL']  # nosec
+    assert loaded.index.max() == price_data.index.max()  # nosec
+    assert loaded.index.min() >= price_data.index.max() - pd.DateOffset(months=1)  # nosec
@@ -0,0 +1,35 @@
+import os
+import pandas as pd
+from PriceApp import profiling
+from PriceApp.price import calculate_rolling_sharpe_ratio
+
+
+def test_should_profile_modes(monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_MODE', '0')
+    assert not profiling.should_profile('1')  # nosec
+    monkeypatch.setattr(profiling, 'PROFILE_MODE', 'header')
+    assert profiling.should_profile('1') and not profiling.should_profile(None)  # nosec
+    monkeypatch.setattr(profiling, 'PROFILE_MODE', '1')
+    assert profiling.should_profile(None)  # nosec
+
+
+def test_profile_call_saves_and_rotates(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(profiling, 'MAX_PROFILES', 2)
+    price_data = pd.read_json('test_data.json')
+    portfolio = [{"ticker": "AAPL", "nShares": 10}]
+
+    for _ in range(3):
+        result = profiling.profile_call('rolling', calculate_rolling_sharpe_ratio, price_data, portfolio, 20)
+    assert len(result.dropna()) > 0  # nosec
+
+    profiles = profiling.list_profiles()
+    assert len(profiles) == 2  # nosec
+    assert len(os.listdir(tmp_path)) == 4  # nosec
+    summary = profiling.load_profile(profiles[0]['name'])
+    assert any('calculate_rolling_sharpe_ratio' in entry['function'] for entry in summary['top_functions'])  # nosec
+    assert summary['top_allocations']  # nosec
+    assert profiling.load_profile('../secrets') is None  # nosec
+
+    assert profiling.main(['show', profiles[0]['name'], '--limit', '5']) == 0  # nosec
+    assert 'Top allocation sites' in capsys.readouterr().out  # nosec
@@ -0,0 +1,93 @@
+import time
+import threading
+import pandas as pd
+import pytest
+from PriceApp.price import fetch_price_data
+from PriceApp.providers import PriceProvider, FileProvider, CoalescingProvider, export_price_files
+
+
+@pytest.fixture
+def price_data():
+    return pd.read_json('test_data.json')
+
+
+def test_file_provider_round_trip(price_data, tmp_path):
+    """
+    Prices exported to a directory come back as the same wide Ticker x Date frame.
+    """
+    export_price_files(price_data, str(tmp_path))
+    provider = FileProvider(str(tmp_path))
+
+    loaded = fetch_price_data(list(price_data.columns), period='max', provider=provider)
+
+    assert list(loaded.columns) == list(price_data.columns)  # nosec
+    assert len(loaded) == len(price_data)  # nosec
+    assert abs(loaded['AAPL'].iloc[-1] - price_data['AAPL'].iloc[-1]) < 1e-6  # nosec
+
+
+def test_file_provider_skips_tickers_that_are_paths(price_data, tmp_path):
+    directory = tmp_path / 'prices'
+    export_price_files(price_data, str(directory))
+    price_data[['AAPL']].to_csv(tmp_path / 'outside.csv')
+    provider = FileProvider(str(directory))
+
+    loaded = fetch_price_data(['AAPL', '../outside', '/tmp', '..'], period='max', provider=provider)
+
+    assert list(loaded.columns) == ['AAPL']  # nosec
+
+
+def test_file_provider_period_is_relative_to_snapshot(price_data, tmp_path):
+    export_price_files(price_data, str(tmp_path))
+    provider = FileProvider(str(tmp_path), as_of='2024-10-31')
+
+    loaded = provider.fetch_close(['AAPL', 'MSFT', 'MISSING'], period='1mo')
+
+    assert list(loaded.columns) == ['AAPL', 'MSFT']  # nosec
+    assert loaded.index.min() >= pd.Timestamp('2024-09-30')  # nosec
+    assert loaded.index.max() == pd.Timestamp('2024-10-31')  # nosec
+
+
+class CountingProvider(PriceProvider):
+    def __init__(self, price_data):
+        self.price_data = price_data
+        self.calls = []
+
+    def fetch_close(self, tickers, period=None, start=None, interval="1d"):
+        self.calls.append(list(tickers))
+        time.sleep(0.05)
+        return self.price_data[[ticker for ticker in tickers if ticker in self.price_data.columns]]
+
+
+def test_coalescing_provider_shares_concurrent_downloads(price_data):
+    """
+    Overlapping requests arriving together are served by one multi-ticker download.
+    """
+    inner = CountingProvider(price_data)
+    provider = CoalescingProvider(inner, window=0.1)
+    requests = [['AAPL', 'MSFT'], ['MSFT', 'NVDA'], ['AAPL', 'NVDA', 'MISSING'], ['TSLA']]
+    results = [None] * len(requests)
+
+    def fetch(position):
+        results[position] = provider.fetch_close(requests[position], period='1y')
+
+    threads = [threading.Thread(target=fetch, args=(position,)) for position in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # The first request downloads at once, the rest join it or share one download after the window
+    assert len(inner.calls) <= 2  # nosec
+    assert sorted(sum(inner.calls, [])) == ['AAPL', 'MISSING', 'MSFT', 'NVDA', 'TSLA']  # nosec
+    for tickers, result in zip(requests, results):
+        known = [ticker for ticker in tickers if ticker in price_data.columns]
+        pd.testing.assert_frame_equal(result, price_data[known], check_names=False, check_freq=False)
+
+
+def test_coalescing_provider_does_not_delay_a_lone_request(price_data):
+    provider = CoalescingProvider(CountingProvider(price_data), window=5)
+
+    start = time.perf_counter()
+    provider.fetch_close(['AAPL'], period='1y')
+
+    assert time.perf_counter() - start < 1  # nosec
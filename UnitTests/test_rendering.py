@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+from PriceApp import rendering
+from PriceApp.price import calculate_portfolio_value_over_time, calculate_rolling_sharpe_ratio
+
+
+@pytest.fixture
+def payloads():
+    price_data = pd.read_json('test_data.json')
+    charts = []
+    for portfolio in (
+        [{"ticker": "AAPL", "nShares": 10}, {"ticker": "TSLA", "nShares": 4}, {"ticker": "NVDA", "nShares": 25}],
+        [{"ticker": "MSFT", "nShares": 3}],
+    ):
+        values = calculate_portfolio_value_over_time(price_data, portfolio)
+        rolling = calculate_rolling_sharpe_ratio(price_data, portfolio, lookback_window=20)
+        charts.append(rendering.build_chart_payload(price_data, values, portfolio, values.iloc[-1], 1.0, rolling))
+    return charts
+
+
+def test_inline_render_reuses_figure(payloads, monkeypatch):
+    """
+    Consecutive charts are drawn on the same figure, with lines of the bigger portfolio hidden for the smaller one.
+    """
+    monkeypatch.setattr(rendering, 'RENDER_WORKERS', 0)
+    first = rendering.render_chart(payloads[0])
+    figure = rendering._template['figure']
+    second = rendering.render_chart(payloads[1])
+
+    assert first.startswith(b'\x89PNG') and second.startswith(b'\x89PNG') and first != second  # nosec
+    assert rendering._template['figure'] is figure  # nosec
+    visible = [line.get_label() for line in rendering._template['stock_lines'] if line.get_visible()]
+    assert visible == ['MSFT Value']  # nosec
+    assert rendering.render_chart(payloads[0]) == first  # nosec
+
+
+def test_pool_render_matches_inline(payloads, monkeypatch):
+    monkeypatch.setattr(rendering, 'RENDER_WORKERS', 1)
+    monkeypatch.setattr(rendering, '_pool', None)
+    try:
+        png = rendering.render_chart(payloads[0])
+    finally:
+        rendering._pool.shutdown()
+    monkeypatch.setattr(rendering, 'RENDER_WORKERS', 0)
+    assert png == rendering.render_chart(payloads[0])  # nosec
@@ -0,0 +1,78 @@
+import pandas as pd
+import PriceApp.price_cache as price_cache
+from PriceApp.price import calculate_portfolio_metrics
+from PriceApp.providers import PriceProvider, FileProvider, export_price_files
+from PriceApp.result_cache import ResultCache, portfolio_cache_key
+
+
+def test_cache_key_ignores_order_but_not_content():
+    portfolio = [{"ticker": "AAPL", "nShares": 10}, {"ticker": "MSFT", "nShares": 5}]
+    reordered = [{"nShares": 5, "ticker": "MSFT"}, {"nShares": 10, "ticker": "AAPL"}]
+
+    key = portfolio_cache_key(portfolio, '2024-11-04')
+    assert key == portfolio_cache_key(reordered, '2024-11-04')  # nosec
+    assert key != portfolio_cache_key(portfolio, '2024-11-05')  # nosec
+    assert key != portfolio_cache_key(portfolio[:1], '2024-11-04')  # nosec
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ResultCache(max_entries=2, max_bytes=10)
+    cache.put('a', {'sharpe_ratio': 1.0}, b'1234')
+    cache.put('b', {'sharpe_ratio': 2.0}, b'1234')
+    assert cache.get('a')['result'] == {'sharpe_ratio': 1.0}  # nosec
+
+    # 'b' is now least recently used and goes first
+    cache.put('c', {'sharpe_ratio': 3.0}, b'1234')
+    assert cache.get('b') is None and len(cache) == 2  # nosec
+
+    # A large chart pushes out everything older to stay under max_bytes
+    cache.put('d', {'sharpe_ratio': 4.0}, b'123456789')
+    assert cache.get('a') is None and cache.get('c') is None  # nosec
+    assert cache.size_bytes == 9 and cache.hits == 1 and cache.misses == 3  # nosec
+
+
+def test_cached_metrics_follow_the_price_source(tmp_path):
+    """
+    Results calculated from one provider's prices are not returned for another provider or as_of date.
+    """
+    export_price_files(pd.read_json('test_data.json'), str(tmp_path))
+    portfolio = [{"ticker": "AAPL", "nShares": 10}]
+    cache = ResultCache()
+
+    latest = calculate_portfolio_metrics(portfolio, FileProvider(str(tmp_path)), cache)
+    earlier = calculate_portfolio_metrics(portfolio, FileProvider(str(tmp_path), as_of='2024-03-01'), cache)
+    uncached = calculate_portfolio_metrics(portfolio, FileProvider(str(tmp_path), as_of='2024-03-01'), None)
+
+    assert earlier['total_value'] == uncached['total_value'] != latest['total_value']  # nosec
+    assert calculate_portfolio_metrics(portfolio, FileProvider(str(tmp_path)), cache) == latest  # nosec
+    assert cache.hits == 1 and len(cache) == 2  # nosec
+
+
+class ScaledProvider(PriceProvider):
+    """Cacheable provider serving the test prices times a factor."""
+
+    factor = 1.0
+
+    def fetch_close(self, tickers, period=None, start=None, interval="1d"):
+        price_data = pd.read_json('test_data.json')
+        return price_data[[ticker for ticker in tickers if ticker in price_data.columns]] * self.factor
+
+
+class TenfoldProvider(ScaledProvider):
+    factor = 10.0
+
+
+def test_cached_metrics_of_cacheable_providers_stay_apart(tmp_path, monkeypatch):
+    """
+    Two providers using the on-disk price cache get their own prices and their own cached results.
+    """
+    monkeypatch.setattr(price_cache, 'PRICE_CACHE_DIR', str(tmp_path))
+    portfolio = [{"ticker": "AAPL", "nShares": 10}]
+    cache = ResultCache()
+
+    scaled = calculate_portfolio_metrics(portfolio, ScaledProvider(), cache)
+    tenfold = calculate_portfolio_metrics(portfolio, TenfoldProvider(), cache)
+
+    assert abs(tenfold['total_value'] - 10 * scaled['total_value']) < 1e-6  # nosec
+    assert calculate_portfolio_metrics(portfolio, TenfoldProvider(), cache) == tenfold  # nosec
+    assert cache.hits == 1 and len(cache) == 2  # nosec
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from PriceApp.price import fetch_portfolio_sharpe_ratio, calculate_total_portfolio_value
+from PriceApp.risk import RiskEngine
+
+
+@pytest.fixture
+def price_data():
+    return pd.read_json('test_data.json')
+
+
+def test_risk_engine_matches_fetch_portfolio_sharpe_ratio(price_data):
+    """
+    The quadratic-form Sharpe Ratio equals the one built from the daily portfolio returns.
+    """
+    engine = RiskEngine()
+    portfolios = {
+        'tech': [{"ticker": "AAPL", "nShares": 10}, {"ticker": "MSFT", "nShares": 20}],
+        'all': [{"ticker": ticker, "nShares": 5} for ticker in price_data.columns],
+        'broken': [{"ticker": "AAPL", "nShares": 10}, {"ticker": "NOPE", "nShares": 1}],
+    }
+
+    results = engine.sharpe_ratios(portfolios, price_data)
+
+    for name in ('tech', 'all'):
+        total_value = calculate_total_portfolio_value(portfolios[name], price_data, '2024-11-04')
+        expected = fetch_portfolio_sharpe_ratio(portfolios[name], price_data, total_value)
+        assert results[name] == pytest.approx(expected, rel=1e-9)  # nosec
+        assert engine.sharpe_ratio(portfolios[name], price_data, total_value) == pytest.approx(
+            expected, rel=1e-9
+        )  # nosec
+    assert np.isnan(results['broken'])  # nosec
+
+
+def test_risk_engine_caches_per_window_and_invalidates_on_new_bars(price_data):
+    engine = RiskEngine(max_entries=2)
+    portfolio = [{"ticker": "NVDA", "nShares": 3}]
+
+    engine.sharpe_ratio(portfolio, price_data.iloc[:-1], window=60)
+    engine.sharpe_ratio(portfolio, price_data.iloc[:-1], window=60)
+    assert (engine.hits, engine.misses) == (1, 1)  # nosec
+
+    # A new bar recomputes the moments and replaces the stale entry
+    updated = engine.sharpe_ratio(portfolio, price_data, window=60)
+    assert (engine.hits, engine.misses, len(engine)) == (1, 2, 1)  # nosec
+    expected = fetch_portfolio_sharpe_ratio(portfolio, price_data.iloc[-61:], 3 * price_data['NVDA'].iloc[-1])
+    assert updated == pytest.approx(expected, rel=1e-9)  # nosec
+
+    engine.sharpe_ratio(portfolio, price_data, window=20)
+    engine.sharpe_ratio(portfolio, price_data)
+    assert len(engine) == 2  # nosec
@@ -9,58 +9,84 @@ from JSON_Validation.validator import load_schema
 
 schema = load_schema('stock-schema.json')
 
-#load the JSON schema file
+# load the JSON schema file
 
-#with open ('stock-schema.json') as stock_schema:
-    #schema = json.load(stock_schema)
+# with open ('stock-schema.json') as stock_schema:
+# schema = json.load(stock_schema)
 
-#function to make sure that Hypotheis generated stocks are valid per schema 
+
+# function to make sure that Hypotheis generated stocks are valid per schema
 def validate_portfolio(portfolio, schema):
     for stock in portfolio:
         validate(instance=stock, schema=schema)
 
-#using @given indicates a test function should receive automatically generated input data
-#if this test fails, we know theres an issue with how we're handling valid input
+
+# using @given indicates a test function should receive automatically generated input data
+# if this test fails, we know theres an issue with how we're handling valid input
 schema = load_schema('stock-schema.json')  # Load the schema file
+
+
 @given(from_schema(schema))
 def test_valid_portfolio(portfolio):
-    #print whats being generated
+    # print whats being generated
     print(portfolio)
     validate(instance=portfolio, schema=schema)
-    
-
-#this is generating and testing invalid input
-#st.lists is a hypothesis strategy used to generate lists
-#st.one_of is a hypothesis strategy that lets you specify multiple strategies
-@given(st.lists(st.one_of(
-    #this is going to generate valid stock entries based on schema
-    ####from_schema(schema),
-    from_schema(load_schema('stock-schema.json')), #new
-    #this is going to generate invalid stock entries that are zero or positive, which is invalid because schema indicates that a stock is an object, not an integer.
-    st.integers(min_value=0),
-    #this is going to generate dictionaries with random keys and integer values that have unexpected properties not allowed per the schema. 
-    st.dictionaries(
-            #this is going to generate the dictionaries' keys
-            keys=st.text(),
-            #this is going to generate the dictionaries' values
-            values=st.integers()
-        )
-    ),
-    #this makes sure the list generated has at least one element
-    min_size=1
-)
+
+
+# this is generating and testing invalid input
+# st.lists is a hypothesis strategy used to generate lists
+# st.one_of is a hypothesis strategy that lets you specify multiple strategies
+@given(
+    st.lists(
+        st.one_of(
+            # this is going to generate valid stock entries based on schema
+            ####from_schema(schema),
+            from_schema(load_schema('stock-schema.json')),  # new
+            # this is going to generate invalid stock entries that are zero or positive, which is invalid because schema indicates that a stock is an object, not an integer.
+            st.integers(min_value=0),
+            # this is going to generate dictionaries with random keys and integer values that have unexpected properties not allowed per the schema.
+            st.dictionaries(
+                # this is going to generate the dictionaries' keys
+                keys=st.text(),
+                # this is going to generate the dictionaries' values
+                values=st.integers(),
+            ),
+        ),
+        # this makes sure the list generated has at least one element
+        min_size=1,
+    )
 )
 
-#this function will validate a portfolio that has both valid and invalid entries and makes sure code can handle both
-#it allows for failures in invalid entries and logs those failures without causing whole test to fail
-#if this test fails, we know there's an issue with how invalid entries are processed.
+# this function will validate a portfolio that has both valid and invalid entries and makes sure code can handle both
+# it allows for failures in invalid entries and logs those failures without causing whole test to fail
+# if this test fails, we know there's an issue with how invalid entries are processed.
 def test_valid_invalid_portfolio(portfolio):
-    #validate valid stocks and iterate over each stock in portfolio
+    # validate valid stocks and iterate over each stock in portfolio
     for stock in portfolio:
-        #checks that the stock is a dictionary, which is an object and then checks that the dictionary has ticker and nShares, which are required per the schema
+        # checks that the stock is a dictionary, which is an object and then checks that the dictionary has ticker and nShares, which are required per the schema
         if isinstance(stock, dict) and 'ticker' in stock and 'nShares' in stock:
             try:
                 validate(instance=stock, schema=schema)
             except ValidationError:
                 print(f"{stock['ticker']} failed validation, moving to next stock.")
-                continue
\ No newline at end of file
+                continue
+
+
+# the compiled fast validator used by validate_portfolio must accept and reject exactly what jsonschema does
+# rows mix schema-valid stocks with near misses (wrong types, short/long tickers, zero or float shares, extra keys)
+from JSON_Validation.validator import get_validator
+from jsonschema import Draft7Validator
+
+near_miss_stock = st.fixed_dictionaries(
+    {
+        'ticker': st.one_of(st.text(max_size=7), st.integers()),
+        'nShares': st.one_of(st.integers(min_value=-2, max_value=5), st.floats(allow_nan=False), st.booleans()),
+    },
+    optional={'extra': st.integers()},
+)
+
+
+@given(st.one_of(st.lists(st.one_of(from_schema(schema['items']), near_miss_stock, st.integers())), st.integers()))
+def test_fast_validator_matches_jsonschema(portfolio):
+    fast_errors = get_validator(schema)(portfolio)
+    assert (len(fast_errors) == 0) == Draft7Validator(schema).is_valid(portfolio)
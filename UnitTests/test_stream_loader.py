@@ -0,0 +1,36 @@
+import io
+import json
+import pytest
+from JSON_Validation.validator import iter_portfolio, stream_validated_portfolio, load_schema, load_portfolio
+
+schema = load_schema('stock-schema.json')
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 65536])
+def test_iter_portfolio_matches_json_load(chunk_size):
+    """
+    Test that the incremental parser yields the same holdings as json.load, whatever the chunk size.
+    """
+    expected = load_portfolio('stock_ex1.json')
+    with open('../stock_ex1.json', 'rb') as stock_file:
+        assert list(iter_portfolio(stock_file, chunk_size=chunk_size)) == expected  # nosec
+
+
+def test_json_lines_and_merged_duplicates():
+    lines = '{"ticker": "AAPL", "nShares": 10}\n\n{"ticker": "MSFT", "nShares": 1}\n{"ticker": "AAPL", "nShares": 5}'
+    portfolio = stream_validated_portfolio(io.BytesIO(lines.encode('utf-8')), schema)
+    assert portfolio == [{'ticker': 'AAPL', 'nShares': 15}, {'ticker': 'MSFT', 'nShares': 1}]  # nosec
+
+
+def test_invalid_and_truncated_portfolios():
+    invalid = json.dumps([{"ticker": "AAPL", "nShares": 10}, {"ticker": "AAPL", "nShares": 0}])
+    assert stream_validated_portfolio(io.StringIO(invalid), schema) is None  # nosec
+
+    truncated = '[{"ticker": "AAPL", "nShares": 10}, {"ticker": "MS'
+    assert stream_validated_portfolio(io.StringIO(truncated), schema) is None  # nosec
+
+    # Multi-byte characters split across chunks are decoded correctly (and rejected by maxLength)
+    unicode_ticker = json.dumps([{"ticker": "ÄÄÄÄÄÄ", "nShares": 1}], ensure_ascii=False).encode('utf-8')
+    rows = list(iter_portfolio(io.BytesIO(unicode_ticker), chunk_size=3))
+    assert rows == [{"ticker": "ÄÄÄÄÄÄ", "nShares": 1}]  # nosec
+    assert stream_validated_portfolio(io.BytesIO(unicode_ticker), schema) is None  # nosec
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+from PriceApp.price import calculate_rolling_sharpe_ratio
+from PriceApp.streaming import RollingSharpeAccumulator, track_rolling_sharpe, update_all
+
+
+@pytest.fixture
+def price_data():
+    return pd.read_json('test_data.json')
+
+
+def test_accumulator_matches_rolling_sharpe_ratio(price_data):
+    """
+    Test that feeding bars one at a time gives the same values as the pandas rolling calculation.
+    """
+    portfolio = [{"ticker": "AAPL", "nShares": 10}, {"ticker": "NVDA", "nShares": 30}]
+    expected = calculate_rolling_sharpe_ratio(price_data, portfolio, lookback_window=20)
+
+    accumulator = RollingSharpeAccumulator(price_data.iloc[:100], portfolio, lookback_window=20)
+    assert abs(accumulator.sharpe_ratio - expected.iloc[98]) < 1e-9  # nosec
+
+    for i in range(100, len(price_data)):
+        ratio = accumulator.update(price_data.iloc[i])
+        assert abs(ratio - expected.iloc[i - 1]) < 1e-9  # nosec
+
+
+def test_accumulator_not_ready_until_window_is_full(price_data):
+    accumulators = track_rolling_sharpe(
+        price_data.iloc[:5], {'a': [{"ticker": "AAPL", "nShares": 1}]}, lookback_window=20
+    )
+    latest = update_all(accumulators, price_data.iloc[5])
+    assert np.isnan(latest['a'])  # nosec
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from PriceApp import parallel
+from PriceApp.price import calculate_portfolio_daily_returns
+from PriceApp.risk import RiskEngine
+from PriceApp.value_at_risk import calculate_historical_var, calculate_monte_carlo_var
+
+
+@pytest.fixture
+def price_data():
+    return pd.read_json('test_data.json')
+
+
+@pytest.fixture
+def portfolio():
+    return [{"ticker": "AAPL", "nShares": 10}, {"ticker": "TSLA", "nShares": 4}, {"ticker": "NVDA", "nShares": 25}]
+
+
+def test_historical_var_uses_portfolio_returns(price_data, portfolio):
+    total_value = float(sum(stock['nShares'] * price_data[stock['ticker']].iloc[-1] for stock in portfolio))
+    returns = calculate_portfolio_daily_returns(portfolio, price_data, total_value).to_numpy()
+
+    table = calculate_historical_var(portfolio, price_data, confidence=[0.95, 0.99])
+
+    cutoff = np.quantile(returns, 0.05)
+    assert table.loc[0.95, 'var'] == pytest.approx(-cutoff * total_value)  # nosec
+    assert table.loc[0.95, 'cvar'] == pytest.approx(-returns[returns <= cutoff].mean() * total_value)  # nosec
+    assert table.loc[0.99, 'var'] >= table.loc[0.95, 'var']  # nosec
+    assert (table['cvar'] >= table['var']).all()  # nosec
+    assert calculate_historical_var(portfolio, price_data, horizon=10).loc[0.95, 'var'] > table.loc[0.95, 'var']  # nosec
+
+
+def test_monte_carlo_var_is_reproducible_and_matches_normal_var(price_data, portfolio):
+    engine = RiskEngine()
+    inline = calculate_monte_carlo_var(portfolio, price_data, n_paths=200_000, seed=3, n_workers=1, engine=engine)
+    pooled = calculate_monte_carlo_var(portfolio, price_data, n_paths=200_000, seed=3, n_workers=2, engine=engine)
+    pd.testing.assert_frame_equal(inline, pooled)
+
+    # A one day horizon is a normal portfolio return with mean w.mu and variance w' Sigma w
+    moments = engine.moments(price_data[['AAPL', 'TSLA', 'NVDA']])
+    total_value = float(sum(stock['nShares'] * price_data[stock['ticker']].iloc[-1] for stock in portfolio))
+    weights, _ = engine.weights([portfolio], moments, [total_value])
+    mean = weights[0] @ moments['mean']
+    stddev = np.sqrt(weights[0] @ moments['covariance'] @ weights[0])
+    expected = -(mean - 1.6448536269514722 * stddev) * total_value
+    assert inline.loc[0.95, 'var'] == pytest.approx(expected, rel=0.02)  # nosec
+    assert calculate_monte_carlo_var([{"ticker": "NOPE", "nShares": 1}], price_data) is None  # nosec
+
+
+def test_var_without_price_data(price_data, portfolio):
+    unknown = portfolio + [{"ticker": "NOPE", "nShares": 1}]
+    assert calculate_historical_var(unknown, price_data) is None  # nosec
+    assert calculate_monte_carlo_var(unknown, price_data, n_paths=1000, n_workers=1) is None  # nosec
+
+
+def test_pooled_monte_carlo_var_is_deterministic_under_spawn(price_data, portfolio):
+    """
+    Spawned workers rebuild their state from scratch, so repeated pooled runs must still agree.
+    1.5M paths of three tickers make three chunks, so the pool is used.
+    """
+    engine = RiskEngine()
+    first = calculate_monte_carlo_var(portfolio, price_data, n_paths=1_500_000, seed=11, n_workers=2, engine=engine)
+    pool = parallel._pool
+    second = calculate_monte_carlo_var(portfolio, price_data, n_paths=1_500_000, seed=11, n_workers=2, engine=engine)
+
+    assert pool._mp_context.get_start_method() == 'spawn'  # nosec
+    assert parallel._pool is pool  # nosec
+    pd.testing.assert_frame_equal(first, second)
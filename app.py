@@ -1,12 +1,87 @@
-from flask import Flask, request, render_template, send_file
+from flask import Flask, request, render_template, send_file, jsonify, abort, g, Response
 import os
+import time
+import uuid
 import PriceApp.price as price
-
+from PriceApp.batch import calculate_bulk_metrics
+from PriceApp.jobs import JobQueue, QueueFullError
+from PriceApp.graph_store import default_graph_store
+from PriceApp.providers import CoalescingProvider, get_default_provider, set_default_provider
+from PriceApp.metrics import registry
+from PriceApp import profiling
+from PriceApp.rendering import warm_render_pool
+from JSON_Validation.validator import load_schema, stream_validated_portfolio
 
 app = Flask(__name__)
 
-UPLOAD_FOLDER = 'uploads'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Uploads are calculated on a bounded worker pool instead of inside the request
+jobs = JobQueue()
+
+# Concurrent uploads holding the same tickers share one download, local files are read directly
+if get_default_provider().remote:
+    set_default_provider(CoalescingProvider(get_default_provider()))
+
+REQUEST_SECONDS = registry.histogram(
+    'quebec_http_request_seconds', "Time spent handling each request.", ('method', 'route', 'status')
+)
+JOB_QUEUE = registry.gauge('quebec_job_queue', "Jobs in the calculation queue by state.", ('state',))
+
+# Each job's chart is kept in the graph store under its own random key, so charts left on disk by an
+# earlier run can never be served for a new job
+graphs = default_graph_store
+
+# Charts of finished jobs never change, browsers may keep them for an hour
+GRAPH_CACHE_CONTROL = 'private, max-age=3600, immutable'
+
+# Largest number of portfolios accepted by one /api/metrics/bulk request
+MAX_BULK_PORTFOLIOS = int(os.environ.get('QUEBEC_MAX_BULK', 1000))
+
+PAGE_STYLE = '''
+            <style>
+                body {
+                    font-family: Arial, sans-serif;
+                    text-align: center;
+                    margin-top: 50px;
+                }
+                h1 {
+                    color: #333;
+                }
+                img {
+                    max-width: 90%;
+                    height: auto;
+                    margin-top: 20px;
+                }
+                a {
+                    text-decoration: none;
+                    color: #007BFF;
+                }
+                a:hover {
+                    color: #0056b3;
+                }
+            </style>
+'''
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_status(response):
+    g.response_status = response.status_code
+    return response
+
+
+@app.teardown_request
+def record_request_time(error=None):
+    # Runs even when the view raised, which after_request does not, so 500s are timed too
+    if 'request_start' not in g:
+        return
+    status = 500 if error is not None else g.get('response_status', 500)
+    # Label by route pattern, not URL, so job IDs don't create a series each
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, method=request.method, route=route, status=status)
 
 
 @app.route('/')
@@ -45,7 +120,7 @@ def index():
         <h1>Quebec V2</h1>
         <p>Upload a JSON file to generate a stock price graph.</p>
         <form action="/upload" method="post" enctype="multipart/form-data">
-            <input type="file" name="file" accept=".json">
+            <input type="file" name="file" accept=".json,.jsonl">
             <br><br>
             <button type="submit">Upload JSON</button>
         </form>
@@ -56,61 +131,198 @@ def index():
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    global counter
     file = request.files['file']
-    if file and file.filename.endswith('.json'):
-        filepath = os.path.join(UPLOAD_FOLDER, file.filename)
-        file.save(filepath)
-        counter += 1
-        price.calculate_value_sharpe(filepath, counter=counter)
-        return '''
+    if file and file.filename.endswith(('.json', '.jsonl')):
+        # Parse and validate the upload straight from the request stream, one holding at a time
+        portfolio = stream_validated_portfolio(file.stream, load_schema('stock-schema.json'))
+        if portfolio is None:
+            return "Portfolio validation failed. Please check the file against the schema.", 400
+        graph_key = uuid.uuid4().hex
+        try:
+            if profiling.should_profile(request.headers.get('X-Quebec-Profile')):
+                job_id = jobs.submit(
+                    profiling.profile_call,
+                    'upload',
+                    price.calculate_value_sharpe,
+                    portfolio,
+                    counter=graph_key,
+                    graph_store=graphs,
+                )
+            else:
+                job_id = jobs.submit(price.calculate_value_sharpe, portfolio, counter=graph_key, graph_store=graphs)
+        except QueueFullError as e:
+            response = jsonify({'error': str(e), 'queue': jobs.stats()})
+            response.status_code = 503
+            response.headers['Retry-After'] = '5'
+            return response
+        return (
+            f'''
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Quebec V2 - Processing</title>
+            <meta http-equiv="refresh" content="1;url=/jobs/{job_id}/view">
+            {PAGE_STYLE}
+        </head>
+        <body>
+            <h1>Processing portfolio</h1>
+            <p>Job ID: {job_id}</p>
+            <a href="/jobs/{job_id}">Job status</a>
+        </body>
+        </html>
+        ''',
+            202,
+        )
+    return "Invalid file format. Please upload a valid JSON or JSON Lines file.", 400
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.status(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(job)
+
+
+@app.route('/jobs/<job_id>/view')
+def job_view(job_id):
+    job = jobs.status(job_id)
+    if job is None:
+        abort(404)
+    if job['status'] in ('queued', 'running'):
+        return f'''
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Quebec V2 - Processing</title>
+            <meta http-equiv="refresh" content="1">
+            {PAGE_STYLE}
+        </head>
+        <body>
+            <h1>Processing portfolio</h1>
+            <p>Job {job_id} is {job['status']}.</p>
+        </body>
+        </html>
+        '''
+    if job['result'] is None:
+        return (
+            f'''
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Quebec V2 - Error</title>
+            {PAGE_STYLE}
+        </head>
+        <body>
+            <h1>Portfolio could not be calculated</h1>
+            <a href="/">Go Back</a>
+        </body>
+        </html>
+        ''',
+            422,
+        )
+    return f'''
         <!DOCTYPE html>
         <html>
         <head>
             <title>Quebec V2 - Graph</title>
-            <style>
-                body {
-                    font-family: Arial, sans-serif;
-                    text-align: center;
-                    margin-top: 50px;
-                }
-                h1 {
-                    color: #333;
-                }
-                img {
-                    max-width: 90%;
-                    height: auto;
-                    margin-top: 20px;
-                }
-                a {
-                    text-decoration: none;
-                    color: #007BFF;
-                }
-                a:hover {
-                    color: #0056b3;
-                }
-            </style>
+            {PAGE_STYLE}
         </head>
         <body>
             <h1>Portfolio</h1>
-            <img src="/graph" alt="Stock Graph">
+            <img src="/jobs/{job_id}/graph" alt="Stock Graph">
             <br><br>
             <a href="/">Go Back</a>
         </body>
         </html>
         '''
-    return "Invalid file format. Please upload a valid JSON file.", 400
+
+
+@app.route('/jobs/<job_id>/graph')
+def job_graph(job_id):
+    job = jobs.status(job_id)
+    if job is None or job['result'] is None:
+        abort(404)
+    return send_graph(job['result']['counter'])
+
+
+def send_graph(key):
+    # Serve a chart from the graph store, answering If-None-Match with 304
+    graph = graphs.get(key)
+    if graph is None:
+        abort(404)
+    png, etag = graph
+    response = Response(png, mimetype='image/png')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = GRAPH_CACHE_CONTROL
+    return response.make_conditional(request)
+
+
+@app.route('/queue')
+def queue_status():
+    return jsonify(jobs.stats())
+
+
+@app.route('/api/metrics', methods=['POST'])
+def api_metrics():
+    """
+    Total value, Sharpe ratio and rolling Sharpe ratio of one portfolio as JSON, no chart is rendered.
+    The body (or an uploaded 'file') is a JSON array or JSON Lines portfolio.
+    """
+    upload = request.files.get('file')
+    result = price.calculate_portfolio_metrics(upload.stream if upload else request.stream)
+    if result is None:
+        return jsonify({'error': 'Portfolio could not be validated or calculated'}), 422
+    return jsonify(result)
+
+
+@app.route('/api/metrics/bulk', methods=['POST'])
+def api_metrics_bulk():
+    """
+    Metrics for many portfolios evaluated together.
+    The body is a JSON list of portfolios, or {"portfolios": ...} with a list or a name -> portfolio object.
+    """
+    body = request.get_json(silent=True)
+    portfolios = body.get('portfolios') if isinstance(body, dict) else body
+    if not isinstance(portfolios, (list, dict)):
+        return jsonify({'error': 'Expected a list of portfolios or {"portfolios": ...}'}), 400
+    if len(portfolios) > MAX_BULK_PORTFOLIOS:
+        return jsonify({'error': f"At most {MAX_BULK_PORTFOLIOS} portfolios per request"}), 413
+    return jsonify({'results': calculate_bulk_metrics(portfolios)})
+
+
+@app.route('/metrics')
+def metrics():
+    stats = jobs.stats()
+    JOB_QUEUE.set(stats['queued'], state='queued')
+    JOB_QUEUE.set(stats['running'], state='running')
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/profiles')
+def profiles():
+    return jsonify(profiling.list_profiles())
+
+
+@app.route('/profiles/<name>')
+def profile_summary(name):
+    summary = profiling.load_profile(name)
+    if summary is None:
+        abort(404)
+    return jsonify(summary)
 
 
 @app.route('/graph')
 def get_graph():
-    global counter
-    graph_dir = os.path.abspath("graphs")
-    file_path = os.path.join(graph_dir, f"graph_{counter}.png")
-    return send_file(file_path, mimetype='image/png')
+    # The most recently rendered chart
+    if graphs.latest is None:
+        abort(404)
+    response = send_graph(graphs.latest)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 
 if __name__ == '__main__':
-    global counter
-    counter = 0
+    # Start the chart render processes before the first upload needs them
+    warm_render_pool()
     app.run(host='0.0.0.0', port=5000, debug=True)
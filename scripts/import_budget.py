@@ -0,0 +1,77 @@
+"""
+Report how long importing the app's modules takes and fail when a module goes over its budget.
+
+Each module is imported in a fresh interpreter with `python -X importtime`, so the numbers are
+cold-start times. Usage:
+
+    python scripts/import_budget.py                # report and check the default budgets
+    python scripts/import_budget.py --top 15       # also list the 15 slowest imports
+    python scripts/import_budget.py PriceApp.price=100
+"""
+
+import os
+import sys
+import argparse
+import subprocess  # nosec B404
+
+# Cold import budgets in milliseconds
+DEFAULT_BUDGETS = {
+    'PriceApp.price': 100,
+    'JSON_Validation.validator': 25,
+    'app': 400,
+}
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _importtime(code):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],  # nosec B603
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:') :].split('|')
+        imports.append((int(cumulative) / 1000, name.strip()))
+    return imports
+
+
+def measure_import(module):
+    """
+    Import module in a fresh interpreter and return (total ms, list of (cumulative ms, module name)).
+    Modules the interpreter imports at startup anyway are left out of the list.
+    """
+    startup = {name for _, name in _importtime('pass')}
+    imports = [(ms, name) for ms, name in _importtime(f'import {module}') if name not in startup]
+    total = next((ms for ms, name in reversed(imports) if name == module), 0.0)
+    return total, imports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('budgets', nargs='*', help="module=milliseconds, replaces the default budgets")
+    parser.add_argument('--top', type=int, default=0, help="show the N slowest imports of each module")
+    args = parser.parse_args(argv)
+
+    budgets = dict(DEFAULT_BUDGETS)
+    if args.budgets:
+        budgets = {module: float(ms) for module, ms in (budget.split('=') for budget in args.budgets)}
+
+    over_budget = False
+    for module, budget in budgets.items():
+        total, imports = measure_import(module)
+        status = 'ok' if total <= budget else 'OVER BUDGET'
+        over_budget = over_budget or total > budget
+        print(f"{module:<30} {total:8.1f} ms  (budget {budget:.0f} ms)  {status}")
+        for ms, name in sorted(imports, reverse=True)[: args.top]:
+            print(f"    {ms:8.1f} ms  {name}")
+    return 1 if over_budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())